@@ -0,0 +1,232 @@
+"""
+اختبار حمل لمسار HF Inference على خادم وهمي محلي
+HF inference load test against a local mock server
+
+يشغّل HFInferenceOCR.extract_text الحقيقي (نفس منطق Retry/Backoff) على
+mock_hf_server.py ويقيس لكل تركيبة من API_MAX_RETRIES وAPI_RETRY_BASE_DELAY:
+- الإنتاجية (صفحات ناجحة/ثانية) ونسبة النجاح والصفحات المتجاوزة للمهلة
+- زمن الصفحة p50 / p90 / p99 / max (شاملاً كل المحاولات والانتظار)
+- تضخيم إعادة المحاولة = طلبات وصلت الخادم ÷ صفحات أرسلها العميل
+
+العملاء:
+    extract_text — خيوط متزامنة (--concurrency) تستدعي extract_text مباشرة
+    engine       — HFEngine.map_pages عبر مجمّع عمّال المحرك كما في التطبيق
+
+Usage:
+    python benchmarks/bench_hf_load.py --requests 200 --concurrency 8 \\
+        --latency lognormal:0.3,0.5 --error-rate 0.05 --rate-limit 6 \\
+        --max-retries 1,3,5 --base-delay 0.25,0.5,1
+    # خادم خارجي (python benchmarks/mock_hf_server.py أو أي خادم متوافق)
+    python benchmarks/bench_hf_load.py --url http://127.0.0.1:8765/
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_hf_server import MockHFServer, add_server_arguments, server_kwargs  # noqa: E402
+
+MOCK_TOKEN = "mock-token"
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def _server_call(url: str, path: str, method: str = "GET") -> dict:
+    import requests
+
+    response = requests.request(method, url.rstrip("/") + path, timeout=10)
+    return response.json()
+
+
+def _sample_image():
+    """صفحة صغيرة ثابتة — الحمولة لا تؤثر على الخادم الوهمي"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("L", (600, 200), 255)
+    ImageDraw.Draw(image).text((20, 80), "load test page", fill=0)
+    return image
+
+
+def _configure(url: str, max_retries: int, base_delay: float):
+    """
+    توجيه HFInferenceOCR إلى الخادم وضبط Retry
+
+    extract_text يقرأ هذه الثوابت من وحدته عند كل استدعاء
+    """
+    import core.ocr_engine as ocr_engine
+
+    ocr_engine.HF_BASE_URL = url
+    ocr_engine.API_MAX_RETRIES = max_retries
+    ocr_engine.API_RETRY_BASE_DELAY = base_delay
+
+
+def run_extract_text(args, image) -> list:
+    """عميل مباشر: --concurrency خيوط تستدعي extract_text"""
+    from core.image_processor import ImageProcessor
+    from core.ocr_engine import HFInferenceOCR
+
+    data = ImageProcessor.image_to_bytes(image)
+
+    def one(_):
+        start = time.perf_counter()
+        result = HFInferenceOCR.extract_text(
+            data, args.model, MOCK_TOKEN, timeout=args.page_timeout
+        )
+        return result, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        return list(pool.map(one, range(args.requests)))
+
+
+def run_engine(args, image) -> list:
+    """عميل التطبيق: HFEngine.map_pages عبر مجمّع المحرك المشترك"""
+    from core.engines import get_engine
+
+    engine = get_engine("hf", {
+        "hf_model": args.model,
+        "hf_token": MOCK_TOKEN,
+        "page_timeout": args.page_timeout,
+    })
+
+    def one(page):
+        start = time.perf_counter()
+        result = engine.recognize(page)
+        return result, time.perf_counter() - start
+
+    pages = ((i, image) for i in range(args.requests))
+    return [value for _, value in engine.map_pages(one, pages)]
+
+
+CLIENTS = {"extract_text": run_extract_text, "engine": run_engine}
+
+
+def run_scenario(args, url: str, image, max_retries: int, base_delay: float) -> dict:
+    """تركيبة واحدة من إعدادات Retry — الخادم يُصفَّر قبلها"""
+    _configure(url, max_retries, base_delay)
+    _server_call(url, "/__reset", "POST")
+
+    start = time.perf_counter()
+    records = CLIENTS[args.client](args, image)
+    wall = time.perf_counter() - start
+
+    server = _server_call(url, "/__stats")
+    ok = [seconds for result, seconds in records if "error" not in result]
+    timed_out = sum(1 for result, _ in records if result.get("timed_out"))
+
+    return {
+        "max_retries": max_retries,
+        "base_delay": base_delay,
+        "requests": len(records),
+        "ok": len(ok),
+        "failed": len(records) - len(ok),
+        "timed_out": timed_out,
+        "success_rate": round(len(ok) / max(len(records), 1), 3),
+        "wall_s": round(wall, 2),
+        "throughput": round(len(ok) / wall, 2),
+        "p50": round(_percentile(ok, 0.50), 3),
+        "p90": round(_percentile(ok, 0.90), 3),
+        "p99": round(_percentile(ok, 0.99), 3),
+        "max": round(max(ok, default=0.0), 3),
+        "server_requests": server["requests"],
+        "amplification": round(server["requests"] / max(len(records), 1), 2),
+        "by_status": server["by_status"],
+    }
+
+
+def _print_table(rows: list):
+    header = (
+        f"{'retries':>7} {'delay':>6} {'ok%':>6} {'t/o':>4} {'pages/s':>8} "
+        f"{'p50':>7} {'p90':>7} {'p99':>7} {'max':>7} {'ampl':>5}  server status"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        statuses = " ".join(f"{k}:{v}" for k, v in r["by_status"].items())
+        print(
+            f"{r['max_retries']:>7} {r['base_delay']:>6} "
+            f"{r['success_rate'] * 100:>5.1f}% {r['timed_out']:>4} "
+            f"{r['throughput']:>8.2f} {r['p50']:>7.3f} {r['p90']:>7.3f} "
+            f"{r['p99']:>7.3f} {r['max']:>7.3f} {r['amplification']:>5.2f}  {statuses}"
+        )
+
+
+def main() -> int:
+    from config import API_MAX_RETRIES, API_RETRY_BASE_DELAY, HF_OCR_MODELS, HF_PAGE_TIMEOUT
+
+    parser = argparse.ArgumentParser(description="HF inference load test (mock server)")
+    parser.add_argument("--client", choices=list(CLIENTS), default="extract_text")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8, help="لعميل extract_text")
+    parser.add_argument("--model", default=next(iter(HF_OCR_MODELS)))
+    parser.add_argument(
+        "--max-retries", default=str(API_MAX_RETRIES),
+        help="قيمة أو قائمة مفصولة بفواصل (تجربة كل التركيبات)",
+    )
+    parser.add_argument("--base-delay", default=str(API_RETRY_BASE_DELAY))
+    parser.add_argument("--page-timeout", type=float, default=HF_PAGE_TIMEOUT)
+    parser.add_argument("--url", default=None, help="خادم خارجي بدل الخادم المدمج")
+    parser.add_argument("--json", default=None, help="حفظ النتائج في ملف JSON")
+    parser.add_argument(
+        "--min-success-rate", type=float, default=None,
+        help="فشل إذا قلّت نسبة النجاح في أي تركيبة عن هذه القيمة",
+    )
+    parser.add_argument("--verbose", action="store_true", help="سجلات كل محاولة")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    import core.ocr_engine as ocr_engine
+
+    if not args.verbose:
+        ocr_engine.logger.setLevel(logging.ERROR)
+
+    grid = list(itertools.product(
+        [int(v) for v in args.max_retries.split(",")],
+        [float(v) for v in args.base_delay.split(",")],
+    ))
+    image = _sample_image()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = MockHFServer(**server_kwargs(args)).start()
+        url = server.url
+    print(f"client={args.client} requests={args.requests} server={url}")
+
+    try:
+        rows = [
+            run_scenario(args, url, image, retries, delay)
+            for retries, delay in grid
+        ]
+    finally:
+        if server:
+            server.stop()
+
+    _print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+    if args.min_success_rate is not None:
+        worst = min(r["success_rate"] for r in rows)
+        if worst < args.min_success_rate:
+            print(f"FAIL: success rate {worst:.3f} < {args.min_success_rate}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+قياس زمن بدء تشغيل التطبيق
+Startup-time benchmark
+
+يقيس في عملية Python جديدة لكل تشغيل:
+- زمن استيراد streamlit_app (حتى أول رسم للواجهة)
+- الوحدات الثقيلة التي تُحمَّل عند البدء (يجب أن تبقى كسولة)
+- زمن فحص قدرات Tesseract أول مرة ثم من الذاكرة المؤقتة
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--max-ms 2000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# وحدات يجب ألا تُستورد عند بدء التشغيل
+LAZY_MODULES = ["fitz", "pytesseract", "requests"]
+
+PROBE_SCRIPT = """
+import json, sys, time
+
+t0 = time.perf_counter()
+import streamlit_app  # noqa: F401
+import_ms = (time.perf_counter() - t0) * 1000
+
+loaded = [m for m in {lazy!r} if m in sys.modules]
+
+from core.ocr_engine import TesseractOCR
+
+t0 = time.perf_counter()
+TesseractOCR.get_capabilities()
+probe_cold_ms = (time.perf_counter() - t0) * 1000
+
+t0 = time.perf_counter()
+for _ in range(100):
+    TesseractOCR.is_available()
+probe_cached_ms = (time.perf_counter() - t0) * 1000 / 100
+
+print(json.dumps({{
+    "import_ms": import_ms,
+    "loaded": loaded,
+    "probe_cold_ms": probe_cold_ms,
+    "probe_cached_ms": probe_cached_ms,
+}}))
+"""
+
+
+def run_once() -> dict:
+    """تشغيل قياس واحد في عملية جديدة"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE_SCRIPT.format(lazy=LAZY_MODULES)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    # آخر سطر هو نتيجة JSON (ما قبله سجلات التطبيق)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Startup-time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--max-ms", type=float, default=None,
+        help="فشل إذا تجاوز وسيط زمن الاستيراد هذه القيمة",
+    )
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+
+    import_ms = statistics.median(r["import_ms"] for r in runs)
+    probe_cold = statistics.median(r["probe_cold_ms"] for r in runs)
+    probe_cached = statistics.median(r["probe_cached_ms"] for r in runs)
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+
+    print(f"import streamlit_app : {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"tesseract probe cold : {probe_cold:8.1f} ms")
+    print(f"tesseract probe hit  : {probe_cached:8.4f} ms")
+    print(f"eager heavy modules  : {', '.join(loaded) or 'none'}")
+
+    failed = False
+    if loaded:
+        print("FAIL: heavy modules imported at startup")
+        failed = True
+    if args.max_ms is not None and import_ms > args.max_ms:
+        print(f"FAIL: startup {import_ms:.1f} ms > {args.max_ms} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
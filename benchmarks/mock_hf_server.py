@@ -0,0 +1,277 @@
+"""
+خادم محلي يحاكي HF Inference API لاختبارات الحمل
+Local mock HF inference server for offline load testing
+
+يحاكي سلوك الخادم الحقيقي تحت الضغط بدون شبكة ولا Token:
+- زمن استجابة من توزيع قابل للضبط (ثابت، منتظم، أُسّي، لوغاريتمي طبيعي)
+- نسبة أخطاء عشوائية (500)
+- نوافذ "النموذج قيد التحميل" (503) عند البدء أو بشكل دوري
+- حد معدل الطلبات (429) بدلو رموز (token bucket)
+
+المسارات:
+    POST /models/<model_id>   → [{"generated_text": ...}] أو خطأ
+    GET  /status/<model_id>   → {"loaded", "state"}
+    GET  /__stats             → عدد الطلبات حسب رمز الحالة
+    POST /__reset             → تصفير العدادات وبدء الزمن من جديد
+
+Usage:
+    python benchmarks/mock_hf_server.py --port 8765 --latency lognormal:0.4,0.5 \\
+        --error-rate 0.02 --cold-start 5 --rate-limit 10
+    # ثم في التطبيق: HF_BASE_URL = "http://127.0.0.1:8765/"
+"""
+
+import argparse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import random
+import sys
+import threading
+import time
+
+
+def parse_latency(spec: str):
+    """
+    توزيع زمن الاستجابة (بالثواني) من وصف نصي
+
+    fixed:0.2 — uniform:0.1,0.5 — exp:0.3 (المتوسط)
+    lognormal:0.3,0.5 (الوسيط، sigma)
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "exp":
+        return lambda: random.expovariate(1 / values[0])
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class MockHFServer:
+    """
+    خادم HF وهمي في خيط خلفي — يُستخدم كـ context manager
+
+    Args:
+        latency: وصف التوزيع (parse_latency)
+        error_rate: احتمال استجابة 500 لكل طلب
+        cold_start: ثوانٍ من البدء يرد فيها النموذج بـ 503 (قيد التحميل)
+        loading_every / loading_for: نافذة 503 بطول loading_for كل
+            loading_every ثانية (0 = بدون) — تحاكي تفريغ النموذج وإعادة تحميله
+        rate_limit: طلبات في الثانية (0 = بدون حد) — الزائد يأخذ 429
+        burst: سعة دلو الرموز (الافتراضي = rate_limit)
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "fixed:0.05",
+        error_rate: float = 0.0,
+        cold_start: float = 0.0,
+        loading_every: float = 0.0,
+        loading_for: float = 0.0,
+        rate_limit: float = 0.0,
+        burst: float = None,
+        seed: int = None,
+    ):
+        if seed is not None:
+            random.seed(seed)
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.cold_start = cold_start
+        self.loading_every = loading_every
+        self.loading_for = loading_for
+        self.rate_limit = rate_limit
+        self.burst = burst or max(rate_limit, 1)
+
+        self._lock = threading.Lock()
+        self._reset()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _reset(self):
+        with self._lock:
+            self.started = time.monotonic()
+            self.counts = Counter()
+            self._tokens = self.burst
+            self._refilled = self.started
+
+    # ─── السلوك ──────────────────────────────────────────────
+
+    def loading_remaining(self) -> float:
+        """ثوانٍ متبقية من نافذة التحميل الحالية (0 = النموذج جاهز)"""
+        elapsed = time.monotonic() - self.started
+        if elapsed < self.cold_start:
+            return self.cold_start - elapsed
+        if self.loading_every and self.loading_for:
+            phase = (elapsed - self.cold_start) % self.loading_every
+            if phase < self.loading_for:
+                return self.loading_for - phase
+        return 0.0
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._refilled) * self.rate_limit
+            )
+            self._refilled = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def respond(self, body: bytes) -> tuple:
+        """(رمز الحالة، JSON، ترويسات) لطلب استدلال"""
+        if not self._take_token():
+            return 429, {"error": "Rate limit reached"}, {"Retry-After": "1"}
+
+        remaining = self.loading_remaining()
+        if remaining:
+            return 503, {
+                "error": "Model is currently loading",
+                "estimated_time": round(remaining, 1),
+            }, {}
+
+        time.sleep(max(self.latency(), 0))
+        if random.random() < self.error_rate:
+            return 500, {"error": "Internal server error"}, {}
+        return 200, [{"generated_text": f"mock text ({len(body)} bytes)"}], {}
+
+    def _record(self, status: int):
+        with self._lock:
+            self.counts[status] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": sum(self.counts.values()),
+                "by_status": {str(k): v for k, v in sorted(self.counts.items())},
+                "uptime": round(time.monotonic() - self.started, 2),
+            }
+
+    # ─── HTTP ────────────────────────────────────────────────
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status: int, payload, headers: dict = None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path == "/__reset":
+                    server._reset()
+                    return self._send(200, {"reset": True})
+                if not self.path.startswith("/models/"):
+                    return self._send(404, {"error": "Not found"})
+                if not self.headers.get("Authorization", "").startswith("Bearer "):
+                    return self._send(401, {"error": "Invalid token"})
+
+                status, payload, headers = server.respond(body)
+                server._record(status)
+                self._send(status, payload, headers)
+
+            def do_GET(self):
+                if self.path == "/__stats":
+                    return self._send(200, server.stats())
+                if self.path.startswith("/status/"):
+                    loaded = not server.loading_remaining()
+                    return self._send(
+                        200, {"loaded": loaded, "state": "Loaded" if loaded else "Loading"}
+                    )
+                self._send(404, {"error": "Not found"})
+
+            def log_message(self, format, *args):
+                pass  # بدون سطر لكل طلب
+
+        return Handler
+
+    def start(self) -> "MockHFServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="mock-hf", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """معاملات سلوك الخادم — مشتركة مع bench_hf_load.py"""
+    parser.add_argument(
+        "--latency", default="lognormal:0.3,0.5",
+        help="fixed:S | uniform:A,B | exp:MEAN | lognormal:MEDIAN,SIGMA",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--cold-start", type=float, default=0.0, help="ثوانٍ 503 عند البدء")
+    parser.add_argument("--loading-every", type=float, default=0.0)
+    parser.add_argument("--loading-for", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="طلب/ثانية")
+    parser.add_argument("--burst", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def server_kwargs(args) -> dict:
+    return {
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "cold_start": args.cold_start,
+        "loading_every": args.loading_every,
+        "loading_for": args.loading_for,
+        "rate_limit": args.rate_limit,
+        "burst": args.burst,
+        "seed": args.seed,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mock HF inference server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockHFServer(args.host, args.port, **server_kwargs(args))
+    print(f"Mock HF server on {server.url} (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        print(json.dumps(server.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,31 @@
 Application Settings & Constants
 """
 
+# ═══════════════════════════════════════════════════════════
+# محركات OCR (اسم العرض ← اسم المحرك في السجل core.engines)
+# ═══════════════════════════════════════════════════════════
+OCR_METHODS = {
+    "Tesseract (محلي)": "tesseract",
+    "HF Inference API (سحابي)": "hf",
+}
+
+# حجم مجمّع العمّال لكل محرك (مشترك لكل العملية)
+ENGINE_POOL_SIZES = {
+    "tesseract": 4,
+    "hf": 2,
+}
+
+# المجدول المشترك بين الجلسات — الدفعات الزائدة تنتظر أو تُرفض
+SCHEDULER_MAX_BATCH_JOBS = 2  # دفعات تعمل في نفس الوقت
+SCHEDULER_MAX_WAITING_JOBS = 8  # أكثر من ذلك ← رفض فوري
+SCHEDULER_DEFAULT_PAGE_SECONDS = 3.0  # تقدير أولي لزمن العمل الواحد (صفحة كاملة)
+SCHEDULER_WAIT_POLL = 1.0  # ثانية بين تحديثات الترتيب أثناء الانتظار
+
+# خط المعالجة المرحلي (رسم ← تحسين ← OCR) — الرسم في خيط واحد (MuPDF)
+# وعمّال OCR من ENGINE_POOL_SIZES
+PIPELINE_PREPROCESS_WORKERS = 2
+PIPELINE_QUEUE_DEPTH = 4  # صفحات تنتظر بين كل مرحلتين (سقف الذاكرة)
+
 # ═══════════════════════════════════════════════════════════
 # لغات Tesseract OCR
 # ═══════════════════════════════════════════════════════════
@@ -18,6 +43,16 @@ TESSERACT_LANGUAGES = {
     "ألماني": "deu",
 }
 
+# كشف نوع الخط (OSD) — لتشغيل أقل عدد من نماذج اللغات لكل صفحة
+SCRIPT_LANGUAGES = {
+    "Arabic": ["ara"],
+    "Hebrew": ["heb"],
+    "Latin": ["eng", "fra", "spa", "deu"],
+}
+SCRIPT_DETECTION_MAX_DIMENSION = 1500
+SCRIPT_DETECTION_MIN_CONFIDENCE = 2.0  # ثقة OSD في نوع الخط
+SCRIPT_FALLBACK_CONFIDENCE = 60  # أقل من ذلك ← إعادة بكل اللغات المختارة
+
 # أوضاع تقسيم الصفحة (Page Segmentation Modes)
 TESSERACT_PSM_MODES = {
     "تلقائي كامل (مُوصى)": 3,
@@ -64,18 +99,122 @@ API_TIMEOUT = 120
 API_MAX_RETRIES = 3
 API_RETRY_BASE_DELAY = 2
 
+# مهلة الصفحة الواحدة (ثانية، 0 = بدون) — الصفحة المتجاوزة تُعلَّم timed_out
+TESSERACT_PAGE_TIMEOUT = 120
+HF_PAGE_TIMEOUT = 300  # كل المحاولات معاً
+# إعادة الصفحات المتجاوزة للمهلة بإعدادات أرخص: دقة أقل، كتلة نص واحدة
+# (بدون تحليل التخطيط)، بدون إزالة الضوضاء والخطوات الإضافية
+TIMEOUT_RETRY_DPI = "عادي (150 DPI)"
+TIMEOUT_RETRY_OVERRIDES = {
+    "psm": 6,
+    "denoise": False,
+    "auto_language": False,
+    "adaptive_cascade": False,
+    "tiled_ocr": False,
+}
+
+# حالة نماذج HF — تُخزَّن مؤقتاً وتُحدَّث في الخلفية
+HF_STATUS_TTL = 60  # ثانية
+
 # ═══════════════════════════════════════════════════════════
 # إعدادات معالجة الصور
 # ═══════════════════════════════════════════════════════════
 IMAGE_MAX_DIMENSION = 4096
 IMAGE_MIN_DIMENSION = 384
 
+# OCR مقسّم للصور الأكبر من IMAGE_MAX_DIMENSION (بدل التصغير)
+TILE_TRIGGER_DIMENSION = IMAGE_MAX_DIMENSION
+TILE_SIZE = 2048
+TILE_OVERLAP = 256  # أكبر من عرض أطول كلمة متوقعة
+
+# كشف الصفحات الفارغة (فواصل المسح، الوجه الخلفي) — تُتخطى بدون OCR
+# على نسخة مصغّرة: نسبة بكسلات الحبر (أغمق من الخلفية بـ BLANK_INK_CONTRAST)
+# والانحراف المعياري للسطوع — الصفحة فارغة إذا لم يتجاوز أيٌّ منهما حدّه
+BLANK_THUMBNAIL_SIZE = 256
+BLANK_MARGIN_RATIO = 0.04  # حواف تُستبعد (ظل حافة الماسح، ثقوب التخريم)
+BLANK_INK_CONTRAST = 48  # الحبر الباهت من الوجه الآخر لا يُحسب
+BLANK_PAGE_SENSITIVITY = {
+    "معطّل": None,
+    "منخفضة (فارغة تماماً)": {"max_ink_ratio": 0.0001, "max_std": 3.0},
+    "متوسطة": {"max_ink_ratio": 0.0003, "max_std": 4.0},
+    "عالية (شبه فارغة — رقم صفحة، ختم)": {"max_ink_ratio": 0.001, "max_std": 6.0},
+}
+DEFAULT_BLANK_SENSITIVITY = "متوسطة"
+
+# قص الهوامش البيضاء وحواف الماسح السوداء قبل التحسين وOCR
+# (إسقاطات الصفوف والأعمدة على نسخة مصغّرة — المواقع تُعاد لفضاء الصفحة)
+AUTOCROP_THUMBNAIL_SIZE = 512
+AUTOCROP_BORDER_LEVEL = 80  # بكسل أغمق من ذلك = حافة ماسح
+AUTOCROP_BORDER_RATIO = 0.6  # صف/عمود حافة: هذه النسبة منه داكنة
+AUTOCROP_INK_CONTRAST = 40  # يختلف عن الخلفية بهذا القدر (أغمق أو أفتح) = محتوى
+AUTOCROP_MIN_INK_PIXELS = 2  # لكل صف/عمود في النسخة المصغّرة
+AUTOCROP_PADDING_RATIO = 0.02  # هامش يُترك حول المحتوى (Tesseract يحتاجه)
+AUTOCROP_MIN_GAIN = 0.1  # لا قص إذا وفّر أقل من 10% من المساحة
+
+# الصفحات المكررة (أغلفة، نماذج، ملاحق الشروط) — تُعاد نتيجة الصفحة الأصلية
+# بصمة dHash (256 بت) لإيجاد المرشحين، ثم تحقق بمقارنة نسخة رمادية مصغّرة
+# كتلةً كتلة (أقصى فرق متوسط لكتلة أفقية) فلا تُدمج نماذج بتعبئة مختلفة
+DUPLICATE_SIGNATURE_SIZE = (128, 176)
+DUPLICATE_HASH_SIZE = 16
+DUPLICATE_BLOCK_WIDTH = 8
+DUPLICATE_INDEX_MAX_PAGES = 1000  # لكل جلسة (~22 KB للصفحة)
+DUPLICATE_PAGE_THRESHOLDS = {
+    "معطّل": None,
+    "صارم (نسخ متطابقة)": {"max_hash_distance": 10, "max_block_diff": 4.5},
+    # يتحمّل إعادة ضغط JPEG وضجيج المسح (فرق الكتل ≤ ~5.5)، ويبقى دون تعديل
+    # بضعة أحرف (≥ ~14). نفس الصفحة بدقة رسم أخرى تصل إلى ~21 (150/200 DPI)
+    # فلا تُطابَق — رفع الحد ليشملها يدمج صفحات معدّلة
+    "مرن (نسخ معاد ضغطها)": {"max_hash_distance": 20, "max_block_diff": 12.0},
+}
+DEFAULT_DUPLICATE_THRESHOLD = "صارم (نسخ متطابقة)"
+
 ENHANCEMENT_DEFAULTS = {
     "contrast": 1.3,
     "brightness": 1.05,
     "sharpness": 1.5,
 }
 
+# ═══════════════════════════════════════════════════════════
+# إعادة المحاولة التلقائية حسب الثقة (Cascade)
+# ═══════════════════════════════════════════════════════════
+CASCADE_CONFIDENCE_THRESHOLD = 70
+CASCADE_BUDGET_FACTOR = 1.5  # إجمالي الحساب ≤ 1.5 × تكلفة المرور الأول للمستند
+CASCADE_LINE_UPSCALE = 2.0  # تكبير (LANCZOS) قصاصات الأسطر ضعيفة الثقة
+# بدائل الصفحة الكاملة بالترتيب من الأرخص للأغلى
+# upscale: تكبير الصورة المرسومة نفسها بالاستيفاء — لا إعادة رسم PDF بدقة
+# أعلى (الصفحة تصل للسلسلة مقصوصة ومحسّنة بدون مصدرها)، يفيد الخط الصغير فقط
+CASCADE_PAGE_STRATEGIES = [
+    {"name": "psm6", "psm": 6},
+    {"name": "binarize", "binarize": True},
+    {"name": "upscale", "scale": 1.5},
+]
+
+# ═══════════════════════════════════════════════════════════
+# الضبط التلقائي للإعدادات (سرعة مقابل دقة)
+# ═══════════════════════════════════════════════════════════
+TUNER_SAMPLE_PAGES = 3
+# أوضاع التقسيم المناسبة لصفحات كاملة (بدون سطر/كلمة واحدة)
+TUNER_PSM_CANDIDATES = [
+    "تلقائي كامل (مُوصى)",
+    "عمود نص واحد",
+    "كتلة نص موحّدة (للجداول)",
+    "نص مبعثر (Sparse)",
+]
+_TUNER_BASE = dict(
+    ENHANCEMENT_DEFAULTS,
+    enable_enhancement=True, grayscale=True, denoise=True, binarize=False,
+)
+TUNER_ENHANCEMENT_PRESETS = {
+    "بدون تحسين": {"enable_enhancement": False},
+    "افتراضي": _TUNER_BASE,
+    "بدون إزالة الضوضاء": dict(_TUNER_BASE, denoise=False),
+    "ثنائي": dict(_TUNER_BASE, binarize=True),
+    "تباين عالٍ": dict(_TUNER_BASE, contrast=2.0, sharpness=2.0),
+}
+TUNER_CONFIDENCE_TOLERANCE = 2.0  # نقاط ثقة — أرخص إعداد ضمنها من الأفضل
+TUNER_MIN_WORD_RATIO = 0.8  # أقل من ذلك من أكبر عدد كلمات ← يُستبعد
+TUNING_PROFILES_FILE = "tuning_profiles.json"
+
 # ═══════════════════════════════════════════════════════════
 # إعدادات PDF
 # ═══════════════════════════════════════════════════════════
@@ -84,12 +223,99 @@ PDF_DPI_OPTIONS = {
     "جيد (200 DPI)": 2.0,
     "عالي (250 DPI)": 2.5,
     "عالي جداً (300 DPI)": 3.0,
+    "تلقائي (حسب حجم الخط)": None,
 }
 DEFAULT_PDF_DPI = "جيد (200 DPI)"
 
+# الاختيار التلقائي للدقة لكل صفحة — أقل مقياس يعطي Tesseract ارتفاع الحرف المطلوب
+AUTO_DPI_TARGET_GLYPH_HEIGHT = 22  # ارتفاع الحرف الكبير بالبكسل
+AUTO_DPI_PROBE_SCALE = 1.0  # 72 DPI لصورة الفحص
+AUTO_DPI_MIN_SCALE = 1.0
+AUTO_DPI_MAX_SCALE = 4.0
+AUTO_DPI_FALLBACK_SCALE = 2.0
+
+# ملفات إخراج تحويل الصور إلى PDF
+# dpi: الدقة المستهدفة (None = بدون تصغير) — mode: RGB / L (رمادي) / 1 (ثنائي)
+# format: ترميز الصورة داخل PDF — quality: جودة JPEG
+PDF_OUTPUT_PROFILES = {
+    "أصلي (بدون تصغير)": {"dpi": None, "mode": "RGB", "format": "JPEG", "quality": 75},
+    "أرشيف (300 DPI)": {"dpi": 300, "mode": "RGB", "format": "JPEG", "quality": 90},
+    "شاشة (150 DPI)": {"dpi": 150, "mode": "RGB", "format": "JPEG", "quality": 65},
+    "جاهز لـ OCR (رمادي 300 DPI)": {"dpi": 300, "mode": "L", "format": "JPEG", "quality": 85},
+    "أبيض/أسود مضغوط (300 DPI)": {"dpi": 300, "mode": "1", "format": "PNG", "quality": None},
+}
+DEFAULT_PDF_OUTPUT_PROFILE = "أصلي (بدون تصغير)"
+PDF_PAGE_LONG_SIDE_INCHES = 11.69  # الضلع الطويل لصفحة A4
+PDF_ENCODE_WORKERS = 4
+
+# مناطق الاهتمام (ROI) — إحداثيات نسبية (0–1) من أبعاد الصفحة
+ROI_RENDER_SCALE = 4.0  # ~300 DPI لمقاطع المناطق فقط
+ROI_TEMPLATES_FILE = "roi_templates.json"
+
+# ═══════════════════════════════════════════════════════════
+# مخزن الملفات المرفوعة وحصص الذاكرة
+# ═══════════════════════════════════════════════════════════
+UPLOAD_STORE_DIR = ".upload_store"
+UPLOAD_STORE_MAX_BYTES = 5 * 2**30  # أقدم الملفات تُحذف بعد 5 GB
+UPLOAD_CHUNK_SIZE = 8 * 2**20
+SESSION_MEMORY_QUOTA = 1 * 2**30  # ذروة الصور المفكوكة لكل جلسة
+PROCESS_MEMORY_BUDGET = 4 * 2**30  # مجموع الحجوزات لكل الجلسات
+MEMORY_WORKING_COPIES = 2  # الصورة الأصلية + نسختها المحسّنة أثناء OCR
+
 # ═══════════════════════════════════════════════════════════
 # الملفات المدعومة والتصدير
 # ═══════════════════════════════════════════════════════════
 SUPPORTED_IMAGE_TYPES = ["jpg", "jpeg", "png", "bmp", "tiff", "webp"]
 SUPPORTED_FILE_TYPES = SUPPORTED_IMAGE_TYPES + ["pdf"]
 EXPORT_FORMATS = ["TXT", "JSON", "CSV"]
+
+# حقول إضافية تُحفظ مع كل نتيجة إن وُجدت
+RESULT_EXTRA_KEYS = (
+    "language", "detected_script", "table", "boxes", "image_size",
+    "timed_out", "blank", "reused_from",
+)
+
+# ═══════════════════════════════════════════════════════════
+# استخراج الجداول
+# ═══════════════════════════════════════════════════════════
+TABLE_INK_THRESHOLD = 160  # بكسل أغمق من ذلك = حبر
+TABLE_MIN_LINE_RATIO = 0.15  # أقل طول لخط الجدول كنسبة من عرض/ارتفاع الصورة
+TABLE_CELL_PADDING = 3  # بكسل يُستبعد من حواف الخلية (خطوط الإطار)
+TABLE_EMPTY_CELL_INK = 0.005  # خلية بحبر أقل من ذلك تُعتبر فارغة بدون OCR
+TABLE_CELL_PSM = 6
+TABLE_CELL_CACHE_SIZE = 5000
+TABLE_EXPORT_FORMATS = ["CSV", "XLSX"]
+
+# ═══════════════════════════════════════════════════════════
+# PDF قابل للبحث (طبقة نص غير مرئية)
+# ═══════════════════════════════════════════════════════════
+# رموز خطوط MuPDF المدمجة لكل نظام كتابة (UCDN script)
+SEARCHABLE_PDF_SCRIPT_FONTS = {
+    "arabic": 6,  # Noto Naskh Arabic
+    "hebrew": 5,  # Noto Serif Hebrew
+}
+
+# ═══════════════════════════════════════════════════════════
+# فهرس البحث النصي (SQLite FTS5)
+# ═══════════════════════════════════════════════════════════
+SEARCH_INDEX_FILE = "ocr_index.sqlite3"
+SEARCH_RESULTS_LIMIT = 50
+SEARCH_SNIPPET_CHARS = 80  # أحرف السياق قبل/بعد أول تطابق
+
+# ═══════════════════════════════════════════════════════════
+# إعدادات المعاينة (الصور المصغّرة)
+# ═══════════════════════════════════════════════════════════
+THUMBNAIL_MAX_SIZE = 320
+PREVIEW_MAX_SIZE = 800
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_CACHE_ENTRIES = 1000
+
+# متصفح صفحات PDF
+PAGE_BROWSER_PAGE_SIZE = 10
+PAGE_BROWSER_FILTERS = ["الكل", "لم تُعالج بعد", "ثقة منخفضة"]
+LOW_CONFIDENCE_THRESHOLD = 50
+
+# ═══════════════════════════════════════════════════════════
+# المعالجة الدفعية لعدة ملفات
+# ═══════════════════════════════════════════════════════════
+BATCH_MAX_FILES = 200
@@ -0,0 +1,260 @@
+"""
+الضبط التلقائي لإعدادات التحسين وOCR — موازنة السرعة والدقة
+Speed/accuracy auto-tuner for preprocessing and OCR settings
+
+يُجرّب الإعدادات على عيّنة صغيرة من الصفحات بدل إعادة المستند كاملاً:
+الدقة (DPI) ثم وضع التقسيم (PSM) ثم مجموعة التحسين، وفي كل مرحلة
+يُختار أرخص إعداد على حدّ Pareto (الزمن مقابل متوسط الثقة) لا تقل ثقته
+عن الأفضل بأكثر من هامش محدد
+"""
+
+import time
+
+from config import (
+    PDF_DPI_OPTIONS,
+    TESSERACT_PSM_MODES,
+    TUNER_SAMPLE_PAGES,
+    TUNER_PSM_CANDIDATES,
+    TUNER_ENHANCEMENT_PRESETS,
+    TUNER_CONFIDENCE_TOLERANCE,
+    TUNER_MIN_WORD_RATIO,
+)
+from core.engines import get_engine
+from core.upload_store import open_pdf
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# مفاتيح الإعدادات التي يحددها ملف الضبط (إلى جانب الدقة)
+TUNED_KEYS = (
+    "psm", "enable_enhancement", "contrast", "brightness", "sharpness",
+    "grayscale", "denoise", "binarize",
+)
+
+# أحجام الصفحات الشائعة بالنقاط (العرض × الارتفاع عمودياً)
+_PAGE_FORMATS = {
+    "A4": (595, 842),
+    "Letter": (612, 792),
+    "Legal": (612, 1008),
+    "A5": (420, 595),
+    "A3": (842, 1191),
+}
+
+
+def sample_pages(page_count: int, count: int = TUNER_SAMPLE_PAGES) -> list:
+    """أرقام صفحات موزعة بالتساوي على المستند (تبدأ من 1)"""
+    if page_count <= count:
+        return list(range(1, page_count + 1))
+    step = page_count / count
+    return sorted({int(step * i + step / 2) + 1 for i in range(count)})
+
+
+def document_type(pdf_file, settings: dict) -> str:
+    """
+    نوع المستند لمطابقة ملفات الضبط: حجم الصفحة + الاتجاه + ممسوح/رقمي
+    + المحرك واللغة (مقياس الثقة يختلف بينها فلا يُعاد ضبط لغة على أخرى)
+
+    مثال: "A4 · عمودي · ممسوح ضوئياً · tesseract · ara+eng"
+    """
+    doc = open_pdf(pdf_file)
+    try:
+        rect = doc[0].rect
+        short, long = sorted((rect.width, rect.height))
+        size = next(
+            (
+                name for name, (w, h) in _PAGE_FORMATS.items()
+                if abs(short - w) <= 12 and abs(long - h) <= 12
+            ),
+            "مخصص",
+        )
+        orientation = "أفقي" if rect.width > rect.height else "عمودي"
+        has_text = any(
+            doc[i].get_text().strip() for i in range(min(len(doc), 3))
+        )
+    finally:
+        doc.close()
+
+    kind = "رقمي" if has_text else "ممسوح ضوئياً"
+    engine = settings["engine"]
+    if engine == "hf":
+        engine = f"hf:{settings['hf_model']}"
+    lang = settings["lang"]
+    if settings.get("auto_language") and "+" in lang:
+        lang += " (تلقائي)"  # تقليص اللغات يغيّر الثقة أيضاً
+    return f"{size} · {orientation} · {kind} · {engine} · {lang}"
+
+
+class AutoTuner:
+    """
+    بحث مرحلي في فضاء الإعدادات على صفحات العيّنة
+
+    كل تجربة تقيس زمن الرسم + التحسين + OCR لكل صفحة ومتوسط
+    الثقة موزوناً بعدد الكلمات. الإعدادات التي تفقد كلمات كثيرة (ثقة عالية
+    على نص أقل) تُستبعد قبل المقارنة.
+    """
+
+    def __init__(
+        self,
+        settings: dict,
+        tolerance: float = TUNER_CONFIDENCE_TOLERANCE,
+        min_word_ratio: float = TUNER_MIN_WORD_RATIO,
+    ):
+        # القياس يحتاج الثقة — والأوضاع الإضافية تُعطّل أثناء التجارب
+        self.settings = dict(
+            settings,
+            show_confidence=True,
+            adaptive_cascade=False,
+            tiled_ocr=False,
+            table_mode=False,
+            roi_regions=[],
+        )
+        self.tolerance = tolerance
+        self.min_word_ratio = min_word_ratio
+        self.trials = []
+        self._cache = {}
+        self._render_seconds = {}  # زمن رسم العيّنة لكل دقة — يُضاف لكل تجربة
+
+    # ─── القياس ──────────────────────────────────────────────
+
+    def _evaluate(self, dpi_label: str, overrides: dict, pages: list) -> dict:
+        """تشغيل إعداد واحد على صفحات العيّنة (بالتوازي عبر مجمّع المحرك)"""
+        from core.pipeline import OCRPipeline
+
+        key = (dpi_label, tuple(sorted(overrides.items())))
+        if key in self._cache:
+            return self._cache[key]
+
+        settings = dict(self.settings, **overrides)
+        engine = get_engine(settings["engine"], settings)
+
+        def work(image):
+            start = time.perf_counter()
+            try:
+                result = engine.recognize(OCRPipeline.enhance(image, settings))
+            except Exception as e:
+                result = {"error": str(e)}
+            return result, time.perf_counter() - start
+
+        words = 0
+        weighted = 0.0
+        seconds = self._render_seconds.get(dpi_label, 0.0)
+        # تجارب العيّنة عمل إضافي — لا تُحسب من صفحات المهمة
+        for _, (result, elapsed) in engine.map_pages(work, pages, count_pages=False):
+            seconds += elapsed
+            if "error" in result:
+                continue
+            count = len(result.get("words", []))
+            words += count
+            weighted += (result.get("avg_confidence") or 0) * count
+
+        trial = {
+            "pdf_dpi": dpi_label,
+            "overrides": dict(overrides),
+            "confidence": round(weighted / words, 1) if words else 0.0,
+            "words": words,
+            "seconds": round(seconds, 3),
+        }
+        self._cache[key] = trial
+        self.trials.append(trial)
+        logger.info(
+            f"Tune trial dpi={dpi_label} {overrides}: "
+            f"conf={trial['confidence']} words={words} {seconds:.2f}s"
+        )
+        return trial
+
+    # ─── الاختيار ────────────────────────────────────────────
+
+    @staticmethod
+    def pareto_front(trials: list) -> list:
+        """التجارب غير المهيمَن عليها (لا توجد تجربة أسرع وأدق منها معاً)"""
+        return [
+            t for t in trials
+            if not any(
+                o["seconds"] <= t["seconds"]
+                and o["confidence"] >= t["confidence"]
+                and (o["seconds"] < t["seconds"] or o["confidence"] > t["confidence"])
+                for o in trials
+            )
+        ]
+
+    def pick(self, trials: list) -> dict:
+        """أرخص تجربة على حدّ Pareto ضمن هامش الثقة من الأفضل"""
+        max_words = max(t["words"] for t in trials)
+        eligible = [
+            t for t in trials if t["words"] >= self.min_word_ratio * max_words
+        ] or trials
+        front = self.pareto_front(eligible)
+        best = max(t["confidence"] for t in front)
+        return min(
+            (t for t in front if t["confidence"] >= best - self.tolerance),
+            key=lambda t: t["seconds"],
+        )
+
+    # ─── البحث ───────────────────────────────────────────────
+
+    def _render(self, render, dpi_label: str) -> list:
+        start = time.perf_counter()
+        pages = render(dpi_label)
+        self._render_seconds[dpi_label] = time.perf_counter() - start
+        return pages
+
+    def tune(self, render, dpi_labels: list = None) -> dict:
+        """
+        البحث المرحلي: DPI ← PSM ← مجموعة التحسين
+
+        Args:
+            render: دالة (dpi_label) -> [(page_id, PIL.Image)] لصفحات العيّنة
+            dpi_labels: دقات التجربة — None = كل الدقات الثابتة
+                ([None] للصور: بدون مرحلة DPI)
+
+        Returns:
+            {"pdf_dpi", "overrides", "confidence", "seconds_per_page", "trials"}
+        """
+        if dpi_labels is None:
+            dpi_labels = [label for label, scale in PDF_DPI_OPTIONS.items() if scale]
+
+        # 1. الدقة بالإعدادات الحالية — تبقى صور أفضل دقة حتى الآن فقط
+        # فتُستخدم في المراحل التالية بدل رسمها مرة ثانية
+        stage = []
+        kept = {}
+        for label in dpi_labels:
+            pages = self._render(render, label)
+            stage.append(self._evaluate(label, {}, pages))
+            if self.pick(stage)["pdf_dpi"] == label:
+                kept = {label: pages}
+        best = self.pick(stage)
+        dpi_label = best["pdf_dpi"]
+        # الاختيار النهائي قد يختلف عن أفضل دقة أثناء المرحلة (نادر)
+        pages = kept.get(dpi_label) or self._render(render, dpi_label)
+
+        # 2. وضع تقسيم الصفحة
+        stage = [best] + [
+            self._evaluate(dpi_label, {"psm": TESSERACT_PSM_MODES[label]}, pages)
+            for label in TUNER_PSM_CANDIDATES
+            if TESSERACT_PSM_MODES[label] != self.settings["psm"]
+        ]
+        best = self.pick(stage)
+
+        # 3. مجموعة التحسين
+        stage = [best] + [
+            self._evaluate(dpi_label, dict(best["overrides"], **preset), pages)
+            for preset in TUNER_ENHANCEMENT_PRESETS.values()
+        ]
+        best = self.pick(stage)
+
+        # الملف مكتمل بذاته — لا يعتمد على إعدادات الجلسة التي ضُبط فيها
+        resolved = dict(self.settings, **best["overrides"])
+        page_count = max(len(pages), 1)
+        profile = {
+            "pdf_dpi": dpi_label,
+            "overrides": {k: resolved[k] for k in TUNED_KEYS},
+            "confidence": best["confidence"],
+            "seconds_per_page": round(best["seconds"] / page_count, 2),
+            "trials": self.trials,
+        }
+        logger.info(
+            f"Tuned: dpi={dpi_label} {best['overrides']} "
+            f"conf={best['confidence']} {profile['seconds_per_page']}s/page "
+            f"({len(self.trials)} trials)"
+        )
+        return profile
@@ -0,0 +1,194 @@
+"""
+طابور المعالجة الدفعية لعدة ملفات
+Multi-file batch queue with deduplication and a shared worker pool
+"""
+
+import hashlib
+
+from config import RESULT_EXTRA_KEYS
+from core.pdf_handler import PDFHandler
+from core.image_processor import ImageProcessor
+from core.upload_store import open_image
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BatchQueue:
+    """
+    طابور ملفات — يزيل الملفات المكررة (حسب المحتوى) ويعالج كل الصفحات
+    عبر مجمّع عمّال المحرك المشترك بدل دورة رفع/استخراج لكل ملف
+    """
+
+    def __init__(self):
+        self.files = []
+        self._by_hash = {}
+
+    def add_file(self, name: str, data, is_pdf: bool) -> bool:
+        """
+        إضافة ملف للطابور
+
+        Args:
+            data: bytes أو ملف مخزّن على القرص (core.upload_store.StoredFile)
+
+        Returns:
+            False إذا كان الملف مكرراً (نفس المحتوى لملف سابق)
+        """
+        digest = getattr(data, "sha256", None) or hashlib.sha256(data).hexdigest()
+        entry = {
+            "index": len(self.files),
+            "name": name,
+            "hash": digest,
+            "data": data,
+            "is_pdf": is_pdf,
+            "duplicate_of": self._by_hash.get(digest),
+        }
+        self.files.append(entry)
+
+        if entry["duplicate_of"] is not None:
+            original = self.files[entry["duplicate_of"]]["name"]
+            logger.info(f"Batch: {name} is a duplicate of {original}")
+            return False
+
+        self._by_hash[digest] = entry["index"]
+        return True
+
+    @property
+    def unique_files(self) -> list:
+        """الملفات الفريدة فقط"""
+        return [f for f in self.files if f["duplicate_of"] is None]
+
+    def _load_pages(self, entry: dict, dpi_label: str, max_dimension: int = None):
+        """صفحات الملف (page_number, PIL.Image) — تُحوَّل عند الطلب"""
+        if entry["is_pdf"]:
+            yield from PDFHandler.iter_pages(entry["data"], dpi_label)
+            return
+
+        image = ImageProcessor.decode_for_target(
+            open_image(entry["data"]), max_dimension
+        )
+        image.load()
+        yield 1, image
+
+    def count_pages(self) -> int:
+        """عدد الصفحات الكلي للملفات الفريدة (لشريط التقدم)"""
+        total = 0
+        for entry in self.unique_files:
+            if entry["is_pdf"]:
+                total += PDFHandler.get_page_count(entry["data"])
+            else:
+                total += 1
+        return total
+
+    def _iter_pages(self, dpi_label: str, errors: dict, max_dimension: int = None):
+        """
+        كل صفحات الملفات الفريدة كتيار واحد ((file_index, page_num), image)
+
+        المفتاح رقم الملف في الطابور لا اسمه — ملفان مختلفان قد يحملان
+        نفس الاسم
+
+        الصفحات تُحوَّل واحدة تلو الأخرى عند الطلب، فلا يبقى في الذاكرة
+        إلا ما يعالجه مجمّع المحرك حالياً
+        """
+        for entry in self.unique_files:
+            page_num = 0
+            try:
+                for page_num, image in self._load_pages(
+                    entry, dpi_label, max_dimension
+                ):
+                    yield (entry["index"], page_num), image
+            except Exception as e:
+                logger.error(f"Batch load error ({entry['name']}): {e}")
+                errors[(entry["index"], page_num + 1)] = {"error": str(e)}
+
+    def run(
+        self, settings: dict, dpi_label: str = None, on_progress=None,
+        index: bool = False, stats=None, duplicates=None,
+    ) -> list:
+        """
+        معالجة كل صفحات الملفات الفريدة عبر مجمّع عمّال المحرك المشترك
+
+        Args:
+            settings: لقطة الإعدادات (من utils.session.get_ocr_settings)
+            dpi_label: دقة تحويل PDF
+            on_progress: callback(done, total, file_name, page_num) — يُستدعى
+                من الخيط الرئيسي
+            index: إضافة كل صفحة لفهرس البحث الدائم فور اكتمالها
+            stats: StageStats اختياري لاستغلال مراحل الخط (core.stages)
+            duplicates: DuplicateFilter اختياري (core.dedup) — الصفحات المكررة
+                داخل الملفات وبينها تأخذ نتيجة الأصل
+
+        Returns:
+            قائمة نتائج {"file", "file_index", "page", "text", "confidence", "engine"}
+            مرتبة حسب ترتيب الرفع ثم رقم الصفحة (والمكررات تأخذ نتيجة الأصل)
+        """
+        from core.pipeline import OCRPipeline
+
+        search_index = None
+        if index:
+            from core.search_index import get_search_index
+
+            search_index = get_search_index()
+
+        total = self.count_pages()
+        done = 0
+        results = {}
+
+        pages = self._iter_pages(
+            dpi_label, results, OCRPipeline.target_dimension(settings)
+        )
+        for (file_index, page_num), result in OCRPipeline.process_batch(
+            pages, settings, stats, duplicates
+        ):
+            results[(file_index, page_num)] = result
+            entry = self.files[file_index]
+            name = entry["name"]
+
+            if search_index and "error" not in result:
+                try:
+                    search_index.add_page(
+                        entry["hash"], name, page_num, result.get("text", "")
+                    )
+                except Exception as e:
+                    logger.warning(f"Index error ({name} p{page_num}): {e}")
+
+            done += 1
+            if on_progress:
+                on_progress(done, max(total, done), name, page_num)
+
+        return self._collect(results)
+
+    def _collect(self, results: dict) -> list:
+        """ترتيب النتائج ونسخ نتائج الأصل للملفات المكررة"""
+        collected = []
+        for entry in self.files:
+            source = entry["duplicate_of"]
+            if source is None:
+                source = entry["index"]
+            pages = sorted(p for (i, p) in results if i == source)
+
+            for page_num in pages:
+                result = results[(source, page_num)]
+                if "error" in result:
+                    text = f"[خطأ: {result['error']}]"
+                else:
+                    text = result.get("text", "")
+
+                item = {
+                    "file": entry["name"],
+                    "file_index": entry["index"],  # الاسم قد يتكرر لملفات مختلفة
+                    "page": page_num,
+                    "text": text,
+                    "confidence": result.get("avg_confidence"),
+                    "engine": result.get("engine", ""),
+                }
+                item.update(
+                    {k: result[k] for k in RESULT_EXTRA_KEYS if result.get(k) is not None}
+                )
+                collected.append(item)
+
+        logger.info(
+            f"Batch complete: {len(self.files)} files "
+            f"({len(self.unique_files)} unique), {len(collected)} pages"
+        )
+        return collected
@@ -0,0 +1,251 @@
+"""
+إعادة OCR التكيّفية حسب الثقة
+Confidence-driven adaptive re-OCR cascade
+
+المرور الأول بأسرع إعدادات، ثم تُعاد فقط الصفحات (أو الأسطر) ذات
+الثقة المنخفضة بإعدادات بديلة — ضمن ميزانية حساب محددة لكل مستند
+"""
+
+import threading
+import time
+
+from PIL import Image
+
+from config import (
+    CASCADE_CONFIDENCE_THRESHOLD,
+    CASCADE_BUDGET_FACTOR,
+    CASCADE_LINE_UPSCALE,
+    CASCADE_PAGE_STRATEGIES,
+)
+from core.engines import OCREngine, get_engine
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ConfidenceCascade:
+    """
+    سلسلة إعادة المحاولة لمستند واحد
+
+    الميزانية: ما يُصرف على إعادة المحاولة ≤ (العامل − 1) × زمن المرور الأول
+    للصفحات المعالجة حتى الآن
+    """
+
+    def __init__(
+        self,
+        settings: dict,
+        threshold: float = CASCADE_CONFIDENCE_THRESHOLD,
+        budget_factor: float = CASCADE_BUDGET_FACTOR,
+    ):
+        # الإعادة تحتاج الثقة ومواقع الكلمات
+        self.settings = dict(settings, show_confidence=True)
+        self.engine = get_engine(self.settings["engine"], self.settings)
+        self.threshold = threshold
+        self.budget_factor = budget_factor
+        self.base_cost = 0.0
+        self.retry_cost = 0.0
+        self._lock = threading.Lock()
+
+    # ─── الميزانية ───────────────────────────────────────────
+
+    def _charge(self, seconds: float, retry: bool):
+        with self._lock:
+            if retry:
+                self.retry_cost += seconds
+            else:
+                self.base_cost += seconds
+
+    def _budget_left(self) -> float:
+        with self._lock:
+            return (self.budget_factor - 1) * self.base_cost - self.retry_cost
+
+    def _recognize(self, image: Image.Image, settings: dict, psm: int = None, retry: bool = True) -> dict:
+        """تشغيل المحرك مع احتساب الزمن من الميزانية"""
+        from core.pipeline import OCRPipeline
+
+        start = time.perf_counter()
+        processed = OCRPipeline.enhance(image, settings)
+        engine = get_engine(settings["engine"], settings)
+        result = engine.recognize(processed, psm=psm)
+        self._charge(time.perf_counter() - start, retry)
+        return result
+
+    # ─── التشغيل ─────────────────────────────────────────────
+
+    def run(self, pages):
+        """
+        Args:
+            pages: iterable من (page_id, PIL.Image)
+
+        Yields:
+            (page_id, result) — النتيجة تحتوي cascade: قائمة البدائل المطبّقة
+        """
+        yield from self.engine.map_pages(self.process_page, pages)
+
+        logger.info(
+            f"Cascade: base={self.base_cost:.1f}s, retries={self.retry_cost:.1f}s"
+        )
+
+    def process_page(self, image: Image.Image) -> dict:
+        """مرور أول ثم إعادة محاولة الأجزاء ضعيفة الثقة ضمن الميزانية"""
+        result = self._recognize(image, self.settings, retry=False)
+        if "error" in result or not result.get("words"):
+            return result
+
+        result["cascade"] = []
+        if result["avg_confidence"] >= self.threshold:
+            return result
+
+        # 1. أسطر قليلة ضعيفة → إعادة الأسطر فقط (أرخص من الصفحة)
+        lines = self._group_lines(result["words"])
+        weak = [k for k, ws in lines.items() if self._mean(ws) < self.threshold]
+        if weak and len(weak) <= len(lines) // 2:
+            result = self._retry_lines(image, result, lines, weak)
+            if result["avg_confidence"] >= self.threshold:
+                return result
+
+        # 2. الصفحة كاملة بالبدائل بالترتيب حتى تتجاوز العتبة أو تنفد الميزانية
+        return self._retry_page(image, result)
+
+    def _retry_lines(self, image: Image.Image, result: dict, lines: dict, weak: list) -> dict:
+        """إعادة OCR للأسطر ضعيفة الثقة فقط — سطر واحد (PSM 7) مكبّراً"""
+        from core.pipeline import OCRPipeline
+
+        # التحسين مرة واحدة للصفحة — جزء من تكلفة الإعادة
+        start = time.perf_counter()
+        processed = OCRPipeline.enhance(image, self.settings)
+        self._charge(time.perf_counter() - start, retry=True)
+        line_settings = dict(self.settings, enable_enhancement=False)
+        improved = 0
+
+        for key in weak:
+            if self._budget_left() <= 0:
+                break
+
+            words = lines[key]
+            pad = 4
+            x0 = max(min(w["x"] for w in words) - pad, 0)
+            y0 = max(min(w["y"] for w in words) - pad, 0)
+            x1 = min(max(w["x"] + w["w"] for w in words) + pad, processed.size[0])
+            y1 = min(max(w["y"] + w["h"] for w in words) + pad, processed.size[1])
+
+            crop = processed.crop((x0, y0, x1, y1))
+            scale = CASCADE_LINE_UPSCALE
+            crop = crop.resize(
+                (int(crop.size[0] * scale), int(crop.size[1] * scale)),
+                Image.Resampling.LANCZOS,
+            )
+
+            retry = self._recognize(crop, line_settings, psm=7)
+            new_words = retry.get("words") or []
+            if "error" in retry or self._mean(new_words) <= self._mean(words):
+                continue
+
+            # إعادة الإحداثيات إلى فضاء الصفحة
+            for w in new_words:
+                w.update(
+                    x=int(w["x"] / scale) + x0,
+                    y=int(w["y"] / scale) + y0,
+                    w=int(w["w"] / scale),
+                    h=int(w["h"] / scale),
+                    block=key[0],
+                    line=key[1],
+                )
+            lines[key] = new_words
+            improved += 1
+
+        if improved:
+            result = self._rebuild(result, lines)
+            result["cascade"].append(f"lines:{improved}")
+        return result
+
+    def _retry_page(self, image: Image.Image, best: dict) -> dict:
+        """بدائل الصفحة الكاملة — الاحتفاظ بأفضل نتيجة"""
+        applied = list(best["cascade"])
+        base_size = best.get("image_size")
+
+        for strategy in CASCADE_PAGE_STRATEGIES:
+            if self._budget_left() <= 0:
+                logger.info("Cascade budget exhausted")
+                break
+
+            settings = dict(self.settings)
+            candidate_image = image
+            if strategy.get("binarize"):
+                settings.update(enable_enhancement=True, binarize=True)
+            if strategy.get("scale"):
+                # تكبير الصورة المرسومة بالاستيفاء (لا إعادة رسم بدقة أعلى)
+                scale = strategy["scale"]
+                candidate_image = image.resize(
+                    (int(image.size[0] * scale), int(image.size[1] * scale)),
+                    Image.Resampling.LANCZOS,
+                )
+
+            candidate = self._recognize(
+                candidate_image, settings, psm=strategy.get("psm")
+            )
+            if "error" in candidate:
+                continue
+
+            # إعادة مواقع الكلمات إلى فضاء المرور الأول — بالمقياس الفعلي
+            # للصورة المعالجة (smart_resize قد يلغي جزءاً من التكبير)
+            if base_size:
+                self._rescale_words(candidate, base_size)
+
+            if candidate["avg_confidence"] > best["avg_confidence"]:
+                best = candidate
+                applied.append(strategy["name"])
+                if best["avg_confidence"] >= self.threshold:
+                    break
+
+        best["cascade"] = applied
+        return best
+
+    # ─── أدوات مساعدة ────────────────────────────────────────
+
+    @staticmethod
+    def _rescale_words(result: dict, base_size: tuple) -> dict:
+        """نقل الكلمات من أبعاد الصورة التي قرأها المحرك إلى base_size"""
+        size = result.get("image_size")
+        if size and tuple(size) != tuple(base_size):
+            sx = base_size[0] / size[0]
+            sy = base_size[1] / size[1]
+            for w in result.get("words", []):
+                w.update(
+                    x=int(w["x"] * sx),
+                    y=int(w["y"] * sy),
+                    w=int(w["w"] * sx),
+                    h=int(w["h"] * sy),
+                )
+        return OCREngine.attach_boxes(result, base_size)
+
+    @staticmethod
+    def _mean(words: list) -> float:
+        if not words:
+            return 0.0
+        return sum(w["confidence"] for w in words) / len(words)
+
+    @staticmethod
+    def _group_lines(words: list) -> dict:
+        """تجميع الكلمات حسب (block, line) مع الحفاظ على الترتيب"""
+        lines = {}
+        for w in words:
+            lines.setdefault((w["block"], w["line"]), []).append(w)
+        return lines
+
+    @staticmethod
+    def _rebuild(result: dict, lines: dict) -> dict:
+        """إعادة بناء النص ومتوسط الثقة بعد استبدال الأسطر"""
+        words = [w for line_words in lines.values() for w in line_words]
+        result = dict(result)
+        result["words"] = words
+        result["text"] = "\n".join(
+            " ".join(w["text"] for w in line_words)
+            for line_words in lines.values()
+        )
+        result["word_count"] = len(words)
+        result["avg_confidence"] = (
+            round(sum(w["confidence"] for w in words) / len(words), 1)
+            if words else 0
+        )
+        return OCREngine.attach_boxes(result, result.get("image_size") or (0, 0))
@@ -0,0 +1,162 @@
+"""
+كشف الصفحات المكررة ببصمة إدراكية وإعادة استخدام نتائجها
+Duplicate page detection with perceptual hashing (dHash)
+
+البصمة تُحسب في مرحلة الرسم من نسخة رمادية مصغّرة: dHash لإيجاد
+المرشحين بسرعة (مسافة Hamming)، ثم تحقق بمقارنة النسختين كتلةً كتلة —
+البصمة وحدها لا تفرّق بين نموذجين بتعبئة مختلفة. الفهرس على مستوى الجلسة
+فتتكرر الفائدة عبر الملفات المرفوعة.
+"""
+
+from collections import deque
+import threading
+
+import numpy as np
+from PIL import Image
+
+from config import (
+    DUPLICATE_SIGNATURE_SIZE,
+    DUPLICATE_HASH_SIZE,
+    DUPLICATE_BLOCK_WIDTH,
+    DUPLICATE_INDEX_MAX_PAGES,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# إعدادات لا تغيّر نتيجة OCR — لا تمنع إعادة الاستخدام
+_IGNORED_SETTINGS = ("hf_token", "blank_page", "duplicate_match")
+
+
+def page_fingerprint(image: Image.Image) -> dict:
+    """
+    بصمة الصفحة: {"hash": int (dHash)، "signature": مصفوفة uint8، "aspect"}
+    """
+    signature = image.convert("L").resize(
+        DUPLICATE_SIGNATURE_SIZE, Image.Resampling.BOX
+    )
+    grid = np.asarray(
+        signature.resize(
+            (DUPLICATE_HASH_SIZE + 1, DUPLICATE_HASH_SIZE), Image.Resampling.BOX
+        ),
+        dtype=np.int16,
+    )
+    bits = np.packbits(grid[:, 1:] > grid[:, :-1])
+    return {
+        "hash": int.from_bytes(bits.tobytes(), "big"),
+        "signature": np.asarray(signature, dtype=np.uint8),
+        "aspect": image.size[0] / image.size[1],
+    }
+
+
+def is_duplicate(a: dict, b: dict, max_hash_distance: int, max_block_diff: float) -> bool:
+    """هل البصمتان لنفس الصفحة؟ (الحدود من DUPLICATE_PAGE_THRESHOLDS)"""
+    if abs(a["aspect"] - b["aspect"]) > 0.02:
+        return False
+    if bin(a["hash"] ^ b["hash"]).count("1") > max_hash_distance:
+        return False
+
+    diff = np.abs(a["signature"].astype(np.int16) - b["signature"])
+    height, width = diff.shape
+    blocks = diff.reshape(
+        height, width // DUPLICATE_BLOCK_WIDTH, DUPLICATE_BLOCK_WIDTH
+    ).mean(axis=2)
+    return float(blocks.max()) <= max_block_diff
+
+
+def settings_key(settings: dict) -> str:
+    """مفتاح الإعدادات — النتيجة تُعاد فقط لصفحة عولجت بنفس الإعدادات"""
+    return repr(sorted(
+        (k, v) for k, v in settings.items() if k not in _IGNORED_SETTINGS
+    ))
+
+
+class PageHashIndex:
+    """
+    بصمات الصفحات المكتملة ونتائجها في الجلسة (عبر كل الملفات)
+
+    آمن للخيوط — يُقرأ من خيط الرسم ويُكتب من المستهلك
+    """
+
+    def __init__(self, max_pages: int = DUPLICATE_INDEX_MAX_PAGES):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=max_pages)  # الأقدم يُحذف أولاً
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, fingerprint: dict, key: str, source: str, result: dict):
+        with self._lock:
+            self._entries.append((fingerprint, key, source, result))
+
+    def find(self, fingerprint: dict, key: str, thresholds: dict) -> tuple:
+        """أقدم صفحة مطابقة — (المصدر، النتيجة) أو (None, None)"""
+        with self._lock:
+            entries = list(self._entries)
+        for other, other_key, source, result in entries:
+            if other_key == key and is_duplicate(fingerprint, other, **thresholds):
+                return source, result
+        return None, None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DuplicateFilter:
+    """
+    كشف التكرار لدفعة واحدة — مقابل فهرس الجلسة وصفحات الدفعة نفسها
+
+    الصفحة الأصلية في الدفعة قد تكون ما زالت قيد OCR عند رسم نسختها،
+    لذلك تُسجَّل كمطالبة (claim) تُحل عند وصول نتيجتها — والنتائج تصل
+    بترتيب الصفحات فالأصل يسبق نسخته دائماً
+    """
+
+    def __init__(
+        self, index: PageHashIndex, settings: dict, document: str = "",
+        file_names: list = None,
+    ):
+        self.index = index
+        self.thresholds = settings["duplicate_match"]
+        self.key = settings_key(settings)
+        self.document = document
+        self.file_names = file_names or []
+        self._claims = []
+
+    def label(self, page_id) -> str:
+        """وصف الصفحة الأصلية للعرض: «الملف · ص N»"""
+        if isinstance(page_id, tuple):  # (رقم الملف، رقم الصفحة) في الدفعات
+            return f"{self.file_names[page_id[0]]} · ص {page_id[1]}"
+        return f"{self.document} · ص {page_id}"
+
+    def check(self, page_id, image: Image.Image) -> tuple:
+        """
+        فحص صفحة مرسومة
+
+        Returns:
+            (reuse, claim): reuse دالة تعيد نتيجة الأصل إذا كانت الصفحة مكررة،
+            وإلا claim تُمرَّر إلى resolve مع نتيجة OCR للصفحة
+        """
+        fingerprint = page_fingerprint(image)
+
+        for claim in self._claims:
+            if is_duplicate(fingerprint, claim["fingerprint"], **self.thresholds):
+                return self._reuse(page_id, claim["source"], lambda: claim["result"]), None
+
+        source, result = self.index.find(fingerprint, self.key, self.thresholds)
+        if result is not None:
+            return self._reuse(page_id, source, lambda: result), None
+
+        claim = {"fingerprint": fingerprint, "source": self.label(page_id), "result": None}
+        self._claims.append(claim)
+        return None, claim
+
+    def _reuse(self, page_id, source: str, original):
+        logger.info(f"Duplicate page {page_id} reuses {source}")
+        return lambda: dict(original(), reused_from=source)
+
+    def resolve(self, claim: dict, result: dict):
+        """تسجيل نتيجة الصفحة الأصلية — الأخطاء لا تدخل فهرس الجلسة"""
+        claim["result"] = result
+        if "error" not in result and not result.get("timed_out"):
+            self.index.add(claim["fingerprint"], self.key, claim["source"], result)
@@ -0,0 +1,327 @@
+"""
+سجل محركات OCR وواجهة المعالجة الدفعية المشتركة
+OCR engine registry with a common batch interface
+
+كل محرك يقدّم:
+- recognize(image) -> dict  (text, engine, avg_confidence, words)
+- map_pages(fn, pages) -> iterator of (page_id, result)
+- أعلام القدرات: batching, confidence, boxes
+- مجمّع عمّال خاص به مشترك لكل العملية
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import deque
+import threading
+
+from PIL import Image
+
+from config import (
+    ENGINE_POOL_SIZES,
+    SCRIPT_LANGUAGES,
+    SCRIPT_DETECTION_MAX_DIMENSION,
+    SCRIPT_DETECTION_MIN_CONFIDENCE,
+    SCRIPT_FALLBACK_CONFIDENCE,
+    TESSERACT_PAGE_TIMEOUT,
+    HF_PAGE_TIMEOUT,
+)
+from core.ocr_engine import TesseractOCR, HFInferenceOCR
+from core.image_processor import ImageProcessor
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ENGINE_REGISTRY = {}
+
+
+def register_engine(cls):
+    """تسجيل محرك في السجل باسمه (decorator)"""
+    ENGINE_REGISTRY[cls.name] = cls
+    return cls
+
+
+def get_engine(name: str, settings: dict) -> "OCREngine":
+    """إنشاء محرك من السجل بإعدادات الجلسة"""
+    cls = ENGINE_REGISTRY.get(name)
+    if cls is None:
+        raise KeyError(f"Unknown OCR engine: {name}")
+    return cls(settings)
+
+
+class OCREngine:
+    """الواجهة المشتركة لمحركات OCR"""
+
+    name = ""
+    supports_batching = False
+    supports_confidence = False
+    supports_boxes = False
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+
+    @classmethod
+    def pool(cls) -> ThreadPoolExecutor:
+        """مجمّع العمّال الخاص بالمحرك — يُنشأ مرة واحدة لكل عملية"""
+        if cls._pool is None:
+            with OCREngine._pool_lock:
+                if cls._pool is None:
+                    cls._pool = ThreadPoolExecutor(
+                        max_workers=ENGINE_POOL_SIZES.get(cls.name, 2),
+                        thread_name_prefix=f"ocr-{cls.name}",
+                    )
+        return cls._pool
+
+    @classmethod
+    def capabilities(cls) -> dict:
+        """أعلام قدرات المحرك"""
+        return {
+            "batching": cls.supports_batching,
+            "confidence": cls.supports_confidence,
+            "boxes": cls.supports_boxes,
+        }
+
+    def is_available(self) -> bool:
+        """هل المحرك جاهز للاستخدام؟"""
+        return True
+
+    def recognize(self, image: Image.Image, psm: int = None) -> dict:
+        """استخراج النص من صورة واحدة (محضّرة مسبقاً)"""
+        raise NotImplementedError
+
+    def workers(self) -> int:
+        """عدد العمّال الفعلي — عمّال المجدول داخل مهمة، وإلا مجمّع المحرك"""
+        from core.scheduler import current_job
+
+        job = current_job()
+        if job is not None:
+            return job.scheduler.workers(self.name)
+        return ENGINE_POOL_SIZES.get(self.name, 2)
+
+    def map_pages(self, fn, pages, max_in_flight: int = None, count_pages: bool = True):
+        """
+        تطبيق fn على كل صفحة عبر مجمّع المحرك — النتائج بنفس ترتيب الإدخال
+
+        عدد الصفحات قيد المعالجة محدود حتى تبقى الذاكرة محدودة
+        مهما كان طول المستند. داخل مهمة المجدول المشترك (scheduler.job)
+        يمر العمل عبر طابور الجلسة بدل مجمّع المحرك مباشرة، وإلغاء المهمة
+        يوقف إرسال الصفحات فوراً (JobCancelledError)
+
+        Args:
+            fn: دالة (payload) -> dict
+            pages: iterable من (page_id, payload)
+            count_pages: كل عنصر صفحة من صفحات المهمة — False لأجزاء الصفحة
+                (خلايا، أجزاء) والأعمال الإضافية، فتُحسب الصفحة عند اكتمالها
+
+        Yields:
+            (page_id, result)
+        """
+        from core.scheduler import current_job
+
+        job = current_job()
+        if job is not None:
+            def submit(fn, payload):
+                return job.submit(self.name, fn, payload)
+        else:
+            submit = self.pool().submit
+
+        if max_in_flight is None:
+            max_in_flight = 2 * self.workers()
+
+        def collect(future):
+            if job is not None:
+                # الانتظار على دفعات قصيرة — الإلغاء لا ينتظر انتهاء صفحة جارية
+                while not wait([future], timeout=0.25).done:
+                    job.check()
+                job.check()
+            result = self._result(future)
+            if job is not None and count_pages:
+                job.page_done()
+            return result
+
+        pending = deque()
+        for page_id, payload in pages:
+            if job is not None:
+                job.check()
+            pending.append((page_id, submit(fn, payload)))
+            if len(pending) >= max_in_flight:
+                done_id, future = pending.popleft()
+                yield done_id, collect(future)
+
+        while pending:
+            done_id, future = pending.popleft()
+            yield done_id, collect(future)
+
+    @staticmethod
+    def _result(future) -> dict:
+        """نتيجة العامل — الاستثناءات تتحول إلى dict مع error"""
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Engine worker error: {e}")
+            return {"error": str(e)}
+
+    @staticmethod
+    def _normalize(result: dict) -> dict:
+        """توحيد شكل النتيجة بين المحركات"""
+        if "error" in result:
+            return result
+        result.setdefault("avg_confidence", None)
+        result.setdefault("words", [])
+        return result
+
+    @staticmethod
+    def attach_boxes(result: dict, image_size: tuple) -> dict:
+        """
+        مواقع الكلمات بصيغة مختصرة [x, y, w, h, text] مع أبعاد الصورة
+        التي تشير إليها — تكفي لبناء طبقة نص فوق الصفحة الأصلية لاحقاً
+        """
+        if result.get("words"):
+            result["boxes"] = [
+                [w["x"], w["y"], w["w"], w["h"], w["text"]] for w in result["words"]
+            ]
+            result["image_size"] = list(image_size)
+        return result
+
+    @staticmethod
+    def uncrop_boxes(result: dict, box: tuple, page_size: tuple) -> dict:
+        """
+        إعادة مواقع الكلمات من فضاء صورة مقصوصة إلى فضاء الصفحة الكاملة
+
+        Args:
+            box: مستطيل القص (x0, y0, x1, y1) في الصفحة
+            page_size: أبعاد الصفحة الكاملة
+        """
+        if not result.get("image_size"):
+            return result
+
+        x0, y0, x1, y1 = box
+        sx = (x1 - x0) / result["image_size"][0]  # القص قد يُكبَّر/يُصغَّر قبل OCR
+        sy = (y1 - y0) / result["image_size"][1]
+
+        result = dict(result)
+        if result.get("words"):
+            result["words"] = [
+                dict(
+                    w,
+                    x=x0 + int(w["x"] * sx),
+                    y=y0 + int(w["y"] * sy),
+                    w=int(w["w"] * sx),
+                    h=int(w["h"] * sy),
+                )
+                for w in result["words"]
+            ]
+        if result.get("boxes"):
+            result["boxes"] = [
+                [x0 + int(x * sx), y0 + int(y * sy), int(w * sx), int(h * sy), text]
+                for x, y, w, h, text in result["boxes"]
+            ]
+        result["image_size"] = list(page_size)
+        return result
+
+
+@register_engine
+class TesseractEngine(OCREngine):
+    """Tesseract — محلي، مع نسبة الثقة ومواقع الكلمات"""
+
+    name = "tesseract"
+    supports_confidence = True
+    supports_boxes = True
+
+    def is_available(self) -> bool:
+        return TesseractOCR.is_available()
+
+    def recognize(self, image: Image.Image, psm: int = None) -> dict:
+        psm = psm or self.settings["psm"]
+        lang = self.settings["lang"]
+        detected = None
+
+        # تقليص اللغات المتعددة إلى لغات الخط المكتشف فقط
+        if self.settings.get("auto_language") and "+" in lang:
+            lang, detected = self.narrow_languages(image, lang)
+
+        result = self._extract(image, lang, psm)
+
+        # شبكة أمان: ثقة منخفضة بعد التقليص ← إعادة بكل اللغات المختارة
+        full_lang = self.settings["lang"]
+        if (
+            lang != full_lang
+            and result.get("avg_confidence") is not None
+            and result["avg_confidence"] < SCRIPT_FALLBACK_CONFIDENCE
+        ):
+            fallback = self._extract(image, full_lang, psm)
+            if (fallback.get("avg_confidence") or 0) > result["avg_confidence"]:
+                result, lang = fallback, full_lang
+
+        result = self._normalize(result)
+        if "error" not in result:
+            result["language"] = lang
+            if detected:
+                result["detected_script"] = detected
+            self.attach_boxes(result, image.size)
+        return result
+
+    @property
+    def timeout(self) -> float:
+        return self.settings.get("page_timeout", TESSERACT_PAGE_TIMEOUT)
+
+    def _extract(self, image: Image.Image, lang: str, psm: int) -> dict:
+        if self.settings["show_confidence"]:
+            return TesseractOCR.extract_with_confidence(
+                image, lang=lang, psm=psm, timeout=self.timeout
+            )
+        return TesseractOCR.extract_text(
+            image, lang=lang, psm=psm, timeout=self.timeout
+        )
+
+    @staticmethod
+    def narrow_languages(image: Image.Image, lang: str) -> tuple:
+        """
+        اختيار أقل مجموعة لغات من المجموعة المختارة حسب نوع الخط المكتشف
+
+        الكشف يتم على نسخة مصغّرة من الصفحة (OSD أسرع بكثير من OCR)
+
+        Returns:
+            (lang, detected_script) — lang كما هو إذا فشل الكشف
+        """
+        probe = image
+        if max(image.size) > SCRIPT_DETECTION_MAX_DIMENSION:
+            probe = image.copy()
+            probe.thumbnail(
+                (SCRIPT_DETECTION_MAX_DIMENSION, SCRIPT_DETECTION_MAX_DIMENSION)
+            )
+
+        osd = TesseractOCR.detect_script(probe)
+        if not osd or osd["confidence"] < SCRIPT_DETECTION_MIN_CONFIDENCE:
+            return lang, None
+
+        selected = lang.split("+")
+        narrowed = [
+            code for code in selected
+            if code in SCRIPT_LANGUAGES.get(osd["script"], [])
+        ]
+        if not narrowed:
+            return lang, osd["script"]
+
+        logger.info(f"Script {osd['script']}: {lang} → {'+'.join(narrowed)}")
+        return "+".join(narrowed), osd["script"]
+
+
+@register_engine
+class HFEngine(OCREngine):
+    """HF Inference API — سحابي، نص فقط"""
+
+    name = "hf"
+
+    def is_available(self) -> bool:
+        return bool(self.settings.get("hf_token"))
+
+    def recognize(self, image: Image.Image, psm: int = None) -> dict:
+        result = HFInferenceOCR.extract_text(
+            ImageProcessor.image_to_bytes(image),
+            self.settings["hf_model"],
+            self.settings["hf_token"],
+            timeout=self.settings.get("page_timeout", HF_PAGE_TIMEOUT),
+        )
+        return self._normalize(result)
@@ -5,6 +5,20 @@ Advanced Image Processing for OCR quality improvement
 
 from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 import io
+import numpy as np
+
+from config import (
+    BLANK_THUMBNAIL_SIZE,
+    BLANK_MARGIN_RATIO,
+    BLANK_INK_CONTRAST,
+    AUTOCROP_THUMBNAIL_SIZE,
+    AUTOCROP_BORDER_LEVEL,
+    AUTOCROP_BORDER_RATIO,
+    AUTOCROP_INK_CONTRAST,
+    AUTOCROP_MIN_INK_PIXELS,
+    AUTOCROP_PADDING_RATIO,
+    AUTOCROP_MIN_GAIN,
+)
 
 from utils.logger import get_logger
 
@@ -127,6 +141,57 @@ class ImageProcessor:
             logger.error(f"Tesseract prep error: {e}")
             return image
 
+    @staticmethod
+    def decode_factor(size: tuple, format: str, max_dimension: int = None) -> int:
+        """مقياس التصغير عند الفك (1 = دقة كاملة) — يُحسب من الأبعاد فقط"""
+        if not max_dimension:
+            return 1
+        factor = 1
+        while max(size) >= max_dimension * factor * 2:
+            factor *= 2
+        if format == "JPEG":
+            factor = min(factor, 8)  # أقصى مقياس DCT
+        return factor
+
+    @staticmethod
+    def decoded_size(size: tuple, format: str, max_dimension: int = None) -> tuple:
+        """أبعاد الصورة كما سيفكها decode_for_target (بدون فك)"""
+        factor = ImageProcessor.decode_factor(size, format, max_dimension)
+        return tuple(-(-side // factor) for side in size)
+
+    @staticmethod
+    def decode_for_target(image: Image.Image, max_dimension: int = None) -> Image.Image:
+        """
+        تصغير الصورة بأقرب مقياس (قوة 2) لا يقل عن البُعد المطلوب
+
+        الأبعاد تُقرأ من الترويسة. JPEG وحده يُفك مباشرة بدقة مخفّضة (draft —
+        مقاييس DCT ½ ¼ ⅛) ويبقى الفك مؤجلاً حتى أول استخدام. الصيغ الأخرى
+        (PNG، TIFF...) تُفك بالدقة الكاملة فوراً ثم تُصغّر بـ reduce (متوسط
+        صناديق سريع) — التوفير في بقية خط المعالجة لا في الفك نفسه
+
+        Args:
+            image: صورة مفتوحة ولم تُفك بعد (Image.open)
+            max_dimension: البُعد الذي يحتاجه المستهلك — None = فك كامل
+
+        Returns:
+            الصورة (نفس الكائن لـ JPEG)
+        """
+        width, height = image.size
+        factor = ImageProcessor.decode_factor(image.size, image.format, max_dimension)
+        if factor == 1:
+            return image
+
+        if image.format == "JPEG":
+            image.draft(image.mode, (width // factor, height // factor))
+        else:
+            image = image.reduce(factor)
+
+        logger.info(
+            f"Decoded at 1/{factor}: {width}x{height} → "
+            f"{image.size[0]}x{image.size[1]} (target {max_dimension})"
+        )
+        return image
+
     @staticmethod
     def smart_resize(
         image: Image.Image,
@@ -166,6 +231,184 @@ class ImageProcessor:
 
         return image
 
+    @staticmethod
+    def crop_regions(image: Image.Image, regions: list) -> list:
+        """
+        قص مناطق الاهتمام من صورة
+
+        Args:
+            image: الصورة الأصلية
+            regions: مناطق بإحداثيات نسبية {"x0", "y0", "x1", "y1", ...}
+
+        Returns:
+            قائمة من (region, PIL.Image)
+        """
+        width, height = image.size
+        crops = []
+        for region in regions:
+            box = (
+                int(region["x0"] * width),
+                int(region["y0"] * height),
+                max(int(region["x1"] * width), int(region["x0"] * width) + 1),
+                max(int(region["y1"] * height), int(region["y0"] * height) + 1),
+            )
+            crops.append((region, image.crop(box)))
+        return crops
+
+    @staticmethod
+    def estimate_line_height(image: Image.Image, ink_threshold: int = 128) -> float:
+        """
+        تقدير ارتفاع سطر النص (بالبكسل) من الإسقاط الأفقي للحبر
+
+        كثافة الحبر لكل صف تُحسب بتصغير الصورة الثنائية إلى عمود واحد
+        (BOX) — عملية واحدة داخل Pillow بدل المرور على البكسلات
+
+        Returns:
+            الوسيط لارتفاعات الأسطر، أو None إذا لم يوجد نص
+        """
+        try:
+            gray = image.convert("L")
+            ink = gray.point(lambda x: 255 if x < ink_threshold else 0)
+            rows = list(ink.resize((1, gray.size[1]), Image.Resampling.BOX).getdata())
+
+            # صف نصي = كثافة حبر > 1%
+            heights = []
+            run = 0
+            for value in rows + [0]:
+                if value > 2:
+                    run += 1
+                elif run:
+                    heights.append(run)
+                    run = 0
+
+            # تجاهل الخطوط الفاصلة والضوضاء (أسطر بارتفاع 1–2 بكسل)
+            heights = sorted(h for h in heights if h > 2)
+            if not heights:
+                return None
+            return float(heights[len(heights) // 2])
+
+        except Exception as e:
+            logger.error(f"Line height estimate error: {e}")
+            return None
+
+    @staticmethod
+    def blank_score(image: Image.Image) -> tuple:
+        """
+        مقاييس فراغ الصفحة على نسخة رمادية مصغّرة (BOX) بدون الحواف
+
+        التصغير بالمتوسط يمحو نقاط الضوضاء المتفرقة بينما يبقى أثر النص،
+        والحبر يُقاس نسبةً إلى الخلفية (الوسيط) فلا يتأثر بلون الورق
+
+        Returns:
+            (نسبة بكسلات الحبر، الانحراف المعياري للسطوع)
+        """
+        thumb = image.convert("L")
+        thumb.thumbnail(
+            (BLANK_THUMBNAIL_SIZE, BLANK_THUMBNAIL_SIZE), Image.Resampling.BOX
+        )
+        gray = np.asarray(thumb, dtype=np.float32)
+
+        height, width = gray.shape
+        my, mx = int(height * BLANK_MARGIN_RATIO), int(width * BLANK_MARGIN_RATIO)
+        gray = gray[my:height - my or None, mx:width - mx or None]
+        if not gray.size:
+            return 0.0, 0.0
+
+        background = np.median(gray)
+        ink_ratio = float((gray < background - BLANK_INK_CONTRAST).mean())
+        return ink_ratio, float(gray.std())
+
+    @staticmethod
+    def is_blank(
+        image: Image.Image, max_ink_ratio: float, max_std: float
+    ) -> bool:
+        """
+        هل الصفحة فارغة أو شبه فارغة؟ (الحدود من BLANK_PAGE_SENSITIVITY)
+
+        الشرطان معاً: حبر قليل وتباين منخفض — حافة ماسح سوداء أو صورة
+        باهتة تبقى صفحة عادية وتُقرأ كالمعتاد
+        """
+        try:
+            ink_ratio, std = ImageProcessor.blank_score(image)
+        except Exception as e:
+            logger.error(f"Blank page check error: {e}")
+            return False
+        return ink_ratio <= max_ink_ratio and std <= max_std
+
+    @staticmethod
+    def _edge_run(flags: np.ndarray) -> int:
+        """عدد العناصر المتتالية True من بداية المصفوفة"""
+        return len(flags) if flags.all() else int(np.argmin(flags))
+
+    @staticmethod
+    def content_box(image: Image.Image) -> tuple:
+        """
+        مستطيل المحتوى (x0, y0, x1, y1) بدقة الصورة الأصلية — أو None
+
+        على نسخة رمادية مصغّرة (BOX):
+        1. حواف الماسح: الصفوف/الأعمدة الداكنة المتصلة بحافة الصورة تُزال
+        2. الهوامش: أول وآخر صف/عمود فيه محتوى (إسقاط أفقي وعمودي)
+        ثم يُضاف هامش صغير داخل حدود الورقة
+
+        None إذا لم يوجد محتوى أو كان التوفير أقل من AUTOCROP_MIN_GAIN
+        """
+        try:
+            thumb = image.convert("L")
+            thumb.thumbnail(
+                (AUTOCROP_THUMBNAIL_SIZE, AUTOCROP_THUMBNAIL_SIZE),
+                Image.Resampling.BOX,
+            )
+            gray = np.asarray(thumb, dtype=np.int16)
+            height, width = gray.shape
+
+            # 1. حواف الماسح السوداء — من الخارج للداخل (+ صف الانتقال)
+            dark = gray < AUTOCROP_BORDER_LEVEL
+            rows = dark.mean(axis=1) > AUTOCROP_BORDER_RATIO
+            top = ImageProcessor._edge_run(rows)
+            bottom = height - ImageProcessor._edge_run(rows[::-1])
+            cols = dark[top:bottom].mean(axis=0) > AUTOCROP_BORDER_RATIO
+            left = ImageProcessor._edge_run(cols)
+            right = width - ImageProcessor._edge_run(cols[::-1])
+            top, left = top + bool(top), left + bool(left)
+            bottom, right = bottom - (bottom < height), right - (right < width)
+            if bottom <= top or right <= left:
+                return None
+
+            # 2. الهوامش — المحتوى ما يختلف عن الخلفية في الاتجاهين
+            # (نص فاتح على خلفية رمادية في لقطات الوضع الداكن أيضاً)
+            paper = gray[top:bottom, left:right]
+            ink = np.abs(paper - np.median(paper)) > AUTOCROP_INK_CONTRAST
+            ink_rows = np.flatnonzero(ink.sum(axis=1) >= AUTOCROP_MIN_INK_PIXELS)
+            ink_cols = np.flatnonzero(ink.sum(axis=0) >= AUTOCROP_MIN_INK_PIXELS)
+            if not len(ink_rows) or not len(ink_cols):
+                return None
+
+            pad_y = int(height * AUTOCROP_PADDING_RATIO) + 1
+            pad_x = int(width * AUTOCROP_PADDING_RATIO) + 1
+            box = (
+                max(left + ink_cols[0] - pad_x, left),
+                max(top + ink_rows[0] - pad_y, top),
+                min(left + ink_cols[-1] + 1 + pad_x, right),
+                min(top + ink_rows[-1] + 1 + pad_y, bottom),
+            )
+
+            if (box[2] - box[0]) * (box[3] - box[1]) > (1 - AUTOCROP_MIN_GAIN) * height * width:
+                return None
+
+            # 3. من مقياس النسخة المصغّرة إلى الدقة الأصلية
+            sx = image.size[0] / width
+            sy = image.size[1] / height
+            return (
+                int(box[0] * sx),
+                int(box[1] * sy),
+                min(int(np.ceil(box[2] * sx)), image.size[0]),
+                min(int(np.ceil(box[3] * sy)), image.size[1]),
+            )
+
+        except Exception as e:
+            logger.error(f"Content box error: {e}")
+            return None
+
     @classmethod
     def full_pipeline(
         cls,
@@ -0,0 +1,130 @@
+"""
+خدمة حالة نماذج HF — تخزين مؤقت وتحديث في الخلفية
+HF model status service with caching and background refresh
+"""
+
+import hashlib
+import threading
+import time
+
+from config import HF_STATUS_TTL
+from core.ocr_engine import HFInferenceOCR
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ModelStatusService:
+    """
+    حالة النماذج لكل (نموذج، Token) — القراءة فورية من الذاكرة المؤقتة
+    والفحص/التحميل الفعلي يتم في خيوط خلفية بدل حجب واجهة المستخدم
+    """
+
+    def __init__(self, ttl: int = HF_STATUS_TTL):
+        self.ttl = ttl
+        self._cache = {}
+        self._refreshing = set()
+        self._prewarmed = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_name: str, token: str) -> tuple:
+        """مفتاح التخزين — بصمة Token بدل Token نفسه"""
+        return (model_name, hashlib.sha256(token.encode()).hexdigest()[:16])
+
+    def get(self, model_name: str, token: str) -> dict:
+        """
+        الحالة المخزّنة فوراً (بدون انتظار الشبكة)
+
+        إذا كانت الحالة قديمة أو غير موجودة يبدأ تحديث في الخلفية
+
+        Returns:
+            dict يحتوي على: status, message, ready (و checked_at إن وُجد)
+        """
+        if not token:
+            return {
+                "status": "error",
+                "message": "⚠️ يرجى إدخال HF Token أولاً",
+                "ready": False,
+            }
+
+        key = self._key(model_name, token)
+        with self._lock:
+            entry = self._cache.get(key)
+
+        if entry is None or time.time() - entry["checked_at"] > self.ttl:
+            self.refresh(model_name, token)
+
+        if entry is None:
+            return {"status": "غير معروف", "message": "🔄 جاري الفحص...", "ready": False}
+        return entry
+
+    def refresh(self, model_name: str, token: str, force_load: bool = False) -> bool:
+        """
+        تحديث الحالة في خيط خلفي
+
+        Args:
+            force_load: إرسال طلب تحميل النموذج قبل الفحص
+
+        Returns:
+            False إذا كان هناك تحديث جارٍ لنفس المفتاح
+        """
+        key = self._key(model_name, token)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        threading.Thread(
+            target=self._refresh_worker,
+            args=(key, model_name, token, force_load),
+            daemon=True,
+        ).start()
+        return True
+
+    def prewarm(self, model_name: str, token: str):
+        """
+        تحميل مسبق للنموذج المختار — مرة واحدة لكل (نموذج، Token)
+
+        طلب التحميل استدلال حقيقي على HF، فلا يتكرر مع كل فحص للحالة
+        """
+        if not token:
+            return
+
+        key = self._key(model_name, token)
+        with self._lock:
+            if key in self._prewarmed:
+                return
+
+        if self.refresh(model_name, token, force_load=True):
+            with self._lock:
+                self._prewarmed.add(key)
+            logger.info(f"Pre-warming HF model: {model_name}")
+
+    def _refresh_worker(self, key: tuple, model_name: str, token: str, force_load: bool):
+        """خيط التحديث — يستدعي HF API ويخزّن النتيجة"""
+        try:
+            loaded = False
+            if force_load:
+                load = HFInferenceOCR.force_load_model(model_name, token)
+                loaded = load.get("status") == "success"
+
+            result = HFInferenceOCR.check_model_status(model_name, token)
+            if "error" in result:
+                result = {"status": "error", "message": result["error"], "ready": False}
+
+            # نجاح طلب التحميل يعني أن النموذج يستجيب حتى لو تأخر الفحص
+            if loaded and not result.get("ready"):
+                result = {"status": "success", "message": "✅ تم تحميل النموذج", "ready": True}
+
+            result["checked_at"] = time.time()
+            with self._lock:
+                self._cache[key] = result
+
+            logger.info(f"HF status refreshed: {model_name} → {result['status']}")
+
+        except Exception as e:
+            logger.error(f"HF status refresh error: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
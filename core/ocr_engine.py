@@ -3,9 +3,10 @@
 OCR Engine — Supports Tesseract (local) & HF Inference API (cloud)
 """
 
-import pytesseract
+# pytesseract و requests يُستوردان داخل الدوال عند أول استخدام
+# حتى لا تدفع صفحات الواجهة التي لا تحتاجهما تكلفة الاستيراد عند التشغيل
 from PIL import Image
-import requests
+from functools import lru_cache
 import time
 import io
 
@@ -16,11 +17,63 @@ from config import (
     API_TIMEOUT,
     API_MAX_RETRIES,
     API_RETRY_BASE_DELAY,
+    TESSERACT_PAGE_TIMEOUT,
+    HF_PAGE_TIMEOUT,
 )
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+_TIMEOUT_MESSAGE = "Tesseract process timeout"  # نص استثناء pytesseract عند المهلة
+
+
+class _TrackedSubprocess:
+    """
+    بديل وحدة subprocess داخل pytesseract فقط — كل عملية tesseract تُسجَّل
+    في مهمة المجدول التي يعمل لها الخيط، فيمكن قتلها عند إلغاء المهمة
+    (pytesseract لا يعيد مقبض العملية)
+    """
+
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+    def Popen(self, *args, **kwargs):
+        from core.scheduler import running_job
+
+        process = self._module.Popen(*args, **kwargs)
+        job = running_job()
+        if job is not None:
+            job.track(process)
+        return process
+
+
+def _pytesseract():
+    """استيراد pytesseract مع تتبّع عملياته الفرعية (مرة واحدة)"""
+    import pytesseract
+
+    module = pytesseract.pytesseract
+    if not isinstance(module.subprocess, _TrackedSubprocess):
+        module.subprocess = _TrackedSubprocess(module.subprocess)
+    return pytesseract
+
+
+def _tesseract_failure(e: Exception, label: str) -> dict:
+    """نتيجة خطأ Tesseract — مع تمييز تجاوز المهلة والإلغاء"""
+    from core.scheduler import running_job
+
+    job = running_job()
+    if job is not None and job.cancelled:
+        return {"error": "أُلغيت المعالجة", "cancelled": True}
+    if str(e) == _TIMEOUT_MESSAGE:
+        logger.warning(f"{label}: page timed out")
+        return {"error": "تجاوزت الصفحة المهلة المحددة", "timed_out": True}
+
+    logger.error(f"{label} error: {e}")
+    return {"error": f"خطأ في Tesseract: {str(e)}"}
+
 
 # ═══════════════════════════════════════════════════════════════
 # Tesseract OCR (محلي — لا يحتاج إنترنت ولا API Key)
@@ -35,16 +88,25 @@ class TesseractOCR:
         lang: str = "eng",
         psm: int = 3,
         extra_config: str = "",
+        timeout: float = TESSERACT_PAGE_TIMEOUT,
     ) -> dict:
         """
         استخراج النص من صورة باستخدام Tesseract
+
+        Args:
+            timeout: مهلة الصفحة بالثواني (0 = بدون مهلة) — عند تجاوزها
+                تُقتل العملية وتعود النتيجة مع timed_out
         """
         # إضافة إعدادات الحفاظ على المسافات للجداول
+        pytesseract = _pytesseract()
+
         hifi_config = "-c preserve_interword_spaces=1"
         config = f"--psm {psm} --oem 3 {hifi_config} {extra_config}".strip()
 
         try:
-            text = pytesseract.image_to_string(image, lang=lang, config=config)
+            text = pytesseract.image_to_string(
+                image, lang=lang, config=config, timeout=timeout
+            )
             text = text.strip()
 
             logger.info(
@@ -61,14 +123,14 @@ class TesseractOCR:
             }
 
         except Exception as e:
-            logger.error(f"Tesseract extraction error: {e}")
-            return {"error": f"خطأ في Tesseract: {str(e)}"}
+            return _tesseract_failure(e, "Tesseract extraction")
 
     @staticmethod
     def extract_with_confidence(
         image: Image.Image,
         lang: str = "eng",
         psm: int = 3,
+        timeout: float = TESSERACT_PAGE_TIMEOUT,
     ) -> dict:
         """
         استخراج النص مع نسبة الثقة لكل كلمة
@@ -76,6 +138,8 @@ class TesseractOCR:
         Returns:
             dict يحتوي على: text, words, avg_confidence, word_count
         """
+        pytesseract = _pytesseract()
+
         config = f"--psm {psm} --oem 3"
 
         try:
@@ -84,6 +148,7 @@ class TesseractOCR:
                 lang=lang,
                 config=config,
                 output_type=pytesseract.Output.DICT,
+                timeout=timeout,
             )
 
             words = []
@@ -139,25 +204,77 @@ class TesseractOCR:
             }
 
         except Exception as e:
-            logger.error(f"Tesseract detailed error: {e}")
-            return {"error": f"خطأ في Tesseract: {str(e)}"}
+            return _tesseract_failure(e, "Tesseract detailed")
 
     @staticmethod
-    def is_available() -> bool:
-        """فحص ما إذا كان Tesseract مثبّتاً"""
+    def detect_script(image: Image.Image, timeout: float = TESSERACT_PAGE_TIMEOUT) -> dict:
+        """
+        كشف نوع الخط السائد في الصورة عبر Tesseract OSD (بدون OCR كامل)
+
+        Returns:
+            dict يحتوي على: script, confidence — أو None عند الفشل
+            (مثلاً نص قليل جداً أو osd.traineddata غير مثبّت)
+        """
+        pytesseract = _pytesseract()
+
         try:
-            pytesseract.get_tesseract_version()
-            return True
+            osd = pytesseract.image_to_osd(
+                image,
+                config="--psm 0",
+                output_type=pytesseract.Output.DICT,
+                timeout=timeout,
+            )
+            return {
+                "script": osd.get("script"),
+                "confidence": float(osd.get("script_conf", 0)),
+            }
+        except Exception as e:
+            logger.info(f"Script detection skipped: {e}")
+            return None
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_capabilities() -> dict:
+        """
+        فحص قدرات Tesseract (الإصدار واللغات المثبتة)
+
+        يُحسب مرة واحدة لكل عملية — بدل تشغيل `tesseract --version`
+        عدة مرات في كل إعادة تشغيل للواجهة
+
+        Returns:
+            dict يحتوي على: available, version, languages
+        """
+        import pytesseract
+
+        try:
+            version = str(pytesseract.get_tesseract_version())
+        except Exception as e:
+            logger.warning(f"Tesseract not available: {e}")
+            return {"available": False, "version": None, "languages": []}
+
+        try:
+            languages = sorted(pytesseract.get_languages())
         except Exception:
-            return False
+            languages = []
+
+        logger.info(f"Tesseract {version}: languages={languages}")
+        return {"available": True, "version": version, "languages": languages}
+
+    @staticmethod
+    def refresh_capabilities() -> dict:
+        """إعادة فحص قدرات Tesseract (بعد تثبيت لغات جديدة مثلاً)"""
+        TesseractOCR.get_capabilities.cache_clear()
+        return TesseractOCR.get_capabilities()
+
+    @staticmethod
+    def is_available() -> bool:
+        """فحص ما إذا كان Tesseract مثبّتاً"""
+        return TesseractOCR.get_capabilities()["available"]
 
     @staticmethod
     def get_available_languages() -> list:
         """الحصول على اللغات المثبتة"""
-        try:
-            return pytesseract.get_languages()
-        except Exception:
-            return []
+        return TesseractOCR.get_capabilities()["languages"]
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -193,6 +310,8 @@ class HFInferenceOCR:
         if not status_url:
             return {"error": "❌ النموذج غير موجود"}
 
+        import requests
+
         headers = {"Authorization": f"Bearer {token}"}
 
         try:
@@ -232,6 +351,8 @@ class HFInferenceOCR:
         if not api_url:
             return {"status": "error", "message": "❌ النموذج غير موجود"}
 
+        import requests
+
         headers = {"Authorization": f"Bearer {token}"}
 
         try:
@@ -252,11 +373,15 @@ class HFInferenceOCR:
         image_bytes: bytes,
         model_name: str,
         token: str,
+        timeout: float = HF_PAGE_TIMEOUT,
     ) -> dict:
         """
         استخراج النص عبر HF Inference API مع Retry
 
         يرسل الصورة كـ binary data (الطريقة الصحيحة لـ HF API)
+
+        Args:
+            timeout: مهلة الصفحة بالثواني لكل المحاولات معاً (0 = بدون)
         """
         if not token:
             return {"error": "⚠️ يرجى إدخال HF Token"}
@@ -265,11 +390,21 @@ class HFInferenceOCR:
         if not api_url:
             return {"error": "❌ النموذج غير موجود"}
 
+        import requests
+
         headers = {"Authorization": f"Bearer {token}"}
 
         last_error = None
+        timed_out = False  # فقط عند التوقف بسبب مهلة الصفحة نفسها
+        deadline = time.time() + timeout if timeout else None
 
         for attempt in range(1, API_MAX_RETRIES + 1):
+            request_timeout = API_TIMEOUT
+            if deadline is not None:
+                request_timeout = min(API_TIMEOUT, deadline - time.time())
+                if request_timeout <= 0:
+                    timed_out = True
+                    break
             try:
                 logger.info(
                     f"HF API attempt {attempt}/{API_MAX_RETRIES}: {model_name}"
@@ -280,7 +415,7 @@ class HFInferenceOCR:
                     api_url,
                     headers=headers,
                     data=image_bytes,
-                    timeout=API_TIMEOUT,
+                    timeout=request_timeout,
                 )
 
                 if response.status_code == 200:
@@ -315,6 +450,9 @@ class HFInferenceOCR:
             except requests.exceptions.Timeout:
                 last_error = "انتهت مهلة الطلب"
                 logger.warning(f"Timeout on attempt {attempt}")
+                if request_timeout < API_TIMEOUT:  # قصّرته مهلة الصفحة
+                    timed_out = True
+                    break
             except Exception as e:
                 last_error = str(e)
                 logger.error(f"Error on attempt {attempt}: {e}")
@@ -322,7 +460,16 @@ class HFInferenceOCR:
             # انتظار قبل المحاولة التالية (Exponential Backoff)
             if attempt < API_MAX_RETRIES:
                 delay = API_RETRY_BASE_DELAY * (2 ** (attempt - 1))
+                if deadline is not None and time.time() + delay >= deadline:
+                    timed_out = True
+                    break
                 logger.info(f"Waiting {delay}s before retry...")
                 time.sleep(delay)
 
+        if timed_out:
+            logger.warning(f"HF API: page timed out after {timeout}s")
+            return {
+                "error": f"⏰ تجاوزت الصفحة المهلة ({timeout:.0f} ث): {last_error}",
+                "timed_out": True,
+            }
         return {"error": f"❌ فشل بعد {API_MAX_RETRIES} محاولات: {last_error}"}
@@ -5,11 +5,25 @@ PDF file handling and conversion
 
 from PIL import Image
 import fitz  # PyMuPDF
-import tempfile
-import os
 import io
+from concurrent.futures import ThreadPoolExecutor
 
-from config import PDF_DPI_OPTIONS, DEFAULT_PDF_DPI
+from config import (
+    PDF_DPI_OPTIONS,
+    DEFAULT_PDF_DPI,
+    PDF_OUTPUT_PROFILES,
+    DEFAULT_PDF_OUTPUT_PROFILE,
+    PDF_PAGE_LONG_SIDE_INCHES,
+    PDF_ENCODE_WORKERS,
+    ROI_RENDER_SCALE,
+    AUTO_DPI_TARGET_GLYPH_HEIGHT,
+    AUTO_DPI_PROBE_SCALE,
+    AUTO_DPI_MIN_SCALE,
+    AUTO_DPI_MAX_SCALE,
+    AUTO_DPI_FALLBACK_SCALE,
+)
+from core.image_processor import ImageProcessor
+from core.upload_store import open_pdf
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -22,49 +36,92 @@ class PDFHandler:
     def get_page_count(pdf_file) -> int:
         """الحصول على عدد صفحات الملف"""
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                tmp.write(pdf_file.getvalue())
-                tmp_path = tmp.name
-
-            doc = fitz.open(tmp_path)
+            doc = open_pdf(pdf_file)
             count = len(doc)
             doc.close()
-            os.unlink(tmp_path)
             return count
         except Exception as e:
             logger.error(f"Page count error: {e}")
             return 0
 
     @staticmethod
-    def pdf_to_images(
+    def estimate_font_size(page) -> float:
+        """
+        تقدير حجم خط النص الأساسي في الصفحة (بالنقاط)
+
+        1. من طبقة النص إن وُجدت (مجاناً — بدون رسم)
+        2. وإلا من صورة فحص منخفضة الدقة (ارتفاع الأسطر)
+        """
+        # 1. طبقة النص: حجم الخط الأكثر استخداماً (موزوناً بعدد الأحرف)
+        sizes = []
+        for block in page.get_text("dict").get("blocks", []):
+            for line in block.get("lines", []):
+                for span in line.get("spans", []):
+                    chars = len(span.get("text", "").strip())
+                    if chars:
+                        sizes.extend([span["size"]] * chars)
+        if sizes:
+            sizes.sort()
+            return sizes[len(sizes) // 2]
+
+        # 2. صفحة ممسوحة: صورة فحص وقياس ارتفاع الأسطر
+        matrix = fitz.Matrix(AUTO_DPI_PROBE_SCALE, AUTO_DPI_PROBE_SCALE)
+        pix = page.get_pixmap(matrix=matrix, alpha=False, colorspace=fitz.csGRAY)
+        probe = Image.open(io.BytesIO(pix.tobytes("ppm")))
+        line_height = ImageProcessor.estimate_line_height(probe)
+        if not line_height:
+            return None
+
+        # ارتفاع السطر ≈ حجم الخط (من أعلى الحرف إلى أسفل الذيل)
+        return line_height / AUTO_DPI_PROBE_SCALE
+
+    @staticmethod
+    def auto_scale(page) -> float:
+        """
+        اختيار أقل مقياس يعطي الحروف الارتفاع الذي يحتاجه Tesseract
+
+        الصفحات ذات الخط الصغير تُرسم بدقة أعلى والباقي بدقة أقل
+        """
+        try:
+            font_size = PDFHandler.estimate_font_size(page)
+        except Exception as e:
+            logger.error(f"Font size estimate error: {e}")
+            font_size = None
+
+        if not font_size:
+            return AUTO_DPI_FALLBACK_SCALE
+
+        # ارتفاع الحرف الكبير ≈ 0.7 من حجم الخط
+        scale = AUTO_DPI_TARGET_GLYPH_HEIGHT / (0.7 * font_size)
+        scale = min(max(scale, AUTO_DPI_MIN_SCALE), AUTO_DPI_MAX_SCALE)
+        return round(scale * 4) / 4  # تقريب لأقرب 0.25 (18 DPI)
+
+    @staticmethod
+    def iter_pages(
         pdf_file,
         dpi_label: str = None,
         page_range: tuple = None,
-    ) -> list:
+    ):
         """
-        تحويل PDF إلى قائمة من الصور عالية الجودة
+        تحويل صفحات PDF إلى صور عند الطلب — صفحة واحدة في الذاكرة لكل خطوة
 
         Args:
-            pdf_file: ملف PDF (من Streamlit file_uploader)
-            dpi_label: اسم دقة التحويل (من PDF_DPI_OPTIONS)
+            pdf_file: ملف PDF (ملف مخزّن، UploadedFile، BytesIO أو bytes)
+            dpi_label: اسم دقة التحويل (من PDF_DPI_OPTIONS) — الخيار التلقائي
+                يختار المقياس لكل صفحة حسب حجم الخط
             page_range: نطاق الصفحات (start, end) — 0-indexed, inclusive
 
-        Returns:
-            قائمة من (page_number, PIL.Image) أو dict مع error
+        Yields:
+            (page_number, PIL.Image)
         """
         if dpi_label is None:
             dpi_label = DEFAULT_PDF_DPI
 
-        scale = PDF_DPI_OPTIONS.get(dpi_label, 2.0)
+        fixed_scale = PDF_DPI_OPTIONS.get(dpi_label, 2.0)
 
+        doc = open_pdf(pdf_file)
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                tmp.write(pdf_file.getvalue())
-                tmp_path = tmp.name
-
-            doc = fitz.open(tmp_path)
             total_pages = len(doc)
-            images = []
 
             # تحديد نطاق الصفحات
             if page_range:
@@ -76,11 +133,12 @@ class PDFHandler:
 
             logger.info(
                 f"Converting PDF: pages {start+1}-{end+1} of {total_pages}, "
-                f"scale={scale}"
+                f"scale={fixed_scale or 'auto'}"
             )
 
             for page_num in range(start, end + 1):
                 page = doc.load_page(page_num)
+                scale = fixed_scale or PDFHandler.auto_scale(page)
 
                 # تحويل بدقة عالية
                 matrix = fitz.Matrix(scale, scale)
@@ -89,15 +147,32 @@ class PDFHandler:
                 # تحويل إلى PIL Image
                 img_data = pix.tobytes("ppm")
                 img = Image.open(io.BytesIO(img_data))
+                img.info["render_scale"] = scale
 
-                images.append((page_num + 1, img))
                 logger.info(
-                    f"Page {page_num + 1}: {img.size[0]}x{img.size[1]}px"
+                    f"Page {page_num + 1}: {img.size[0]}x{img.size[1]}px, "
+                    f"scale={scale}"
                 )
-
+                yield page_num + 1, img
+        finally:
             doc.close()
-            os.unlink(tmp_path)
 
+    @staticmethod
+    def pdf_to_images(
+        pdf_file,
+        dpi_label: str = None,
+        page_range: tuple = None,
+    ) -> list:
+        """
+        تحويل PDF إلى قائمة من الصور عالية الجودة
+
+        كل الصفحات تبقى في الذاكرة — للمستندات الطويلة يُفضّل iter_pages
+
+        Returns:
+            قائمة من (page_number, PIL.Image) أو dict مع error
+        """
+        try:
+            images = list(PDFHandler.iter_pages(pdf_file, dpi_label, page_range))
             logger.info(f"PDF conversion complete: {len(images)} pages")
             return images
 
@@ -105,15 +180,65 @@ class PDFHandler:
             logger.error(f"PDF conversion error: {e}")
             return {"error": f"خطأ في تحويل PDF: {str(e)}"}
 
+    @staticmethod
+    def render_regions(
+        pdf_file,
+        regions: list,
+        page_numbers: list = None,
+        scale: float = ROI_RENDER_SCALE,
+    ):
+        """
+        تحويل مناطق الاهتمام فقط إلى صور (fitz clip) بدقة عالية — عند الطلب
+
+        لا تُرسم الصفحة كاملة — تكلفة الرسم تتناسب مع مساحة المناطق، ولا
+        يبقى في الذاكرة إلا قصاصات الصفحات قيد المعالجة (مثل iter_pages).
+        أخطاء فتح الملف أو الرسم تُرفع كاستثناء
+
+        Args:
+            pdf_file: ملف PDF (ملف مخزّن أو من Streamlit file_uploader)
+            regions: مناطق بإحداثيات نسبية {"name", "x0", "y0", "x1", "y1", "psm"}
+            page_numbers: أرقام الصفحات (تبدأ من 1) — None = كل الصفحات
+            scale: مقياس الرسم
+
+        Yields:
+            (page_number, [(region, PIL.Image), ...])
+        """
+        doc = open_pdf(pdf_file)
+        try:
+            if page_numbers is None:
+                page_numbers = range(1, len(doc) + 1)
+
+            matrix = fitz.Matrix(scale, scale)
+            logger.info(
+                f"Rendering {len(regions)} regions on {len(page_numbers)} pages, "
+                f"scale={scale}"
+            )
+
+            for page_num in page_numbers:
+                page = doc.load_page(page_num - 1)
+                rect = page.rect
+                crops = []
+
+                for region in regions:
+                    clip = fitz.Rect(
+                        rect.x0 + region["x0"] * rect.width,
+                        rect.y0 + region["y0"] * rect.height,
+                        rect.x0 + region["x1"] * rect.width,
+                        rect.y0 + region["y1"] * rect.height,
+                    )
+                    pix = page.get_pixmap(matrix=matrix, clip=clip, alpha=False)
+                    img = Image.open(io.BytesIO(pix.tobytes("ppm")))
+                    crops.append((region, img))
+
+                yield page_num, crops
+        finally:
+            doc.close()
+
     @staticmethod
     def get_pdf_info(pdf_file) -> dict:
         """الحصول على معلومات تفصيلية عن ملف PDF"""
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                tmp.write(pdf_file.getvalue())
-                tmp_path = tmp.name
-
-            doc = fitz.open(tmp_path)
+            doc = open_pdf(pdf_file)
             info = {
                 "page_count": len(doc),
                 "metadata": doc.metadata,
@@ -132,7 +257,6 @@ class PDFHandler:
                 )
 
             doc.close()
-            os.unlink(tmp_path)
             return info
 
         except Exception as e:
@@ -140,12 +264,98 @@ class PDFHandler:
             return {"error": str(e)}
 
     @staticmethod
-    def images_to_pdf(images: list) -> bytes:
+    def _encode_for_pdf(image: Image.Image, profile: dict) -> tuple:
+        """
+        ترميز صورة واحدة حسب ملف الإخراج
+
+        Returns:
+            (bytes, عرض الصفحة بالنقاط, ارتفاع الصفحة بالنقاط)
+        """
+        width, height = image.size
+        target_dpi = profile.get("dpi")
+
+        # تصغير الصورة إلى الدقة المستهدفة على صفحة بحجم A4
+        if target_dpi:
+            max_long_side = int(PDF_PAGE_LONG_SIDE_INCHES * target_dpi)
+            if max(width, height) > max_long_side:
+                ratio = max_long_side / max(width, height)
+                image = image.resize(
+                    (max(1, int(width * ratio)), max(1, int(height * ratio))),
+                    Image.Resampling.LANCZOS,
+                )
+            dpi = target_dpi
+        else:
+            dpi = 72  # نفس سلوك Pillow الافتراضي: بكسل = نقطة
+
+        # تحويل نمط الألوان (رمادي / ثنائي / ملوّن)
+        mode = profile.get("mode", "RGB")
+        if mode == "1":
+            image = image.convert("L").point(
+                lambda x: 255 if x > 128 else 0, mode="1"
+            )
+        elif image.mode != mode:
+            image = image.convert(mode)
+
+        buffer = io.BytesIO()
+        if profile.get("format") == "JPEG":
+            image.save(
+                buffer, format="JPEG", quality=profile.get("quality") or 75,
+                optimize=True,
+            )
+        else:
+            image.save(buffer, format="PNG", optimize=True)
+
+        page_width = image.size[0] * 72 / dpi
+        page_height = image.size[1] * 72 / dpi
+        return buffer.getvalue(), page_width, page_height
+
+    @staticmethod
+    def estimate_pdf_size(images: list, profile_label: str = None, sample_size: int = 3) -> int:
+        """
+        تقدير حجم ملف PDF الناتج قبل إنشائه
+
+        يرمّز عيّنة صغيرة من الصور ثم يعمّم النتيجة حسب عدد البكسلات
+
+        Returns:
+            الحجم المتوقع بالبايت (0 عند الفشل)
+        """
+        if not images:
+            return 0
+
+        profile = PDF_OUTPUT_PROFILES.get(
+            profile_label or DEFAULT_PDF_OUTPUT_PROFILE,
+            PDF_OUTPUT_PROFILES[DEFAULT_PDF_OUTPUT_PROFILE],
+        )
+
+        try:
+            step = max(1, len(images) // sample_size)
+            samples = images[::step][:sample_size]
+
+            sample_bytes = 0
+            sample_pixels = 0
+            for img in samples:
+                data, _, _ = PDFHandler._encode_for_pdf(img, profile)
+                sample_bytes += len(data)
+                sample_pixels += img.size[0] * img.size[1]
+
+            total_pixels = sum(img.size[0] * img.size[1] for img in images)
+            return int(sample_bytes * total_pixels / max(sample_pixels, 1))
+
+        except Exception as e:
+            logger.error(f"PDF size estimate error: {e}")
+            return 0
+
+    @staticmethod
+    def images_to_pdf(images: list, profile_label: str = None) -> bytes:
         """
         تحويل قائمة من صور PIL إلى ملف PDF واحد
 
+        تُرمَّز الصور بالتوازي حسب ملف الإخراج (الدقة، الضغط، الرمادي)
+        ثم تُدمج كما هي في الملف بدون إعادة ترميز
+
         Args:
             images: قائمة من PIL.Image
+            profile_label: اسم ملف الإخراج (من PDF_OUTPUT_PROFILES)
 
         Returns:
             bytes: محتوى ملف PDF
@@ -153,29 +363,38 @@ class PDFHandler:
         if not images:
             return None
 
+        if profile_label is None:
+            profile_label = DEFAULT_PDF_OUTPUT_PROFILE
+
+        profile = PDF_OUTPUT_PROFILES.get(
+            profile_label, PDF_OUTPUT_PROFILES[DEFAULT_PDF_OUTPUT_PROFILE]
+        )
+
         try:
-            pdf_bytes = io.BytesIO()
-            
-            # تحويل جميع الصور لـ RGB (PDF يتطلب ذلك)
-            rgb_images = []
-            for img in images:
-                if img.mode != 'RGB':
-                    rgb_images.append(img.convert('RGB'))
-                else:
-                    rgb_images.append(img)
-            
-            # حفظ الصورة الأولى مع إلحاق الباقي كصفحات
-            if len(rgb_images) > 0:
-                rgb_images[0].save(
-                    pdf_bytes, 
-                    format="PDF", 
-                    save_all=True, 
-                    append_images=rgb_images[1:]
+            # ترميز الصور بالتوازي (Pillow يحرّر الـ GIL أثناء الترميز)
+            with ThreadPoolExecutor(max_workers=PDF_ENCODE_WORKERS) as executor:
+                encoded = list(
+                    executor.map(
+                        lambda img: PDFHandler._encode_for_pdf(img, profile),
+                        images,
+                    )
                 )
-            
-            logger.info(f"Converted {len(images)} images to PDF")
-            return pdf_bytes.getvalue()
-            
+
+            # دمج الصور المرمّزة كصفحات
+            doc = fitz.open()
+            for data, page_width, page_height in encoded:
+                page = doc.new_page(width=page_width, height=page_height)
+                page.insert_image(page.rect, stream=data)
+
+            pdf_bytes = doc.tobytes(garbage=3, deflate=True)
+            doc.close()
+
+            logger.info(
+                f"Converted {len(images)} images to PDF: "
+                f"profile={profile_label}, size={len(pdf_bytes)} bytes"
+            )
+            return pdf_bytes
+
         except Exception as e:
             logger.error(f"Images to PDF conversion error: {e}")
             return None
@@ -0,0 +1,308 @@
+"""
+خط معالجة OCR — تحسين الصورة ثم استخراج النص
+OCR pipeline — enhancement followed by text extraction
+
+يعمل على لقطة من الإعدادات (dict) بدل st.session_state
+لذلك يمكن تشغيله من خيوط العمل في المعالجة الدفعية
+"""
+
+from collections import deque
+
+from PIL import Image
+
+from core.engines import OCREngine, get_engine
+from core.image_processor import ImageProcessor
+from core.stages import StageStats, prefetch, parallel_map
+from config import (
+    TESSERACT_PSM_MODES,
+    IMAGE_MAX_DIMENSION,
+    PIPELINE_PREPROCESS_WORKERS,
+    TIMEOUT_RETRY_OVERRIDES,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OCRPipeline:
+    """خط المعالجة — صورة واحدة أو مناطق اهتمام أو دفعة صفحات"""
+
+    @staticmethod
+    def target_dimension(settings: dict) -> int:
+        """
+        أكبر بُعد يحتاجه خط المعالجة من الصورة المصدر (None = الدقة الكاملة)
+
+        التحسين يصغّر ما فوق IMAGE_MAX_DIMENSION على أي حال، بينما التقسيم
+        ومناطق الاهتمام وتعطيل التحسين تعمل على الدقة الأصلية
+        """
+        if (
+            not settings["enable_enhancement"]
+            or settings.get("tiled_ocr")
+            or settings.get("roi_regions")
+        ):
+            return None
+        return IMAGE_MAX_DIMENSION
+
+    @staticmethod
+    def timeout_retry_settings(settings: dict) -> dict:
+        """إعدادات أرخص لإعادة الصفحات التي تجاوزت المهلة"""
+        return dict(settings, **TIMEOUT_RETRY_OVERRIDES)
+
+    @staticmethod
+    def enhance(image: Image.Image, settings: dict) -> Image.Image:
+        """تطبيق تحسينات الصورة إذا كانت مفعّلة"""
+        if not settings["enable_enhancement"]:
+            return image.copy()
+
+        return ImageProcessor.full_pipeline(
+            image.copy(),
+            contrast=settings["contrast"],
+            brightness=settings["brightness"],
+            sharpness=settings["sharpness"],
+            grayscale=settings["grayscale"],
+            denoise=settings["denoise"],
+            binarize=settings["binarize"],
+        )
+
+    @staticmethod
+    def process_image(image: Image.Image, settings: dict, psm: int = None) -> dict:
+        """
+        معالجة صورة واحدة — تطبيق التحسينات واستخراج النص
+
+        Args:
+            image: الصورة
+            settings: لقطة الإعدادات (من utils.session.get_ocr_settings)
+            psm: وضع تقسيم مخصص (يتجاوز الإعدادات)
+
+        Returns:
+            dict مع text, avg_confidence, engine
+        """
+        processed = OCRPipeline.enhance(image, settings)
+        engine = get_engine(settings["engine"], settings)
+        return engine.recognize(processed, psm=psm)
+
+    @staticmethod
+    def process_regions(crops: list, settings: dict) -> dict:
+        """
+        معالجة مناطق الاهتمام — كل منطقة بوضع التقسيم الخاص بها
+
+        Args:
+            crops: قائمة من (region, PIL.Image)
+
+        Returns:
+            dict مع text (مقسّم حسب المناطق), avg_confidence, engine, regions
+        """
+        parts = []
+        regions = []
+        confidences = []
+        engine = ""
+
+        for region, crop in crops:
+            result = OCRPipeline.process_image(
+                crop, settings, psm=TESSERACT_PSM_MODES.get(region["psm"])
+            )
+            if "error" in result:
+                return result
+
+            text = result.get("text", "")
+            engine = result.get("engine", engine)
+            if result.get("avg_confidence") is not None:
+                confidences.append(result["avg_confidence"])
+
+            parts.append(f"[{region['name']}]\n{text}")
+            regions.append({"name": region["name"], "text": text})
+
+        return {
+            "text": "\n\n".join(parts),
+            "avg_confidence": (
+                round(sum(confidences) / len(confidences), 1)
+                if confidences else None
+            ),
+            "engine": engine,
+            "regions": regions,
+        }
+
+    @staticmethod
+    def process(image: Image.Image, settings: dict) -> dict:
+        """معالجة صورة كاملة أو مناطق الاهتمام فقط حسب الإعدادات"""
+        if settings.get("roi_regions"):
+            return OCRPipeline.process_regions(
+                ImageProcessor.crop_regions(image, settings["roi_regions"]),
+                settings,
+            )
+        return OCRPipeline.process_image(image, settings)
+
+    @staticmethod
+    def process_batch(pages, settings: dict, stats: StageStats = None, duplicates=None):
+        """
+        معالجة دفعة صفحات عبر مجمّع عمّال المحرك المختار
+
+        المصدر (رسم صفحات PDF) يُقرأ في خيط خلفي بطابور محدود، وفي المسار
+        العادي يتم التحسين في مرحلة مستقلة — فالرسم والتحسين وOCR تتداخل
+
+        Args:
+            pages: iterable من (page_id, PIL.Image)
+            stats: StageStats اختياري لجمع استغلال كل مرحلة
+            duplicates: DuplicateFilter اختياري (core.dedup) — الصفحات المكررة
+                تأخذ نتيجة الأصل بدل OCR
+
+        Yields:
+            (page_id, result) بنفس ترتيب الإدخال
+        """
+        if stats is None:
+            stats = StageStats()
+        try:
+            if (
+                settings.get("blank_page")
+                or OCRPipeline._auto_crop(settings)
+                or duplicates is not None
+            ):
+                order = deque()
+                pages = OCRPipeline._screen(pages, settings, duplicates, order)
+                yield from OCRPipeline._merge_screened(
+                    OCRPipeline._process_stages(pages, settings, stats),
+                    order,
+                    duplicates,
+                )
+            else:
+                yield from OCRPipeline._process_stages(pages, settings, stats)
+        finally:
+            stats.finish()
+
+    @staticmethod
+    def blank_result() -> dict:
+        """نتيجة صفحة فارغة — بدون تحسين ولا OCR"""
+        return {
+            "text": "",
+            "avg_confidence": None,
+            "engine": "كشف الصفحات الفارغة",
+            "blank": True,
+        }
+
+    @staticmethod
+    def _auto_crop(settings: dict) -> bool:
+        """قص الهوامش — ليس مع مناطق الاهتمام (إحداثياتها نسبية للصفحة كاملة)"""
+        return bool(settings.get("auto_crop") and not settings.get("roi_regions"))
+
+    @staticmethod
+    def _screen(pages, settings: dict, duplicates, order: deque):
+        """
+        فحص الصفحات في مرحلة الرسم (خيط الجلب المسبق) قبل التحسين وOCR
+
+        الفارغة والمكررة تُختصر، والباقي يُقص إلى مستطيل المحتوى ويمر.
+        ترتيب كل الصفحات يُسجَّل في order كـ (page_id, shortcut, claim, crop):
+        - shortcut: دالة تعيد نتيجة الصفحة المختصرة (None = تمر إلى OCR)
+        - claim: مطالبة DuplicateFilter تُحل بنتيجة OCR للصفحة
+        - crop: (مستطيل القص، أبعاد الصفحة) لإعادة المواقع إلى فضاء الصفحة
+        """
+        thresholds = settings.get("blank_page")
+        auto_crop = OCRPipeline._auto_crop(settings)
+        for page_id, image in pages:
+            if thresholds and ImageProcessor.is_blank(image, **thresholds):
+                logger.info(f"Blank page skipped: {page_id}")
+                order.append((page_id, OCRPipeline.blank_result, None, None))
+                continue
+
+            claim = None
+            if duplicates is not None:  # على الصفحة كاملة — قبل القص
+                reuse, claim = duplicates.check(page_id, image)
+                if reuse is not None:
+                    order.append((page_id, reuse, None, None))
+                    continue
+
+            crop = None
+            box = ImageProcessor.content_box(image) if auto_crop else None
+            if box:
+                crop = (box, image.size)
+                image = image.crop(box)
+
+            order.append((page_id, None, claim, crop))
+            yield page_id, image
+
+    @staticmethod
+    def _merge_screened(results, order: deque, duplicates=None):
+        """إعادة الصفحات المختصرة إلى مواضعها بين نتائج OCR (بنفس الترتيب)"""
+        def flush():
+            while order and order[0][1] is not None:
+                page_id, shortcut, _, _ = order.popleft()
+                yield page_id, shortcut()
+
+        for page_id, result in results:
+            yield from flush()
+            _, _, claim, crop = order.popleft()  # الصفحة الممررة نفسها
+            if crop is not None:
+                result = OCREngine.uncrop_boxes(result, *crop)
+            if claim is not None:
+                duplicates.resolve(claim, result)
+            yield page_id, result
+        yield from flush()
+
+    @staticmethod
+    def _process_stages(pages, settings: dict, stats: StageStats):
+        engine = get_engine(settings["engine"], settings)
+
+        if settings.get("table_mode"):
+            from core.table_extractor import TableExtractor
+
+            from core.scheduler import page_done
+
+            # الصفحات بالتسلسل — التوازي داخل كل صفحة على مستوى الخلايا
+            for page_id, image in prefetch(pages, "render", stats):
+                result = TableExtractor.extract(image, settings)
+                page_done()
+                yield page_id, result
+            return
+
+        pages = prefetch(pages, "render", stats)
+
+        if settings.get("roi_regions"):
+            yield from engine.map_pages(
+                lambda image: OCRPipeline.process(image, settings), pages
+            )
+        elif settings.get("tiled_ocr") and engine.supports_boxes:
+            from core.tiling import TiledOCR
+
+            yield from TiledOCR.recognize_pages(pages, settings)
+        elif settings.get("adaptive_cascade") and engine.supports_confidence:
+            from core.cascade import ConfidenceCascade
+
+            yield from ConfidenceCascade(settings).run(pages)
+        else:
+            pages = parallel_map(
+                lambda image: OCRPipeline.enhance(image, settings),
+                pages,
+                "preprocess",
+                PIPELINE_PREPROCESS_WORKERS,
+                stats,
+            )
+
+            def recognize(image):
+                if isinstance(image, Exception):  # فشل التحسين
+                    return {"error": str(image)}
+                return engine.recognize(image)
+
+            stats.add_stage("ocr", engine.workers())
+            yield from engine.map_pages(stats.timed("ocr", recognize), pages)
+
+    @staticmethod
+    def process_page(image: Image.Image, settings: dict, duplicates=None) -> dict:
+        """معالجة صفحة واحدة بنفس مسار الدفعات (مناطق الاهتمام، إعادة المحاولة)"""
+        return next(
+            OCRPipeline.process_batch([(1, image)], settings, duplicates=duplicates)
+        )[1]
+
+    @staticmethod
+    def process_region_batch(pages, settings: dict):
+        """
+        معالجة دفعة صفحات من مناطق الاهتمام المقصوصة مسبقاً
+
+        Args:
+            pages: iterable من (page_id, [(region, PIL.Image), ...])
+
+        Yields:
+            (page_id, result)
+        """
+        engine = get_engine(settings["engine"], settings)
+        yield from engine.map_pages(
+            lambda crops: OCRPipeline.process_regions(crops, settings), pages
+        )
@@ -0,0 +1,404 @@
+"""
+مجدول OCR مشترك لكل العملية — عدالة بين الجلسات وتحكم في القبول
+Process-wide OCR scheduler with per-session fair share and admission control
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+import itertools
+import threading
+import time
+
+from config import (
+    ENGINE_POOL_SIZES,
+    SCHEDULER_MAX_BATCH_JOBS,
+    SCHEDULER_MAX_WAITING_JOBS,
+    SCHEDULER_DEFAULT_PAGE_SECONDS,
+    SCHEDULER_WAIT_POLL,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# فئات الأولوية بالترتيب — الطلبات القصيرة قبل الدفعات الطويلة
+PRIORITIES = ("interactive", "batch")
+
+_local = threading.local()
+
+
+def current_job():
+    """المهمة النشطة في الخيط الحالي (None خارج scheduler.job)"""
+    return getattr(_local, "job", None)
+
+
+def page_done():
+    """تسجيل اكتمال صفحة للمهمة النشطة في الخيط الحالي (إن وُجدت)"""
+    job = current_job()
+    if job is not None:
+        job.page_done()
+
+
+def running_job():
+    """المهمة التي ينفّذ عامل المجدول الحالي أحد أعمالها (None خارج العمّال)"""
+    return getattr(_local, "running", None)
+
+
+class SchedulerBusyError(RuntimeError):
+    """طابور الانتظار ممتلئ — الطلب مرفوض"""
+
+
+class JobCancelledError(RuntimeError):
+    """أُلغيت المهمة (زر الإلغاء أو انقطاع الجلسة)"""
+
+
+class Job:
+    """مهمة جلسة واحدة (صورة أو دفعة صفحات) داخل المجدول"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, scheduler, session_id: str, kind: str, pages: int):
+        self.id = next(self._ids)
+        self.scheduler = scheduler
+        self.session_id = session_id
+        self.kind = kind
+        self.pages = max(pages, 1)
+        self.done = 0  # صفحات مكتملة (OCREngine.map_pages)
+        self.tasks = 0  # أعمال مكتملة — خلايا الجداول والأجزاء أعمال لكل منها
+        self.state = "waiting"
+        self.cancelled = False
+        self._processes = set()  # عمليات فرعية جارية (tesseract)
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return max(self.pages - self.done, 0)
+
+    @property
+    def tasks_per_page(self) -> float:
+        """متوسط الأعمال لكل صفحة حتى الآن (1 قبل اكتمال أول صفحة)"""
+        return self.tasks / self.done if self.done else 1.0
+
+    def page_done(self):
+        """تسجيل اكتمال صفحة — لحساب المتبقي والوقت المتوقع للآخرين"""
+        with self.scheduler._cond:
+            self.done += 1
+
+    def submit(self, engine_name: str, fn, payload) -> Future:
+        """إرسال عمل إلى عمّال المحرك عبر طابور الجلسة"""
+        return self.scheduler._enqueue(self, engine_name, fn, payload)
+
+    def check(self):
+        """رفع JobCancelledError إذا أُلغيت المهمة"""
+        if self.cancelled:
+            raise JobCancelledError("أُلغيت المعالجة")
+
+    def track(self, process):
+        """تسجيل عملية فرعية بدأها أحد أعمال المهمة — تُقتل عند الإلغاء"""
+        with self._lock:
+            self._processes = {p for p in self._processes if p.poll() is None}
+            self._processes.add(process)
+            cancelled = self.cancelled
+        if cancelled:
+            process.kill()
+
+    def _kill_processes(self) -> int:
+        with self._lock:
+            running = [p for p in self._processes if p.poll() is None]
+            self._processes.clear()
+        for process in running:
+            try:
+                process.kill()
+            except OSError:
+                pass
+        return len(running)
+
+
+class _Task:
+    __slots__ = ("job", "fn", "payload", "future")
+
+    def __init__(self, job, fn, payload):
+        self.job = job
+        self.fn = fn
+        self.payload = payload
+        self.future = Future()
+
+
+class OCRScheduler:
+    """
+    يملك عمّال OCR لكل محرك ويوزّع العمل بين الجلسات
+
+    - لكل جلسة طابور خاص، والعمّال يأخذون من الجلسات بالتناوب
+      (round-robin) فلا تحتكر دفعة طويلة العمّال
+    - الطلبات التفاعلية (صورة أو صفحة واحدة) تُخدم قبل صفحات الدفعات
+    - عدد الدفعات النشطة محدود، والزائد ينتظر بترتيب ووقت متوقع
+      أو يُرفض إذا امتلأ طابور الانتظار
+    """
+
+    def __init__(
+        self,
+        pool_sizes: dict = None,
+        max_batch_jobs: int = SCHEDULER_MAX_BATCH_JOBS,
+        max_waiting: int = SCHEDULER_MAX_WAITING_JOBS,
+    ):
+        self.pool_sizes = pool_sizes or ENGINE_POOL_SIZES
+        self.max_batch_jobs = max_batch_jobs
+        self.max_waiting = max_waiting
+
+        self._cond = threading.Condition()
+        self._queues = {}  # engine → {priority → OrderedDict(session → deque)}
+        self._workers = {}  # engine → [threads]
+        self._jobs = set()  # كل المهام الحية (للإلغاء حسب الجلسة)
+        self._active = []  # دفعات مقبولة
+        self._waiting = deque()  # دفعات تنتظر القبول
+        self._task_seconds = SCHEDULER_DEFAULT_PAGE_SECONDS  # متوسط متحرك لكل عمل
+
+    # ═══════════════════════════════════════════════════════
+    # القبول
+    # ═══════════════════════════════════════════════════════
+
+    @contextmanager
+    def job(self, session_id: str, kind: str = "batch", pages: int = 1, on_wait=None):
+        """
+        تشغيل مهمة داخل المجدول — كل ما تُرسله المحركات داخل هذا السياق
+        (OCREngine.map_pages) يمر عبر طابور الجلسة
+
+        Args:
+            kind: "interactive" (يُقبل فوراً وبأولوية) أو "batch"
+            pages: عدد الصفحات المتوقع (لحساب الوقت المتوقع للآخرين)
+            on_wait: callback(position, eta_seconds) — يُستدعى من نفس الخيط
+                أثناء الانتظار، ثم (0, 0) عند القبول
+
+        Raises:
+            SchedulerBusyError: إذا كان طابور الانتظار ممتلئاً
+        """
+        job = Job(self, session_id, kind, pages)
+        with self._cond:
+            self._jobs.add(job)
+        self._admit(job, on_wait)  # الرفض يزيل المهمة من _jobs
+
+        previous = current_job()
+        _local.job = job
+        try:
+            yield job
+        except BaseException:
+            # خطأ أو إعادة تشغيل الواجهة — لا فائدة من إكمال الصفحات الجارية
+            self.cancel(job)
+            raise
+        finally:
+            _local.job = previous
+            self._finish(job)
+
+    def _admit(self, job: Job, on_wait):
+        with self._cond:
+            if job.kind != "batch":
+                job.state = "running"
+                return
+            if len(self._active) < self.max_batch_jobs and not self._waiting:
+                job.state = "running"
+                self._active.append(job)
+                return
+            if len(self._waiting) >= self.max_waiting:
+                job.state = "finished"
+                self._jobs.discard(job)
+                raise SchedulerBusyError(
+                    f"الخادم مشغول — {len(self._waiting)} دفعة في الانتظار، "
+                    "حاول لاحقاً"
+                )
+            self._waiting.append(job)
+            logger.info(
+                f"Job {job.id} ({job.session_id[:8]}) queued at "
+                f"position {len(self._waiting)}"
+            )
+
+        try:
+            while True:
+                with self._cond:
+                    if job.state == "running":
+                        break
+                    self._cond.wait(SCHEDULER_WAIT_POLL)
+                    if job.state == "running":
+                        break
+                    job.check()
+                    position, eta = self._position(job)
+                if on_wait:
+                    on_wait(position, eta)
+        except BaseException:
+            # انقطاع الجلسة أثناء الانتظار — إخلاء المكان في الطابور
+            self._finish(job)
+            raise
+
+        if on_wait:
+            on_wait(0, 0)
+
+    def _position(self, job: Job) -> tuple:
+        """ترتيب المهمة في طابور الانتظار والوقت المتوقع لبدئها (داخل القفل)"""
+        position = self._waiting.index(job) + 1
+        ahead = list(self._waiting)[:position - 1]
+        # الصفحات المتبقية بعدد أعمالها (خلايا، أجزاء) × متوسط زمن العمل
+        tasks = sum(j.remaining * j.tasks_per_page for j in self._active + ahead)
+        # الدفعات النشطة تتقاسم العمّال — أول مكان يتحرر عند انتهاء أقصرها
+        workers = max(sum(len(w) for w in self._workers.values()), 1)
+        eta = tasks * self._task_seconds / workers
+        return position, eta
+
+    def _finish(self, job: Job):
+        with self._cond:
+            job.state = "finished"
+            self._jobs.discard(job)
+            if job in self._active:
+                self._active.remove(job)
+            if job in self._waiting:
+                self._waiting.remove(job)
+
+            self._drop_queued(job)
+
+            while self._waiting and len(self._active) < self.max_batch_jobs:
+                promoted = self._waiting.popleft()
+                promoted.state = "running"
+                self._active.append(promoted)
+                logger.info(f"Job {promoted.id} admitted")
+
+            self._cond.notify_all()
+
+    def _drop_queued(self, job: Job):
+        """إلغاء ما تبقى من أعمال المهمة في الطوابير (داخل القفل)"""
+        for queues in self._queues.values():
+            session_queue = queues[job.kind].get(job.session_id)
+            if not session_queue:
+                continue
+            for task in [t for t in session_queue if t.job is job]:
+                session_queue.remove(task)
+                task.future.cancel()
+            if not session_queue:
+                del queues[job.kind][job.session_id]
+
+    # ═══════════════════════════════════════════════════════
+    # الإلغاء
+    # ═══════════════════════════════════════════════════════
+
+    def cancel(self, job: Job):
+        """
+        إلغاء مهمة: لا تُجدول صفحات جديدة، تُحذف المنتظرة في الطوابير
+        وتُقتل عمليات tesseract الجارية — آمن من أي خيط
+        """
+        with self._cond:
+            if job.cancelled:
+                return
+            job.cancelled = True
+            self._drop_queued(job)
+            self._cond.notify_all()
+        killed = job._kill_processes()
+        logger.info(
+            f"Job {job.id} ({job.session_id[:8]}) cancelled — "
+            f"{killed} running process(es) killed"
+        )
+
+    def cancel_session(self, session_id: str) -> int:
+        """إلغاء كل مهام الجلسة (زر الإلغاء) — يعيد عدد المهام الملغاة"""
+        with self._cond:
+            jobs = [j for j in self._jobs if j.session_id == session_id]
+        for job in jobs:
+            self.cancel(job)
+        return len(jobs)
+
+    # ═══════════════════════════════════════════════════════
+    # العمّال
+    # ═══════════════════════════════════════════════════════
+
+    def _enqueue(self, job: Job, engine_name: str, fn, payload) -> Future:
+        task = _Task(job, fn, payload)
+        with self._cond:
+            self._ensure_workers(engine_name)
+            queues = self._queues[engine_name][job.kind]
+            queues.setdefault(job.session_id, deque()).append(task)
+            self._cond.notify_all()
+        return task.future
+
+    def _ensure_workers(self, engine_name: str):
+        """تشغيل عمّال المحرك عند أول استخدام (داخل القفل)"""
+        if engine_name in self._workers:
+            return
+        self._queues[engine_name] = {p: OrderedDict() for p in PRIORITIES}
+        self._workers[engine_name] = [
+            threading.Thread(
+                target=self._worker,
+                args=(engine_name,),
+                name=f"ocr-sched-{engine_name}-{i}",
+                daemon=True,
+            )
+            for i in range(self.pool_sizes.get(engine_name, 2))
+        ]
+        for thread in self._workers[engine_name]:
+            thread.start()
+
+    def _next_task(self, engine_name: str):
+        """العمل التالي: أعلى أولوية، ثم الجلسة التالية بالتناوب (داخل القفل)"""
+        for priority in PRIORITIES:
+            queues = self._queues[engine_name][priority]
+            if not queues:
+                continue
+            session_id, session_queue = next(iter(queues.items()))
+            task = session_queue.popleft()
+            if session_queue:
+                queues.move_to_end(session_id)
+            else:
+                del queues[session_id]
+            return task
+        return None
+
+    def _worker(self, engine_name: str):
+        while True:
+            with self._cond:
+                task = self._next_task(engine_name)
+                while task is None:
+                    self._cond.wait()
+                    task = self._next_task(engine_name)
+
+            if not task.future.set_running_or_notify_cancel():
+                continue
+
+            start = time.time()
+            _local.running = task.job
+            error = None
+            try:
+                result = task.fn(task.payload)
+            except BaseException as e:
+                error = e
+            finally:
+                _local.running = None
+            elapsed = time.time() - start
+
+            # العدّادات قبل تسليم النتيجة — المستهلك يراها محدّثة
+            with self._cond:
+                task.job.tasks += 1
+                self._task_seconds = 0.8 * self._task_seconds + 0.2 * elapsed
+
+            if error is not None:
+                task.future.set_exception(error)
+            else:
+                task.future.set_result(result)
+
+    # ═══════════════════════════════════════════════════════
+    # الحالة
+    # ═══════════════════════════════════════════════════════
+
+    def workers(self, engine_name: str) -> int:
+        """عدد عمّال المحرك في المجدول"""
+        return self.pool_sizes.get(engine_name, 2)
+
+    def stats(self) -> dict:
+        """لقطة من حالة المجدول للعرض"""
+        with self._cond:
+            queued = sum(
+                len(q)
+                for queues in self._queues.values()
+                for sessions in queues.values()
+                for q in sessions.values()
+            )
+            return {
+                "active_jobs": len(self._active),
+                "waiting_jobs": len(self._waiting),
+                "queued_tasks": queued,
+                "task_seconds": round(self._task_seconds, 2),
+            }
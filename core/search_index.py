@@ -0,0 +1,255 @@
+"""
+فهرس بحث نصي دائم للمستندات المعالجة (SQLite FTS5)
+Persistent full-text index over OCR'd pages (SQLite FTS5)
+"""
+
+import html
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from config import SEARCH_INDEX_FILE, SEARCH_RESULTS_LIMIT, SEARCH_SNIPPET_CHARS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# التشكيل والتطويل (عربي) والنقاط (عبري) — تُحذف قبل الفهرسة والبحث
+_DIACRITICS = re.compile(
+    "[\u0610-\u061a\u0640\u064b-\u065f\u0670\u06d6-\u06ed"
+    "\u0591-\u05bd\u05bf\u05c1\u05c2\u05c4\u05c5\u05c7]"
+)
+
+# توحيد أشكال الحروف: الألف، الياء، التاء المربوطة، الهمزات
+_LETTER_FOLDING = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي",
+    "ة": "ه",
+    "ؤ": "و",
+}
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _fold_char(ch: str) -> str:
+    """توحيد حرف واحد ("" للتشكيل)"""
+    if _DIACRITICS.match(ch):
+        return ""
+    return _LETTER_FOLDING.get(ch, ch).lower()
+
+
+def normalize_text(text: str) -> str:
+    """
+    تطبيع النص للبحث — حذف التشكيل وتوحيد أشكال الحروف وحالة الأحرف
+
+    "الْمَدْرَسَةُ" و "المدرسه" و "المدرسة" تصبح كلها "المدرسه"
+    """
+    return "".join(_fold_char(ch) for ch in text)
+
+
+def _normalize_with_map(text: str) -> tuple:
+    """النص المطبّع مع موقع كل حرف منه في النص الأصلي"""
+    chars, positions = [], []
+    for i, ch in enumerate(text):
+        for folded in _fold_char(ch):
+            chars.append(folded)
+            positions.append(i)
+    return "".join(chars), positions
+
+
+class SearchIndex:
+    """
+    فهرس صفحات دائم — يُحدَّث تدريجياً مع اكتمال كل صفحة
+
+    النص يُطبَّع (عربي/عبري) قبل إدخاله في FTS5 ويُحفظ الأصل بجانبه،
+    فالمطابقة والترتيب (bm25) يتمان داخل SQLite والمقتطف يُبنى من
+    النص الأصلي بتشكيله. اتصال واحد مشترك بين الخيوط محمي بقفل.
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """إنشاء الجداول عند أول استخدام"""
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    doc_key TEXT UNIQUE NOT NULL,
+                    name TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    id INTEGER PRIMARY KEY,
+                    doc_id INTEGER NOT NULL REFERENCES documents(id),
+                    page INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    UNIQUE (doc_id, page)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+                    body, tokenize = 'unicode61 remove_diacritics 2'
+                );
+                """
+            )
+
+    def _document_id(self, doc_key: str, name: str) -> int:
+        """معرّف المستند (يُنشأ أو يُحدَّث اسمه) — داخل معاملة مفتوحة"""
+        self._conn.execute(
+            "INSERT INTO documents (doc_key, name, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(doc_key) DO UPDATE SET name = excluded.name, "
+            "updated_at = excluded.updated_at",
+            (doc_key, name, time.time()),
+        )
+        return self._conn.execute(
+            "SELECT id FROM documents WHERE doc_key = ?", (doc_key,)
+        ).fetchone()[0]
+
+    def add_pages(self, doc_key: str, name: str, pages: list) -> int:
+        """
+        إضافة أو استبدال صفحات مستند في معاملة واحدة
+
+        Args:
+            doc_key: بصمة محتوى الملف (نفس الملف = نفس المستند)
+            name: اسم الملف للعرض
+            pages: [(page_num, text), ...]
+
+        Returns:
+            عدد الصفحات المفهرسة
+        """
+        pages = [(p, t) for p, t in pages if t and t.strip()]
+        if not pages:
+            return 0
+
+        with self._lock, self._conn:
+            doc_id = self._document_id(doc_key, name)
+            for page_num, text in pages:
+                old = self._conn.execute(
+                    "SELECT id FROM pages WHERE doc_id = ? AND page = ?",
+                    (doc_id, page_num),
+                ).fetchone()
+                if old:
+                    self._conn.execute("DELETE FROM pages_fts WHERE rowid = ?", old)
+                    self._conn.execute("DELETE FROM pages WHERE id = ?", old)
+
+                row_id = self._conn.execute(
+                    "INSERT INTO pages (doc_id, page, text) VALUES (?, ?, ?)",
+                    (doc_id, page_num, text),
+                ).lastrowid
+                self._conn.execute(
+                    "INSERT INTO pages_fts (rowid, body) VALUES (?, ?)",
+                    (row_id, normalize_text(text)),
+                )
+        return len(pages)
+
+    def add_page(self, doc_key: str, name: str, page_num: int, text: str) -> int:
+        """إضافة صفحة واحدة (عند اكتمالها)"""
+        return self.add_pages(doc_key, name, [(page_num, text)])
+
+    @staticmethod
+    def _match_query(query: str) -> tuple:
+        """
+        تحويل نص البحث إلى استعلام FTS5 — كل كلمة مطلوبة وكبادئة
+
+        Returns:
+            (استعلام FTS5، الكلمات المطبّعة)
+        """
+        terms = _TOKEN.findall(normalize_text(query))
+        return " ".join(f'"{t}"*' for t in terms), terms
+
+    def search(self, query: str, limit: int = SEARCH_RESULTS_LIMIT) -> list:
+        """
+        البحث في كل الصفحات المفهرسة
+
+        Returns:
+            قائمة {"file", "page", "snippet", "score"} مرتبة حسب الصلة
+            (المقتطف HTML آمن مع <mark> حول الكلمات المطابقة)
+        """
+        match, terms = self._match_query(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.name, p.page, p.text, bm25(pages_fts) AS score "
+                "FROM pages_fts "
+                "JOIN pages p ON p.id = pages_fts.rowid "
+                "JOIN documents d ON d.id = p.doc_id "
+                "WHERE pages_fts MATCH ? "
+                "ORDER BY score LIMIT ?",
+                (match, limit),
+            ).fetchall()
+
+        return [
+            {
+                "file": name,
+                "page": page,
+                "snippet": self.snippet(text, terms),
+                "score": round(-score, 3),
+            }
+            for name, page, text, score in rows
+        ]
+
+    @staticmethod
+    def snippet(text: str, terms: list, width: int = SEARCH_SNIPPET_CHARS) -> str:
+        """
+        مقتطف من النص الأصلي حول أول تطابق مع تمييز كل الكلمات المطابقة
+
+        المطابقة تتم على النص المطبّع ثم تُنقل المواقع إلى الأصل،
+        فيظهر التشكيل وأشكال الحروف كما في المستند
+        """
+        normalized, positions = _normalize_with_map(text)
+
+        spans = []
+        for m in _TOKEN.finditer(normalized):
+            if any(m.group().startswith(t) for t in terms):
+                s, e = positions[m.start()], positions[m.end() - 1] + 1
+                while e < len(text) and _DIACRITICS.match(text[e]):
+                    e += 1  # تشكيل الحرف الأخير ضمن التمييز
+                spans.append((s, e))
+
+        if not spans:
+            return html.escape(text[:width * 2])
+
+        start = max(spans[0][0] - width, 0)
+        end = min(spans[0][1] + width, len(text))
+
+        parts = ["…" if start else ""]
+        cursor = start
+        for s, e in spans:
+            if s < cursor or e > end:
+                continue
+            parts.append(html.escape(text[cursor:s]))
+            parts.append(f"<mark>{html.escape(text[s:e])}</mark>")
+            cursor = e
+        parts.append(html.escape(text[cursor:end]))
+        parts.append("…" if end < len(text) else "")
+
+        return "".join(parts).replace("\n", " ")
+
+    def stats(self) -> dict:
+        """عدد المستندات والصفحات المفهرسة"""
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {"documents": documents, "pages": pages}
+
+    def clear(self):
+        """حذف كل محتوى الفهرس"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages_fts")
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM documents")
+        logger.info("Search index cleared")
+
+
+@lru_cache(maxsize=1)
+def get_search_index() -> SearchIndex:
+    """فهرس البحث — نسخة واحدة مشتركة لكل العملية"""
+    return SearchIndex()
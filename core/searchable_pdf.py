@@ -0,0 +1,154 @@
+"""
+إنشاء PDF قابل للبحث — طبقة نص غير مرئية من مواقع كلمات OCR
+Searchable PDF output with an invisible text layer built from OCR boxes
+"""
+
+import fitz  # PyMuPDF
+
+from config import SEARCHABLE_PDF_SCRIPT_FONTS
+from core.upload_store import open_pdf
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SearchablePDF:
+    """
+    كتابة طبقة نص غير مرئية (render_mode=3) فوق الصفحات الأصلية
+
+    المواقع تُحوَّل من بكسلات الصورة المعالجة إلى نقاط الصفحة عبر نسبة
+    أبعاد الصفحة إلى أبعاد الصورة — فتعمل مع أي DPI أو تصغير سابق.
+    الصفحات تُعالج واحدة تلو الأخرى ولا تُرسم أي صورة نقطية.
+    """
+
+    @staticmethod
+    def _script(text: str) -> str:
+        """نظام كتابة الكلمة (لاختيار الخط المناسب)"""
+        for ch in text:
+            if "֐" <= ch <= "׿":
+                return "hebrew"
+            if "؀" <= ch <= "ۿ" or "ݐ" <= ch <= "ݿ":
+                return "arabic"
+        return "latin"
+
+    @staticmethod
+    def _fonts() -> dict:
+        """خطوط MuPDF المدمجة لكل نظام كتابة"""
+        fonts = {"latin": fitz.Font("helv")}
+        for script, code in SEARCHABLE_PDF_SCRIPT_FONTS.items():
+            try:
+                fonts[script] = fitz.Font(script=code)
+            except Exception as e:
+                logger.warning(f"Font for {script} unavailable: {e}")
+                fonts[script] = fonts["latin"]
+        return fonts
+
+    @staticmethod
+    def add_text_layer(page, boxes: list, image_size: tuple, fonts: dict) -> int:
+        """
+        إضافة كلمات غير مرئية إلى صفحة واحدة
+
+        Args:
+            page: صفحة fitz
+            boxes: [[x, y, w, h, text], ...] بإحداثيات الصورة
+            image_size: (عرض، ارتفاع) الصورة التي تشير إليها المواقع
+
+        Returns:
+            عدد الكلمات المضافة
+        """
+        rect = page.rect
+        sx = rect.width / image_size[0]
+        sy = rect.height / image_size[1]
+
+        writer = fitz.TextWriter(rect)
+        count = 0
+
+        for x, y, w, h, text in boxes:
+            if not text.strip() or w <= 0 or h <= 0:
+                continue
+
+            script = SearchablePDF._script(text)
+            font = fonts[script]
+            width_pt = w * sx
+            height_pt = h * sy
+
+            # حجم خط يغطي صندوق الكلمة تقريباً (للتحديد والتظليل)
+            unit_width = font.text_length(text, fontsize=1) or 1
+            fontsize = max(min(height_pt, width_pt / unit_width), 1)
+
+            baseline = fitz.Point(rect.x0 + x * sx, rect.y0 + (y + h) * sy - height_pt * 0.15)
+            try:
+                # right_to_left يحفظ الترتيب المنطقي في طبقة النص (للبحث والنسخ)
+                writer.append(
+                    baseline, text, font=font, fontsize=fontsize,
+                    right_to_left=script != "latin",
+                )
+                count += 1
+            except Exception as e:
+                logger.warning(f"Skipped word on page {page.number + 1}: {e}")
+
+        if count:
+            writer.write_text(page, render_mode=3)  # 3 = نص غير مرئي
+        return count
+
+    @staticmethod
+    def from_pdf(pdf_file, results: list) -> bytes:
+        """
+        PDF قابل للبحث من ملف PDF الأصلي ونتائج OCR الخاصة به
+
+        Args:
+            pdf_file: ملف PDF الأصلي (ملف مخزّن أو bytes)
+            results: نتائج الصفحات (page, boxes, image_size)
+
+        Returns:
+            bytes أو None عند الفشل
+        """
+        try:
+            doc = open_pdf(pdf_file)
+            fonts = SearchablePDF._fonts()
+            total = 0
+
+            for r in results:
+                if not r.get("boxes") or not r.get("image_size"):
+                    continue
+                if not 1 <= r["page"] <= len(doc):
+                    continue
+                page = doc.load_page(r["page"] - 1)
+                total += SearchablePDF.add_text_layer(
+                    page, r["boxes"], r["image_size"], fonts
+                )
+
+            data = doc.tobytes(garbage=3, deflate=True)
+            doc.close()
+            logger.info(f"Searchable PDF: {total} words, {len(data)} bytes")
+            return data
+
+        except Exception as e:
+            logger.error(f"Searchable PDF error: {e}")
+            return None
+
+    @staticmethod
+    def from_image(image_bytes: bytes, result: dict) -> bytes:
+        """PDF قابل للبحث من صورة واحدة (صفحة بحجم الصورة)"""
+        try:
+            doc = fitz.open()
+            img_doc = fitz.open(stream=image_bytes)
+            rect = img_doc[0].rect
+            img_doc.close()
+
+            page = doc.new_page(width=rect.width, height=rect.height)
+            page.insert_image(page.rect, stream=image_bytes)
+
+            if result.get("boxes") and result.get("image_size"):
+                SearchablePDF.add_text_layer(
+                    page, result["boxes"], result["image_size"],
+                    SearchablePDF._fonts(),
+                )
+
+            data = doc.tobytes(garbage=3, deflate=True)
+            doc.close()
+            return data
+
+        except Exception as e:
+            logger.error(f"Searchable PDF (image) error: {e}")
+            return None
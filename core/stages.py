@@ -0,0 +1,264 @@
+"""
+خط معالجة مرحلي بطوابير محدودة — رسم ← تحسين ← OCR
+Streaming stage pipeline with bounded queues and per-stage utilization
+
+كل مرحلة تعمل في خيوطها الخاصة وتتداخل مع غيرها: رسم الصفحة التالية
+يحدث أثناء انتظار عملية tesseract للصفحة الحالية. الطوابير بين المراحل
+محدودة (backpressure) فالذاكرة محدودة بعمق الطابور مهما كان طول المستند،
+وأبطأ مرحلة تحدد سرعة الخط كله.
+"""
+
+from collections import OrderedDict
+import queue
+import threading
+import time
+
+from config import PIPELINE_QUEUE_DEPTH
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DONE = object()
+
+
+class StageStats:
+    """
+    زمن العمل والانتظار لكل مرحلة — الاستغلال = العمل ÷ (المدة × العمّال)
+
+    المرحلة ذات الاستغلال الأعلى هي عنق الزجاجة؛ الانتظار (blocked) هو
+    الوقت الذي توقفت فيه المرحلة لأن الطابور التالي ممتلئ
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = OrderedDict()
+        self.started = time.time()
+        self.finished = None
+
+    def add_stage(self, name: str, workers: int):
+        with self._lock:
+            self._stages.setdefault(
+                name, {"workers": workers, "items": 0, "busy": 0.0, "blocked": 0.0}
+            )
+
+    def record(self, name: str, busy: float = 0.0, blocked: float = 0.0, items: int = 0):
+        with self._lock:
+            stage = self._stages[name]
+            stage["busy"] += busy
+            stage["blocked"] += blocked
+            stage["items"] += items
+
+    def timed(self, name: str, fn):
+        """تغليف دالة المرحلة لقياس زمن عملها"""
+        def wrapper(payload):
+            start = time.time()
+            try:
+                return fn(payload)
+            finally:
+                self.record(name, busy=time.time() - start, items=1)
+        return wrapper
+
+    def finish(self):
+        self.finished = time.time()
+        logger.info(f"Pipeline stages: {self.summary()}")
+
+    def report(self) -> list:
+        """[{"stage", "workers", "items", "busy", "blocked", "utilization"}]"""
+        elapsed = max((self.finished or time.time()) - self.started, 1e-6)
+        with self._lock:
+            return [
+                {
+                    "stage": name,
+                    "workers": s["workers"],
+                    "items": s["items"],
+                    "busy": round(s["busy"], 2),
+                    "blocked": round(s["blocked"], 2),
+                    "utilization": round(
+                        min(s["busy"] / (elapsed * s["workers"]), 1.0) * 100, 1
+                    ),
+                }
+                for name, s in self._stages.items()
+            ]
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{r['stage']} {r['utilization']}% ×{r['workers']}" for r in self.report()
+        )
+
+
+class _Stage:
+    """إيقاف مشترك بين خيوط المرحلة وخطأ المصدر (يُعاد رفعه عند المستهلك)"""
+
+    def __init__(self):
+        self.stop = threading.Event()
+        self.error = None
+
+    def put(self, q: queue.Queue, item) -> bool:
+        """وضع عنصر في طابور محدود — False إذا أُوقف الخط أثناء الانتظار"""
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+def prefetch(items, name: str, stats: StageStats = None, depth: int = PIPELINE_QUEUE_DEPTH):
+    """
+    استهلاك مصدر (مثل رسم صفحات PDF) في خيط خلفي بطابور محدود
+
+    المصدر يُقرأ من خيط واحد فقط — مناسب لمستندات MuPDF غير الآمنة للخيوط
+
+    Args:
+        items: iterable من (page_id, payload)
+        depth: أقصى عدد عناصر جاهزة تنتظر المستهلك
+
+    Yields:
+        (page_id, payload) بنفس الترتيب
+    """
+    stats = stats or StageStats()
+    stats.add_stage(name, 1)  # عند الإنشاء — فيبقى ترتيب التقرير بترتيب المراحل
+    return _prefetch(items, name, stats, depth)
+
+
+def _prefetch(items, name: str, stats: StageStats, depth: int):
+    control = _Stage()
+    out = queue.Queue(maxsize=depth)
+
+    def feed():
+        iterator = iter(items)
+        try:
+            while not control.stop.is_set():
+                start = time.time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.record(name, busy=time.time() - start, items=1)
+
+                start = time.time()
+                if not control.put(out, item):
+                    break
+                stats.record(name, blocked=time.time() - start)
+        except Exception as e:
+            control.error = e
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()  # تحرير المستند في نفس الخيط الذي فتحه
+            control.put(out, _DONE)
+
+    threading.Thread(target=feed, name=f"stage-{name}", daemon=True).start()
+
+    try:
+        while True:
+            item = out.get()
+            if item is _DONE:
+                break
+            yield item
+        if control.error is not None:
+            raise control.error
+    finally:
+        control.stop.set()
+
+
+def parallel_map(
+    fn,
+    items,
+    name: str,
+    workers: int,
+    stats: StageStats = None,
+    depth: int = PIPELINE_QUEUE_DEPTH,
+):
+    """
+    تطبيق fn على كل عنصر في عدة خيوط — النتائج بنفس ترتيب الإدخال
+
+    عدد العناصر داخل المرحلة (في الطابور + قيد العمل + تنتظر دورها في
+    الترتيب) لا يتجاوز depth + workers
+
+    Args:
+        fn: دالة (payload) -> payload جديد
+        items: iterable من (page_id, payload)
+
+    Yields:
+        (page_id, fn(payload)) — استثناء fn يُمرَّر كقيمة النتيجة
+    """
+    stats = stats or StageStats()
+    stats.add_stage(name, workers)
+    return _parallel_map(fn, items, name, workers, stats, depth)
+
+
+def _parallel_map(fn, items, name: str, workers: int, stats: StageStats, depth: int):
+    control = _Stage()
+    inbox = queue.Queue()
+    slots = threading.Semaphore(depth + workers)
+    results = {}
+    ready = threading.Condition()
+    total = [None]  # عدد العناصر بعد انتهاء المصدر
+
+    def feed():
+        count = 0
+        iterator = iter(items)
+        try:
+            for page_id, payload in iterator:
+                start = time.time()
+                while not slots.acquire(timeout=0.1):
+                    if control.stop.is_set():
+                        return
+                stats.record(name, blocked=time.time() - start)
+                inbox.put((count, page_id, payload))
+                count += 1
+        except Exception as e:
+            control.error = e
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()  # إيقاف المرحلة السابقة أيضاً
+            for _ in range(workers):
+                inbox.put(None)
+            with ready:
+                total[0] = count
+                ready.notify_all()
+
+    def work():
+        while True:
+            task = inbox.get()
+            if task is None or control.stop.is_set():
+                return
+            seq, page_id, payload = task
+            start = time.time()
+            try:
+                value = fn(payload)
+            except Exception as e:
+                logger.error(f"Stage {name} error ({page_id}): {e}")
+                value = e
+            stats.record(name, busy=time.time() - start, items=1)
+            with ready:
+                results[seq] = (page_id, value)
+                ready.notify_all()
+
+    threads = [threading.Thread(target=feed, name=f"stage-{name}-feed", daemon=True)]
+    threads += [
+        threading.Thread(target=work, name=f"stage-{name}-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        seq = 0
+        while True:
+            with ready:
+                while seq not in results and (total[0] is None or seq < total[0]):
+                    ready.wait()
+                if seq not in results:
+                    break
+                item = results.pop(seq)
+            slots.release()
+            seq += 1
+            yield item
+        if control.error is not None:
+            raise control.error
+    finally:
+        control.stop.set()
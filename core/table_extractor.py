@@ -0,0 +1,159 @@
+"""
+استخراج الجداول كخلايا منظمة
+Table extraction into structured cells
+
+1. كشف خطوط الجدول الأفقية والعمودية (مورفولوجيا متجهة بـ numpy)
+2. بناء شبكة الخلايا من تقاطع الخطوط
+3. OCR لكل خلية بالتوازي مع تخزين مؤقت لكل خلية
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+
+import numpy as np
+from PIL import Image
+
+from config import (
+    TABLE_INK_THRESHOLD,
+    TABLE_MIN_LINE_RATIO,
+    TABLE_CELL_PADDING,
+    TABLE_EMPTY_CELL_INK,
+    TABLE_CELL_PSM,
+    TABLE_CELL_CACHE_SIZE,
+)
+from core.engines import get_engine
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ذاكرة مؤقتة للخلايا مشتركة لكل العملية: (بصمة الخلية، المحرك، اللغة) → نص
+_cell_cache = OrderedDict()
+_cell_cache_lock = threading.Lock()
+
+
+class TableExtractor:
+    """مستخرج الجداول — خطوط → شبكة → OCR للخلايا"""
+
+    @staticmethod
+    def _line_positions(ink: np.ndarray, min_length: int) -> list:
+        """
+        مواقع الخطوط الأفقية (على محور الصفوف) في مصفوفة الحبر
+
+        فتح مورفولوجي بنواة أفقية بطول min_length عبر المجموع التراكمي:
+        نافذة مجموعها = min_length تعني تسلسلاً متصلاً من الحبر
+        """
+        if ink.shape[1] <= min_length:
+            return []
+
+        cs = np.cumsum(ink, axis=1, dtype=np.int32)
+        window = cs[:, min_length:] - cs[:, :-min_length]
+        rows = np.flatnonzero((window == min_length).any(axis=1))
+        if rows.size == 0:
+            return []
+
+        # دمج الصفوف المتتالية (خط سميك) في موقع واحد
+        breaks = np.flatnonzero(np.diff(rows) > 1)
+        starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+        ends = np.concatenate((rows[breaks], [rows[-1]]))
+        return [int((s + e) // 2) for s, e in zip(starts, ends)]
+
+    @staticmethod
+    def detect_grid(image: Image.Image) -> tuple:
+        """
+        كشف شبكة الجدول
+
+        Returns:
+            (xs, ys) — مواقع الخطوط العمودية والأفقية بالبكسل
+        """
+        gray = np.asarray(image.convert("L"))
+        ink = gray < TABLE_INK_THRESHOLD
+
+        height, width = ink.shape
+        ys = TableExtractor._line_positions(ink, int(width * TABLE_MIN_LINE_RATIO))
+        xs = TableExtractor._line_positions(ink.T, int(height * TABLE_MIN_LINE_RATIO))
+        return xs, ys
+
+    @staticmethod
+    def _cell_key(cell: Image.Image, settings: dict) -> tuple:
+        digest = hashlib.blake2b(cell.tobytes(), digest_size=16).hexdigest()
+        return (digest, cell.size, settings["engine"], settings.get("lang"))
+
+    @staticmethod
+    def _recognize_cell(cell: Image.Image, settings: dict) -> str:
+        """OCR لخلية واحدة مع التخزين المؤقت وتخطي الخلايا الفارغة"""
+        # خلية بلا حبر تقريباً ← فارغة بدون تشغيل المحرك
+        ink = np.asarray(cell.convert("L")) < TABLE_INK_THRESHOLD
+        if ink.mean() < TABLE_EMPTY_CELL_INK:
+            return ""
+
+        key = TableExtractor._cell_key(cell, settings)
+        with _cell_cache_lock:
+            if key in _cell_cache:
+                _cell_cache.move_to_end(key)
+                return _cell_cache[key]
+
+        cell_settings = dict(settings, show_confidence=False, auto_language=False)
+        engine = get_engine(settings["engine"], cell_settings)
+        result = engine.recognize(cell, psm=TABLE_CELL_PSM)
+        text = "" if "error" in result else " ".join(result.get("text", "").split())
+
+        with _cell_cache_lock:
+            _cell_cache[key] = text
+            if len(_cell_cache) > TABLE_CELL_CACHE_SIZE:
+                _cell_cache.popitem(last=False)
+        return text
+
+    @staticmethod
+    def extract(image: Image.Image, settings: dict) -> dict:
+        """
+        استخراج جدول من صورة
+
+        Args:
+            image: صورة الصفحة (قبل التحسين)
+            settings: لقطة الإعدادات
+
+        Returns:
+            dict مع table (قائمة صفوف من نصوص الخلايا), text, engine
+            أو dict مع error إذا لم يُكتشف جدول
+        """
+        from core.pipeline import OCRPipeline
+
+        processed = OCRPipeline.enhance(image, settings)
+        xs, ys = TableExtractor.detect_grid(processed)
+
+        if len(xs) < 2 or len(ys) < 2:
+            return {"error": "لم يتم العثور على جدول بخطوط واضحة"}
+
+        # قص الخلايا من الصورة المحضّرة
+        pad = TABLE_CELL_PADDING
+        cells = []
+        for r, (y0, y1) in enumerate(zip(ys, ys[1:])):
+            for c, (x0, x1) in enumerate(zip(xs, xs[1:])):
+                if x1 - x0 <= 2 * pad or y1 - y0 <= 2 * pad:
+                    cells.append(((r, c), None))
+                    continue
+                crop = processed.crop((x0 + pad, y0 + pad, x1 - pad, y1 - pad))
+                cells.append(((r, c), crop))
+
+        # OCR للخلايا بالتوازي عبر مجمّع المحرك
+        engine = get_engine(settings["engine"], settings)
+        rows = [["" for _ in range(len(xs) - 1)] for _ in range(len(ys) - 1)]
+        for (r, c), cell_result in engine.map_pages(
+            lambda cell: (
+                {"text": ""} if cell is None
+                else {"text": TableExtractor._recognize_cell(cell, settings)}
+            ),
+            cells,
+            count_pages=False,
+        ):
+            rows[r][c] = cell_result.get("text", "")
+
+        logger.info(f"Table extracted: {len(rows)}x{len(rows[0])} cells")
+
+        return {
+            "text": "\n".join(" | ".join(row) for row in rows),
+            "table": rows,
+            "engine": f"جدول ({engine.name})",
+            "avg_confidence": None,
+        }
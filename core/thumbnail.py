@@ -0,0 +1,79 @@
+"""
+توليد الصور المصغّرة للمعاينة
+Lightweight thumbnail generation for previews
+"""
+
+from PIL import Image
+import fitz  # PyMuPDF
+import io
+
+from config import THUMBNAIL_MAX_SIZE, THUMBNAIL_QUALITY
+from core.upload_store import open_image, open_pdf
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ThumbnailGenerator:
+    """مولّد الصور المصغّرة — يرسل للمتصفح صوراً صغيرة بدل الدقة الكاملة"""
+
+    @staticmethod
+    def _encode(image: Image.Image) -> bytes:
+        """ترميز الصورة المصغّرة كـ JPEG"""
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=THUMBNAIL_QUALITY)
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_image(image: Image.Image, max_size: int = THUMBNAIL_MAX_SIZE) -> bytes:
+        """صورة مصغّرة من صورة PIL موجودة"""
+        thumb = image.copy()
+        thumb.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        return ThumbnailGenerator._encode(thumb)
+
+    @staticmethod
+    def from_image_bytes(data, max_size: int = THUMBNAIL_MAX_SIZE) -> bytes:
+        """
+        صورة مصغّرة من ملف صورة (bytes أو ملف مخزّن على القرص)
+
+        ملفات JPEG تُفك بدقة مخفّضة مباشرة (draft) بدل فك الصورة كاملة
+        """
+        try:
+            image = open_image(data)
+            if image.format == "JPEG":
+                image.draft("RGB", (max_size, max_size))
+            image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            return ThumbnailGenerator._encode(image)
+        except Exception as e:
+            logger.error(f"Image thumbnail error: {e}")
+            return None
+
+    @staticmethod
+    def from_pdf_page(
+        pdf_bytes,
+        page_num: int,
+        max_size: int = THUMBNAIL_MAX_SIZE,
+    ) -> bytes:
+        """
+        صورة مصغّرة لصفحة PDF — تُرسم بمقياس منخفض مباشرة
+
+        Args:
+            pdf_bytes: محتوى ملف PDF (أو ملف مخزّن على القرص)
+            page_num: رقم الصفحة (يبدأ من 1)
+            max_size: الحد الأقصى لأبعاد الصورة المصغّرة
+        """
+        try:
+            doc = open_pdf(pdf_bytes)
+            page = doc.load_page(page_num - 1)
+
+            scale = max_size / max(page.rect.width, page.rect.height)
+            pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+            image = Image.open(io.BytesIO(pix.tobytes("ppm")))
+            doc.close()
+
+            return ThumbnailGenerator._encode(image)
+        except Exception as e:
+            logger.error(f"PDF thumbnail error (page {page_num}): {e}")
+            return None
@@ -0,0 +1,196 @@
+"""
+OCR مقسّم إلى أجزاء للصور الكبيرة جداً بدل تصغيرها
+Tiled OCR for oversized images at full resolution
+"""
+
+from config import TILE_SIZE, TILE_OVERLAP, TILE_TRIGGER_DIMENSION
+from core.engines import OCREngine, get_engine
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _is_rtl(text: str) -> bool:
+    """هل الكلمة بخط يُكتب من اليمين لليسار (عربي/عبري)؟"""
+    return any("\u0590" <= ch <= "\u06ff" for ch in text)
+
+
+class TiledOCR:
+    """
+    تقسيم الصور الكبيرة إلى أجزاء متداخلة بالدقة الكاملة
+
+    كل جزء يُحسَّن ويُقرأ في عامل مستقل (ذاكرة العامل محدودة بحجم الجزء)،
+    ثم تُدمج الكلمات في فضاء الصورة: الكلمة في منطقة التداخل تُنسب للجزء
+    الأقرب مركزه إلى مركزها، فتُحذف النسخة المقطوعة عند حافة الجزء الآخر
+    """
+
+    @staticmethod
+    def needs_tiling(size: tuple) -> bool:
+        return max(size) > TILE_TRIGGER_DIMENSION
+
+    @staticmethod
+    def _starts(length: int, tile: int, overlap: int) -> list:
+        """بدايات الأجزاء على محور واحد — آخر جزء يُزاح ليبقى بحجم كامل"""
+        if length <= tile:
+            return [0]
+        step = tile - overlap
+        starts = list(range(0, length - tile + 1, step))
+        if starts[-1] + tile < length:
+            starts.append(length - tile)
+        return starts
+
+    @staticmethod
+    def tile_boxes(
+        size: tuple, tile: int = TILE_SIZE, overlap: int = TILE_OVERLAP
+    ) -> list:
+        """
+        مستطيلات الأجزاء (x0, y0, x1, y1) — جزء واحد للصور الصغيرة
+        """
+        width, height = size
+        if not TiledOCR.needs_tiling(size):
+            return [(0, 0, width, height)]
+
+        return [
+            (x, y, min(x + tile, width), min(y + tile, height))
+            for y in TiledOCR._starts(height, tile, overlap)
+            for x in TiledOCR._starts(width, tile, overlap)
+        ]
+
+    @staticmethod
+    def recognize_pages(pages, settings: dict):
+        """
+        استخراج النص من صفحات مقسّمة — أجزاء كل الصفحات تمر كتيار واحد
+        عبر مجمّع عمّال المحرك فيبقى التوازي كاملاً حتى للصفحات العادية
+
+        Args:
+            pages: iterable من (page_id, PIL.Image)
+
+        Yields:
+            (page_id, result) بنفس ترتيب الإدخال
+        """
+        from core.pipeline import OCRPipeline
+
+        # الدمج يحتاج مواقع الكلمات
+        tile_settings = dict(settings, show_confidence=True)
+        engine = get_engine(settings["engine"], tile_settings)
+
+        def tiles():
+            for page_id, image in pages:
+                boxes = TiledOCR.tile_boxes(image.size)
+                if len(boxes) > 1:
+                    logger.info(
+                        f"Tiling page {page_id}: {image.size[0]}x{image.size[1]} "
+                        f"→ {len(boxes)} tiles"
+                    )
+                for index, box in enumerate(boxes):
+                    yield (page_id, image.size, index, len(boxes), box), (image, box)
+
+        def work(payload):
+            image, box = payload
+            crop = image.crop(box)
+            processed = OCRPipeline.enhance(crop, tile_settings)
+            result = engine.recognize(processed)
+
+            # التحسين قد يكبّر الأجزاء الصغيرة — المواقع تعود لمقياس الجزء
+            ratio = crop.size[0] / processed.size[0]
+            if ratio != 1:
+                for w in result.get("words", []):
+                    for k in ("x", "y", "w", "h"):
+                        w[k] = int(w[k] * ratio)
+            return OCREngine.attach_boxes(result, crop.size)
+
+        from core.scheduler import page_done
+
+        collected = []
+        for (page_id, size, index, count, box), result in engine.map_pages(
+            work, tiles(), count_pages=False
+        ):
+            if index == 0:
+                collected = []
+            collected.append((box, result))
+            if index == count - 1:
+                page_done()  # الصفحة تُحسب مرة واحدة مهما كان عدد أجزائها
+                yield page_id, TiledOCR.merge(size, collected)
+
+    @staticmethod
+    def merge(size: tuple, tiles: list) -> dict:
+        """
+        دمج نتائج الأجزاء في نتيجة صفحة واحدة
+
+        Args:
+            size: أبعاد الصورة الكاملة
+            tiles: [((x0, y0, x1, y1), result), ...]
+        """
+        if len(tiles) == 1:
+            return tiles[0][1]
+
+        errors = [r["error"] for _, r in tiles if "error" in r]
+        if len(errors) == len(tiles):
+            return tiles[0][1]
+
+        xs = sorted({box[0] for box, _ in tiles})
+        ys = sorted({box[1] for box, _ in tiles})
+        tile_w = tiles[0][0][2] - tiles[0][0][0]
+        tile_h = tiles[0][0][3] - tiles[0][0][1]
+
+        words = []
+        for (x0, y0, _, _), result in tiles:
+            for w in result.get("words", []):
+                cx = x0 + w["x"] + w["w"] / 2
+                cy = y0 + w["y"] + w["h"] / 2
+                # الجزء الأقرب مركزه يملك الكلمة (إزالة التكرار في التداخل)
+                owner_x = min(xs, key=lambda s: abs(s + tile_w / 2 - cx))
+                owner_y = min(ys, key=lambda s: abs(s + tile_h / 2 - cy))
+                if (owner_x, owner_y) != (x0, y0):
+                    continue
+                words.append(dict(w, x=w["x"] + x0, y=w["y"] + y0))
+
+        lines = TiledOCR._group_lines(words)
+        text = "\n".join(" ".join(w["text"] for w in line) for line in lines)
+        for line_num, line in enumerate(lines, 1):
+            for w in line:
+                w.update(block=1, line=line_num)
+
+        first = next(r for _, r in tiles if "error" not in r)
+        result = dict(first)
+        result.update(
+            text=text,
+            words=[w for line in lines for w in line],
+            word_count=len(words),
+            avg_confidence=(
+                round(sum(w["confidence"] for w in words) / len(words), 1)
+                if words else 0
+            ),
+            engine=f"{first.get('engine', '')} (مقسّم: {len(tiles)} أجزاء)",
+            tiles=len(tiles),
+        )
+        result.pop("boxes", None)
+        if any(r.get("timed_out") for _, r in tiles):
+            result["timed_out"] = True  # نص جزئي — يمكن إعادة الصفحة
+        if errors:
+            logger.warning(f"Tiled OCR: {len(errors)} of {len(tiles)} tiles failed")
+        return OCREngine.attach_boxes(result, size)
+
+    @staticmethod
+    def _group_lines(words: list) -> list:
+        """
+        تجميع الكلمات في أسطر حسب تداخلها العمودي
+
+        الأسطر من الأعلى للأسفل، والكلمات داخل السطر حسب اتجاه الكتابة
+        """
+        lines = []
+        for w in sorted(words, key=lambda w: w["y"] + w["h"] / 2):
+            cy = w["y"] + w["h"] / 2
+            if lines:
+                line = lines[-1]
+                top = min(v["y"] for v in line)
+                bottom = max(v["y"] + v["h"] for v in line)
+                if top <= cy <= bottom:
+                    line.append(w)
+                    continue
+            lines.append([w])
+
+        for line in lines:
+            rtl = sum(_is_rtl(w["text"]) for w in line) > len(line) / 2
+            line.sort(key=lambda w: w["x"], reverse=rtl)
+        return lines
@@ -0,0 +1,267 @@
+"""
+مخزن الملفات المرفوعة على القرص مع حصص ذاكرة لكل جلسة
+Content-addressed on-disk upload store with per-session memory quotas
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from PIL import Image
+import fitz  # PyMuPDF
+
+from config import (
+    UPLOAD_STORE_DIR,
+    UPLOAD_STORE_MAX_BYTES,
+    UPLOAD_CHUNK_SIZE,
+    SESSION_MEMORY_QUOTA,
+    PROCESS_MEMORY_BUDGET,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class QuotaExceededError(RuntimeError):
+    """طلب ذاكرة يتجاوز حصة الجلسة أو ميزانية العملية"""
+
+
+class StoredFile:
+    """
+    ملف مرفوع محفوظ على القرص — يُفتح بالمسار بدل نسخه في الذاكرة
+
+    يحمل نفس خصائص UploadedFile المستخدمة في التطبيق (name, size, type,
+    file_id, getvalue) فيمكن تمريره لأي مكوّن يتوقع ملفاً مرفوعاً
+    """
+
+    def __init__(self, path: str, name: str, size: int, sha256: str, mime: str):
+        self.path = path
+        self.name = name
+        self.size = size
+        self.sha256 = sha256
+        self.type = mime
+
+    @property
+    def file_id(self) -> str:
+        """مفتاح ثابت للتخزين المؤقت (بصمة المحتوى)"""
+        return self.sha256
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def getvalue(self) -> bytes:
+        """المحتوى كاملاً — للملفات الصغيرة فقط (يفضّل open_pdf / open_image)"""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def open_pdf(source) -> fitz.Document:
+    """
+    فتح PDF من ملف مخزّن (بالمسار — MuPDF يقرأ الأجزاء المطلوبة فقط)
+    أو من bytes / ملف في الذاكرة
+    """
+    path = getattr(source, "path", None)
+    if path:
+        return fitz.open(path)
+    data = source.getvalue() if hasattr(source, "getvalue") else source
+    return fitz.open(stream=data, filetype="pdf")
+
+
+def open_image(source) -> Image.Image:
+    """فتح صورة بدون فك البكسلات (تُفك عند أول استخدام فقط)"""
+    path = getattr(source, "path", None)
+    if path:
+        return Image.open(path)
+    data = source.getvalue() if hasattr(source, "getvalue") else source
+    return Image.open(io.BytesIO(data))
+
+
+def estimate_page_bytes(
+    source, is_pdf: bool, scale: float = 1.0, max_dimension: int = None
+) -> list:
+    """
+    حجم كل صفحة/صورة بعد الفك في الذاكرة (RGB) — من الترويسة فقط
+
+    Args:
+        scale: مقياس رسم صفحات PDF
+        max_dimension: البُعد المطلوب للصور (decode_for_target) — None = كامل
+
+    Returns:
+        قائمة بالبايتات لكل صفحة (عنصر واحد للصورة)
+    """
+    if is_pdf:
+        doc = open_pdf(source)
+        sizes = [
+            int(page.rect.width * page.rect.height * scale * scale * 3)
+            for page in doc
+        ]
+        doc.close()
+        return sizes
+
+    from core.image_processor import ImageProcessor
+
+    image = open_image(source)
+    width, height = ImageProcessor.decoded_size(
+        image.size, image.format, max_dimension
+    )
+    bands = len(image.getbands())
+    image.close()
+    return [width * height * max(bands, 3)]
+
+
+class UploadStore:
+    """
+    مخزن ملفات بعنوان المحتوى (sha256) — كل ملف يُكتب مرة واحدة على القرص
+    على شكل أجزاء، وتُفتح ملفات PDF والصور بالمسار في كل إعادة تشغيل
+
+    يتتبع أيضاً الذاكرة المحجوزة لكل جلسة: كل معالجة تحجز تقديراً لذروة
+    الذاكرة قبل البدء وتُرفض إذا تجاوزت حصة الجلسة أو ميزانية العملية
+    """
+
+    def __init__(
+        self,
+        root: str = UPLOAD_STORE_DIR,
+        max_bytes: int = UPLOAD_STORE_MAX_BYTES,
+        session_quota: int = SESSION_MEMORY_QUOTA,
+        process_budget: int = PROCESS_MEMORY_BUDGET,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.session_quota = session_quota
+        self.process_budget = process_budget
+
+        self._uploads = {}  # upload id → StoredFile
+        self._usage = {}  # session id → bytes محجوزة
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+
+    # ═══════════════════════════════════════════════════════
+    # الاستيعاب
+    # ═══════════════════════════════════════════════════════
+
+    @staticmethod
+    def _upload_id(uploaded_file) -> str:
+        file_id = getattr(uploaded_file, "file_id", None)
+        return file_id or f"{uploaded_file.name}-{uploaded_file.size}"
+
+    def ingest(self, uploaded_file) -> StoredFile:
+        """
+        حفظ ملف مرفوع في المخزن (مرة واحدة لكل رفع)
+
+        يُقرأ الملف على أجزاء ويُحسب sha256 أثناء الكتابة — بدون نسخة
+        كاملة إضافية في الذاكرة. المحتوى المكرر يُعاد استخدامه.
+        """
+        upload_id = self._upload_id(uploaded_file)
+        with self._lock:
+            stored = self._uploads.get(upload_id)
+        if stored and stored.exists():
+            return stored
+
+        digest = hashlib.sha256()
+        size = 0
+        uploaded_file.seek(0)
+        with tempfile.NamedTemporaryFile(dir=self.root, delete=False) as tmp:
+            while True:
+                chunk = uploaded_file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+        uploaded_file.seek(0)
+
+        sha256 = digest.hexdigest()
+        ext = os.path.splitext(uploaded_file.name)[1].lower()
+        path = os.path.join(self.root, sha256 + ext)
+
+        if os.path.exists(path):
+            os.unlink(tmp.name)
+            os.utime(path)
+        else:
+            os.replace(tmp.name, path)
+            logger.info(f"Stored upload {uploaded_file.name}: {size} bytes → {path}")
+
+        stored = StoredFile(path, uploaded_file.name, size, sha256, uploaded_file.type)
+        with self._lock:
+            self._uploads[upload_id] = stored
+
+        self._evict(keep=path)
+        return stored
+
+    def _evict(self, keep: str):
+        """حذف أقدم الملفات عند تجاوز الحد الأقصى لحجم المخزن"""
+        entries = []
+        for name in os.listdir(self.root):
+            full = os.path.join(self.root, name)
+            # ملفات المحتوى فقط (<sha256>.ext) — لا الملفات المؤقتة قيد الكتابة
+            if len(name.split(".")[0]) == 64 and os.path.isfile(full):
+                stat = os.stat(full)
+                entries.append((stat.st_mtime, stat.st_size, full))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, full in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if full == keep:
+                continue
+            try:
+                os.unlink(full)
+                total -= size
+                logger.info(f"Evicted stored upload {full}")
+            except OSError as e:
+                logger.warning(f"Evict error ({full}): {e}")
+
+    # ═══════════════════════════════════════════════════════
+    # حصص الذاكرة
+    # ═══════════════════════════════════════════════════════
+
+    def usage(self, session_id: str) -> int:
+        """الذاكرة المحجوزة حالياً للجلسة"""
+        with self._lock:
+            return self._usage.get(session_id, 0)
+
+    @contextmanager
+    def reserve(self, session_id: str, nbytes: int):
+        """
+        حجز ذاكرة للجلسة طوال مدة المعالجة
+
+        Raises:
+            QuotaExceededError: إذا تجاوز الحجز حصة الجلسة أو ميزانية العملية
+        """
+        nbytes = int(nbytes)
+        with self._lock:
+            used = self._usage.get(session_id, 0)
+            total = sum(self._usage.values())
+
+            if used + nbytes > self.session_quota:
+                raise QuotaExceededError(
+                    f"الذاكرة المطلوبة ({nbytes / 2**20:.0f} MB) تتجاوز حصة "
+                    f"الجلسة ({self.session_quota / 2**20:.0f} MB) — "
+                    "جرّب دقة أقل أو ملفاً أصغر"
+                )
+            if total + nbytes > self.process_budget:
+                raise QuotaExceededError(
+                    "الخادم مشغول بمعالجة ملفات كبيرة لمستخدمين آخرين — "
+                    "حاول بعد قليل"
+                )
+            self._usage[session_id] = used + nbytes
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            with self._lock:
+                remaining = self._usage.get(session_id, 0) - nbytes
+                if remaining > 0:
+                    self._usage[session_id] = remaining
+                else:
+                    self._usage.pop(session_id, None)
+            logger.info(
+                f"Released {nbytes / 2**20:.1f} MB for session {session_id[:8]} "
+                f"after {time.time() - start:.1f}s"
+            )
@@ -9,6 +9,7 @@ setup(
         "streamlit>=1.28.0",
         "requests>=2.31.0",
         "Pillow>=10.0.0",
+        "numpy>=1.24.0",
         "pymupdf>=1.23.0",
         "pytesseract>=0.3.10",
     ],
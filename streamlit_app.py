@@ -18,11 +18,10 @@ st.set_page_config(
 # ═══════════════════════════════════════════════════════════
 # تحميل الوحدات بعد set_page_config
 # ═══════════════════════════════════════════════════════════
+# صفحات الواجهة تُستورد عند اختيارها فقط (تحميل كسول) — صفحة تحويل
+# الصور لا تحتاج وحدات OCR، وصفحة OCR لا تحتاج أدوات دمج PDF
 from utils.session import init_session_state
 from ui.sidebar import render_sidebar
-from ui.main_page import render_main_page
-from ui.img_to_pdf_page import render_img_to_pdf_page  # جديد
-from ui.components import render_status_bar
 
 
 def main():
@@ -39,15 +38,28 @@ def main():
         st.subheader("📑 التنقل")
         app_page = st.selectbox(
             "اختر الصفحة",
-            ["🔍 استخراج النص (OCR)", "🖼️ تحويل الصور لـ PDF"],
+            [
+                "🔍 استخراج النص (OCR)",
+                "🔎 البحث في المستندات",
+                "🖼️ تحويل الصور لـ PDF",
+            ],
             key="navigation_selector"
         )
     
     # 4. عرض الصفحة المختارة
     if app_page == "🔍 استخراج النص (OCR)":
+        from ui.components import render_status_bar
+        from ui.main_page import render_main_page
+
         render_status_bar()
         render_main_page()
+    elif app_page == "🔎 البحث في المستندات":
+        from ui.search_page import render_search_page
+
+        render_search_page()
     else:
+        from ui.img_to_pdf_page import render_img_to_pdf_page
+
         render_img_to_pdf_page()
 
     # 5. التذييل
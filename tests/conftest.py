@@ -0,0 +1,83 @@
+"""
+إعداد الاختبارات — جذر المشروع في المسار ومحرك OCR وهمي
+Test setup: project root on sys.path and a fake OCR engine
+"""
+
+import io
+import os
+import sys
+
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.engines import ENGINE_REGISTRY, OCREngine  # noqa: E402
+
+
+class FakeEngine(OCREngine):
+    """محرك بلا Tesseract — النص هو مستوى الرمادي في مركز الصورة"""
+
+    name = "fake"
+    supports_confidence = True
+
+    def recognize(self, image, psm=None):
+        center = (image.size[0] // 2, image.size[1] // 2)
+        return {
+            "text": str(image.convert("L").getpixel(center)),
+            "engine": self.name,
+            "avg_confidence": 90.0,
+            "words": [],
+        }
+
+
+@pytest.fixture
+def fake_engine():
+    ENGINE_REGISTRY[FakeEngine.name] = FakeEngine
+    yield FakeEngine
+    ENGINE_REGISTRY.pop(FakeEngine.name, None)
+
+
+@pytest.fixture
+def settings():
+    """لقطة إعدادات كما تُنتجها utils.session.get_ocr_settings"""
+    return {
+        "engine": "fake",
+        "lang": "eng",
+        "psm": 3,
+        "show_confidence": False,
+        "adaptive_cascade": False,
+        "auto_language": False,
+        "table_mode": False,
+        "tiled_ocr": False,
+        "hf_model": "",
+        "hf_token": "",
+        "enable_enhancement": False,
+        "contrast": 1.0,
+        "brightness": 1.0,
+        "sharpness": 1.0,
+        "grayscale": True,
+        "denoise": False,
+        "binarize": False,
+        "auto_crop": False,
+        "blank_page": None,
+        "duplicate_match": None,
+        "roi_regions": [],
+    }
+
+
+def text_page(level: int, size=(600, 800)) -> Image.Image:
+    """صفحة بأسطر داكنة بمستوى رمادي محدد ومربع في المركز"""
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(100, size[1] - 100, 40):
+        draw.rectangle((60, y, size[0] - 60, y + 15), fill=(level,) * 3)
+    cx, cy = size[0] // 2, size[1] // 2
+    draw.rectangle((cx - 50, cy - 20, cx + 50, cy + 20), fill=(level,) * 3)
+    return image
+
+
+def png_bytes(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
@@ -0,0 +1,21 @@
+"""اختبارات الضبط التلقائي — كل دقة تُرسم مرة واحدة"""
+
+from config import PDF_DPI_OPTIONS
+from core.autotune import AutoTuner
+
+from conftest import text_page
+
+
+def test_each_dpi_is_rendered_once(fake_engine, settings):
+    rendered = []
+
+    def render(dpi_label):
+        rendered.append(dpi_label)
+        return [(1, text_page(40, size=(200, 300)))]
+
+    profile = AutoTuner(settings).tune(render)
+
+    labels = [label for label, scale in PDF_DPI_OPTIONS.items() if scale]
+    assert rendered == labels
+    assert profile["pdf_dpi"] in labels
+    assert profile["trials"]
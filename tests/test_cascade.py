@@ -0,0 +1,62 @@
+"""اختبارات سلسلة إعادة المحاولة حسب الثقة"""
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from core.cascade import ConfidenceCascade
+from core.engines import ENGINE_REGISTRY, OCREngine
+
+PAGE_SIZE = (3000, 4000)
+WORD_BOX = (1000, 1200, 1600, 1300)  # x0, y0, x1, y1
+
+
+class InkBoxEngine(OCREngine):
+    """كلمة واحدة عند مستطيل الحبر — ثقة عالية فقط للصورة المكبّرة"""
+
+    name = "inkbox"
+    supports_confidence = True
+    supports_boxes = True
+
+    def recognize(self, image, psm=None):
+        ink = np.asarray(image.convert("L")) < 128
+        ys, xs = np.nonzero(ink)
+        confidence = 90.0 if image.size[1] > PAGE_SIZE[1] else 50.0
+        word = {
+            "text": "word",
+            "x": int(xs.min()),
+            "y": int(ys.min()),
+            "w": int(xs.max() - xs.min() + 1),
+            "h": int(ys.max() - ys.min() + 1),
+            "confidence": confidence,
+            "block": 1,
+            "line": 1,
+        }
+        result = {"text": "word", "avg_confidence": confidence, "words": [word]}
+        return self.attach_boxes(result, image.size)
+
+
+@pytest.fixture
+def inkbox_engine():
+    ENGINE_REGISTRY[InkBoxEngine.name] = InkBoxEngine
+    yield
+    ENGINE_REGISTRY.pop(InkBoxEngine.name, None)
+
+
+def test_upscale_boxes_map_back_to_page_space(inkbox_engine, settings):
+    page = Image.new("RGB", PAGE_SIZE, "white")
+    ImageDraw.Draw(page).rectangle(WORD_BOX, fill="black")
+    cascade = ConfidenceCascade(
+        dict(settings, engine="inkbox", enable_enhancement=True), budget_factor=100
+    )
+
+    result = cascade.process_page(page)
+
+    assert result["cascade"] == ["upscale"]
+    word = result["words"][0]
+    x0, y0, x1, y1 = WORD_BOX
+    # smart_resize يقلّص الصورة المكبّرة إلى 4096 — الموقع يبقى صحيحاً
+    assert abs(word["x"] - x0) <= 3 and abs(word["y"] - y0) <= 3
+    assert abs(word["w"] - (x1 - x0 + 1)) <= 4
+    assert abs(word["h"] - (y1 - y0 + 1)) <= 4
+    assert result["image_size"] == list(PAGE_SIZE)
@@ -0,0 +1,118 @@
+"""اختبارات كشف الصفحات المكررة — البصمة، المطالبات، فهرس الجلسة"""
+
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from config import DUPLICATE_PAGE_THRESHOLDS
+from core.dedup import DuplicateFilter, PageHashIndex, page_fingerprint, settings_key
+
+from conftest import text_page
+
+STRICT = DUPLICATE_PAGE_THRESHOLDS["صارم (نسخ متطابقة)"]
+LENIENT = DUPLICATE_PAGE_THRESHOLDS["مرن (نسخ معاد ضغطها)"]
+
+
+@pytest.fixture
+def dedup_settings(settings):
+    return dict(settings, duplicate_match=STRICT)
+
+
+def _filled(image: Image.Image) -> Image.Image:
+    """نفس النموذج بتعبئة مختلفة — حقل واحد فقط"""
+    image = image.copy()
+    ImageDraw.Draw(image).rectangle((80, 620, 240, 650), fill="black")
+    return image
+
+
+def _jpeg(image: Image.Image, quality: int = 60) -> Image.Image:
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+
+def test_copy_in_the_same_batch_waits_for_the_claim(dedup_settings):
+    duplicates = DuplicateFilter(PageHashIndex(), dedup_settings, document="doc.pdf")
+
+    reuse, claim = duplicates.check(1, text_page(40))
+    assert reuse is None and claim is not None
+
+    reuse, none = duplicates.check(2, text_page(40))
+    assert none is None
+    # الأصل ما زال قيد OCR عند رسم النسخة — النتيجة تُقرأ عند الاستخدام
+    duplicates.resolve(claim, {"text": "original"})
+
+    assert reuse() == {"text": "original", "reused_from": "doc.pdf · ص 1"}
+
+
+def test_session_index_is_shared_across_batches(dedup_settings):
+    index = PageHashIndex()
+    first = DuplicateFilter(index, dedup_settings, file_names=["a.pdf"])
+    _, claim = first.check((0, 3), text_page(40))
+    first.resolve(claim, {"text": "original"})
+
+    second = DuplicateFilter(index, dedup_settings, document="b.pdf")
+    reuse, claim = second.check(1, text_page(40))
+
+    assert claim is None
+    assert reuse()["reused_from"] == "a.pdf · ص 3"
+    assert len(index) == 1
+
+
+def test_other_settings_do_not_reuse(dedup_settings):
+    index = PageHashIndex()
+    first = DuplicateFilter(index, dedup_settings)
+    _, claim = first.check(1, text_page(40))
+    first.resolve(claim, {"text": "original"})
+
+    reuse, _ = DuplicateFilter(index, dict(dedup_settings, psm=6)).check(1, text_page(40))
+    assert reuse is None
+
+
+def test_settings_key_ignores_settings_that_do_not_change_ocr(dedup_settings):
+    assert settings_key(dedup_settings) == settings_key(
+        dict(dedup_settings, hf_token="secret", duplicate_match=LENIENT, blank_page=None)
+    )
+    assert settings_key(dedup_settings) != settings_key(dict(dedup_settings, lang="ara"))
+
+
+@pytest.mark.parametrize("result", [{"error": "boom"}, {"text": "part", "timed_out": True}])
+def test_failed_pages_are_not_indexed(dedup_settings, result):
+    index = PageHashIndex()
+    duplicates = DuplicateFilter(index, dedup_settings)
+    _, claim = duplicates.check(1, text_page(40))
+    duplicates.resolve(claim, result)
+
+    assert len(index) == 0
+
+
+def test_differently_filled_form_is_not_a_duplicate(dedup_settings):
+    duplicates = DuplicateFilter(PageHashIndex(), dedup_settings)
+    duplicates.check(1, text_page(40))
+
+    reuse, claim = duplicates.check(2, _filled(text_page(40)))
+    assert reuse is None and claim is not None
+
+
+def test_lenient_matches_recompressed_copy():
+    original = page_fingerprint(text_page(40))
+    recompressed = page_fingerprint(_jpeg(text_page(40)))
+    filled = page_fingerprint(_filled(text_page(40)))
+
+    index = PageHashIndex()
+    index.add(original, "key", "a.pdf · ص 1", {"text": "original"})
+
+    assert index.find(recompressed, "key", LENIENT) == ("a.pdf · ص 1", {"text": "original"})
+    assert index.find(filled, "key", LENIENT) == (None, None)
+    assert index.find(recompressed, "other", LENIENT) == (None, None)
+
+
+def test_index_drops_the_oldest_pages():
+    index = PageHashIndex(max_pages=2)
+    for level in (10, 80, 160):
+        index.add(page_fingerprint(text_page(level)), "key", str(level), {})
+
+    assert len(index) == 2
+    assert index.find(page_fingerprint(text_page(10)), "key", STRICT) == (None, None)
+    assert index.find(page_fingerprint(text_page(160)), "key", STRICT)[0] == "160"
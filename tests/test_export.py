@@ -0,0 +1,77 @@
+"""اختبارات التصدير — ZIP لكل مستند وأسماء أوراق XLSX"""
+
+import io
+import zipfile
+
+from core.batch_queue import BatchQueue
+from utils.export import _sheet_names, export_as_zip, get_table_export_data
+
+from conftest import png_bytes, text_page
+
+
+def _names(data: bytes) -> list:
+    return zipfile.ZipFile(io.BytesIO(data)).namelist()
+
+
+def test_zip_keeps_same_named_files_apart():
+    results = [
+        {"file": "a.pdf", "file_index": 0, "page": 1, "text": "first"},
+        {"file": "a.pdf", "file_index": 1, "page": 1, "text": "second"},
+    ]
+    data = export_as_zip(results, "TXT")
+
+    assert _names(data) == ["a.pdf.txt", "a.pdf (2).txt"]
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.read("a.pdf.txt").decode() == "first"
+    assert archive.read("a.pdf (2).txt").decode() == "second"
+
+
+def test_zip_entries_keep_the_document_extension():
+    results = [
+        {"file": "a.pdf", "file_index": 0, "page": 1, "text": "x"},
+        {"file": "a.png", "file_index": 1, "page": 1, "text": "y"},
+    ]
+    assert _names(export_as_zip(results, "JSON")) == ["a.pdf.json", "a.png.json"]
+
+
+def test_zip_groups_pages_of_one_file():
+    results = [
+        {"file": "a.pdf", "file_index": 0, "page": 1, "text": "p1"},
+        {"file": "a.pdf", "file_index": 0, "page": 2, "text": "p2"},
+    ]
+    assert _names(export_as_zip(results, "TXT")) == ["a.pdf.txt"]
+
+
+def test_batch_queue_separates_same_named_uploads(fake_engine, settings):
+    queue = BatchQueue()
+    assert queue.add_file("a.png", png_bytes(text_page(10)), False)
+    assert queue.add_file("a.png", png_bytes(text_page(120)), False)
+    assert not queue.add_file("b.png", png_bytes(text_page(10)), False)
+
+    results = queue.run(settings)
+
+    assert [(r["file"], r["file_index"], r["text"]) for r in results] == [
+        ("a.png", 0, "10"),
+        ("a.png", 1, "120"),
+        ("b.png", 2, "10"),
+    ]
+    assert len(_names(export_as_zip(results, "TXT"))) == 3
+
+
+def test_sheet_names_are_valid_and_unique():
+    long = "report/2024:[draft]*?.pdf p1 with a very long suffix"
+    names = _sheet_names([long, long, "Sheet", "sheet", ""])
+
+    assert all(len(n) <= 31 for n in names)
+    assert not any(c in n for n in names for c in "[]:*?/\\")
+    assert len({n.lower() for n in names}) == len(names)
+
+
+def test_table_export_keeps_tables_with_the_same_label():
+    results = [
+        {"file": "x.pdf", "page": 1, "table": [["1"]]},
+        {"file": "x.pdf", "page": 1, "table": [["2"]]},
+    ]
+    data, _, _ = get_table_export_data(results, "XLSX")
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert "xl/worksheets/sheet2.xml" in archive.namelist()
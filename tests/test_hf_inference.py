@@ -0,0 +1,76 @@
+"""اختبارات مهلة صفحة HF Inference — الفشل العادي لا يُعدّ تجاوزاً للمهلة"""
+
+import time
+
+import pytest
+import requests
+
+import core.ocr_engine as ocr_engine
+from core.ocr_engine import HFInferenceOCR
+
+MODEL = next(iter(ocr_engine.HF_OCR_MODELS))
+
+
+class _Response:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.text = "server error"
+
+    def json(self):
+        return [{"generated_text": "ok"}]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """requests.post وهمي: كل طلب يستغرق latency ثم يرد بـ status"""
+    calls = []
+
+    def configure(status: int, latency: float = 0.0, retries: int = 2, delay: float = 0.1):
+        monkeypatch.setattr(ocr_engine, "API_MAX_RETRIES", retries)
+        monkeypatch.setattr(ocr_engine, "API_RETRY_BASE_DELAY", delay)
+
+        def post(url, headers=None, data=None, timeout=None):
+            calls.append(timeout)
+            if latency > timeout:
+                time.sleep(timeout)
+                raise requests.exceptions.Timeout()
+            time.sleep(latency)
+            return _Response(status)
+
+        monkeypatch.setattr(requests, "post", post)
+        return calls
+
+    return configure
+
+
+def test_server_errors_near_deadline_are_not_timeouts(server):
+    server(500, latency=0.15, retries=2, delay=0.1)
+
+    # المحاولتان تنتهيان قرب المهلة (~0.4 من 0.45) — فشل عادي
+    result = HFInferenceOCR.extract_text(b"img", MODEL, "token", timeout=0.45)
+
+    assert "error" in result
+    assert not result.get("timed_out")
+
+
+def test_backoff_past_deadline_is_a_timeout(server):
+    server(503, retries=3, delay=0.3)
+
+    result = HFInferenceOCR.extract_text(b"img", MODEL, "token", timeout=0.2)
+
+    assert result.get("timed_out")
+
+
+def test_request_cut_short_by_deadline_is_a_timeout(server):
+    calls = server(200, latency=1.0, retries=1)
+
+    result = HFInferenceOCR.extract_text(b"img", MODEL, "token", timeout=0.2)
+
+    assert result.get("timed_out")
+    assert calls[0] <= 0.2
+
+
+def test_success(server):
+    server(200)
+    result = HFInferenceOCR.extract_text(b"img", MODEL, "token", timeout=5)
+    assert result["text"] == "ok"
@@ -0,0 +1,42 @@
+"""اختبارات رسم صفحات PDF ومناطق الاهتمام"""
+
+import inspect
+
+import fitz
+import pytest
+
+from core.pdf_handler import PDFHandler
+
+REGIONS = [
+    {"name": "رأس", "x0": 0.0, "y0": 0.0, "x1": 1.0, "y1": 0.25, "psm": None},
+    {"name": "ذيل", "x0": 0.5, "y0": 0.5, "x1": 1.0, "y1": 1.0, "psm": None},
+]
+
+
+def _pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page(width=200, height=400).insert_text((20, 40), f"page {i + 1}")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_render_regions_streams_pages():
+    pages = PDFHandler.render_regions(_pdf(3), REGIONS, scale=2.0)
+    assert inspect.isgenerator(pages)
+
+    page_num, crops = next(pages)
+    assert page_num == 1
+    assert [img.size for _, img in crops] == [(400, 200), (200, 400)]
+    assert [n for n, _ in pages] == [2, 3]
+
+
+def test_render_regions_selected_pages():
+    pages = PDFHandler.render_regions(_pdf(4), REGIONS, page_numbers=[2, 4], scale=1.0)
+    assert [n for n, _ in pages] == [2, 4]
+
+
+def test_render_regions_raises_on_invalid_pdf():
+    with pytest.raises(Exception):
+        list(PDFHandler.render_regions(b"not a pdf", REGIONS))
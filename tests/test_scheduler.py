@@ -0,0 +1,101 @@
+"""اختبارات مجدول OCR المشترك — الرفض، الإلغاء، التناوب، عدّ الصفحات"""
+
+import threading
+
+import pytest
+
+from core.engines import get_engine
+from core.scheduler import JobCancelledError, OCRScheduler, SchedulerBusyError
+
+
+def _block(scheduler, job, engine="fake"):
+    """إشغال العامل الوحيد حتى يُفتح الباب"""
+    gate = threading.Event()
+    started = threading.Event()
+
+    def wait(_):
+        started.set()
+        gate.wait(5)
+
+    future = job.submit(engine, wait, None)
+    assert started.wait(5)
+    return gate, future
+
+
+def test_rejected_job_does_not_leak():
+    scheduler = OCRScheduler(pool_sizes={"fake": 1}, max_batch_jobs=1, max_waiting=0)
+
+    with scheduler.job("a", "batch", pages=3):
+        with pytest.raises(SchedulerBusyError):
+            with scheduler.job("b", "batch", pages=3):
+                pass
+
+        assert [j.session_id for j in scheduler._jobs] == ["a"]
+        assert scheduler.cancel_session("b") == 0
+
+    assert not scheduler._jobs
+
+
+def test_cancel_drops_queued_work():
+    scheduler = OCRScheduler(pool_sizes={"fake": 1})
+
+    with scheduler.job("a", "batch", pages=3) as job:
+        gate, running = _block(scheduler, job)
+        queued = [job.submit("fake", lambda x: x, i) for i in range(3)]
+
+        assert scheduler.cancel_session("a") == 1
+        assert all(f.cancelled() for f in queued)
+        with pytest.raises(JobCancelledError):
+            job.check()
+        gate.set()
+        running.result(5)
+
+
+def test_sessions_share_workers_round_robin():
+    scheduler = OCRScheduler(pool_sizes={"fake": 1}, max_batch_jobs=2)
+    order = []
+
+    with scheduler.job("a", "batch", pages=3) as job_a, \
+            scheduler.job("b", "batch", pages=3) as job_b:
+        gate, _ = _block(scheduler, job_a)
+        futures = [job_a.submit("fake", order.append, f"a{i}") for i in range(3)]
+        futures += [job_b.submit("fake", order.append, f"b{i}") for i in range(3)]
+        gate.set()
+        for future in futures:
+            future.result(5)
+
+    assert order == ["a0", "b0", "a1", "b1", "a2", "b2"]
+
+
+def test_interactive_work_runs_before_batches():
+    scheduler = OCRScheduler(pool_sizes={"fake": 1})
+    order = []
+
+    with scheduler.job("a", "batch", pages=2) as batch:
+        gate, _ = _block(scheduler, batch)
+        futures = [batch.submit("fake", order.append, f"batch{i}") for i in range(2)]
+        with scheduler.job("b", "interactive") as interactive:
+            futures.append(interactive.submit("fake", order.append, "interactive"))
+            gate.set()
+            for future in futures:
+                future.result(5)
+
+    assert order[0] == "interactive"
+
+
+def test_done_counts_pages_not_sub_page_tasks(fake_engine, settings):
+    scheduler = OCRScheduler(pool_sizes={"fake": 2})
+    engine = get_engine("fake", settings)
+
+    with scheduler.job("a", "batch", pages=2) as job:
+        # أجزاء صفحة واحدة (خلايا/أجزاء) — لا تُنقص المتبقي
+        list(engine.map_pages(lambda x: {"text": x}, [(i, i) for i in range(6)],
+                              count_pages=False))
+        assert job.done == 0
+        assert job.remaining == 2
+
+        list(engine.map_pages(lambda x: {"text": x}, [(1, "p1"), (2, "p2")]))
+        assert job.done == 2
+        assert job.remaining == 0
+        assert job.tasks == 8
+        assert job.tasks_per_page == 4
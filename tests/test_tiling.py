@@ -0,0 +1,87 @@
+"""اختبارات OCR المقسّم — تغطية الأجزاء ودمج الكلمات في التداخل"""
+
+from config import TILE_OVERLAP, TILE_SIZE, TILE_TRIGGER_DIMENSION
+from core.tiling import TiledOCR
+
+SIZE = (TILE_SIZE * 2 - TILE_OVERLAP, 1000)
+LEFT = (0, 0, TILE_SIZE, 1000)
+RIGHT = (TILE_SIZE - TILE_OVERLAP, 0, SIZE[0], 1000)
+
+
+def _word(text, x, y, w=100, h=30, confidence=90.0):
+    return {"text": text, "x": x, "y": y, "w": w, "h": h,
+            "confidence": confidence, "block": 1, "line": 1}
+
+
+def _tile(box, words):
+    """كلمات بمواقع الصورة الكاملة → نتيجة جزء بمواقع الجزء"""
+    x0, y0 = box[:2]
+    return box, {
+        "text": " ".join(w["text"] for w in words),
+        "engine": "fake",
+        "words": [dict(w, x=w["x"] - x0, y=w["y"] - y0) for w in words],
+    }
+
+
+def test_tile_boxes_cover_the_image_with_overlap():
+    width, height = TILE_TRIGGER_DIMENSION + 1000, TILE_TRIGGER_DIMENSION // 2
+    boxes = TiledOCR.tile_boxes((width, height))
+
+    assert len(boxes) > 1
+    assert max(b[2] for b in boxes) == width
+    assert max(b[3] for b in boxes) == height
+    assert all(b[2] - b[0] <= TILE_SIZE and b[3] - b[1] <= TILE_SIZE for b in boxes)
+    starts = sorted({b[0] for b in boxes})
+    assert all(b - a <= TILE_SIZE - TILE_OVERLAP for a, b in zip(starts, starts[1:]))
+
+
+def test_small_image_is_one_tile():
+    assert TiledOCR.tile_boxes((800, 600)) == [(0, 0, 800, 600)]
+
+
+def test_overlap_word_is_kept_once_from_the_nearest_tile():
+    shared = _word("shared", TILE_SIZE - TILE_OVERLAP + 20, 100)
+    left = _word("left", 100, 100)
+    right = _word("right", SIZE[0] - 200, 100)
+    # الجزء الأيمن يرى الكلمة المشتركة مقطوعة عند حافته
+    cut = dict(shared, text="sha", w=40)
+
+    result = TiledOCR.merge(SIZE, [
+        _tile(LEFT, [left, shared]),
+        _tile(RIGHT, [cut, right]),
+    ])
+
+    assert result["text"] == "left shared right"
+    assert result["word_count"] == 3
+    assert [w["x"] for w in result["words"]] == [left["x"], shared["x"], right["x"]]
+    assert result["tiles"] == 2
+    assert result["image_size"] == list(SIZE)
+
+
+def test_words_are_grouped_into_lines_across_tiles():
+    result = TiledOCR.merge(SIZE, [
+        _tile(LEFT, [_word("a", 100, 100), _word("c", 100, 300)]),
+        _tile(RIGHT, [_word("b", SIZE[0] - 200, 105), _word("d", SIZE[0] - 200, 300)]),
+    ])
+
+    assert result["text"] == "a b\nc d"
+    assert [w["line"] for w in result["words"]] == [1, 1, 2, 2]
+
+
+def test_rtl_line_reads_right_to_left():
+    result = TiledOCR.merge(SIZE, [
+        _tile(LEFT, [_word("ثانية", 100, 100)]),
+        _tile(RIGHT, [_word("أولى", SIZE[0] - 200, 100)]),
+    ])
+
+    assert result["text"] == "أولى ثانية"
+
+
+def test_failed_tile_keeps_the_others():
+    result = TiledOCR.merge(SIZE, [
+        _tile(LEFT, [_word("left", 100, 100)]),
+        (RIGHT, {"error": "boom"}),
+    ])
+
+    assert result["text"] == "left"
+    assert "error" not in result
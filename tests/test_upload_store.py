@@ -0,0 +1,79 @@
+"""اختبارات مخزن الرفع — الاستيعاب بعنوان المحتوى وحصص الذاكرة"""
+
+import io
+
+import pytest
+
+from core.upload_store import QuotaExceededError, UploadStore, estimate_page_bytes
+
+from conftest import png_bytes, text_page
+
+MB = 2**20
+
+
+class _Upload(io.BytesIO):
+    """ملف مرفوع كما يقدّمه st.file_uploader"""
+
+    def __init__(self, name: str, data: bytes, file_id: str):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.type = "image/png"
+        self.file_id = file_id
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(
+        root=str(tmp_path), max_bytes=10 * MB,
+        session_quota=100 * MB, process_budget=150 * MB,
+    )
+
+
+def test_reserve_releases_on_exit(store):
+    with store.reserve("a", 60 * MB):
+        with store.reserve("a", 30 * MB):
+            assert store.usage("a") == 90 * MB
+        assert store.usage("a") == 60 * MB
+    assert store.usage("a") == 0
+
+
+def test_reserve_releases_on_error(store):
+    with pytest.raises(ValueError):
+        with store.reserve("a", 60 * MB):
+            raise ValueError("boom")
+    assert store.usage("a") == 0
+
+
+def test_session_quota(store):
+    with store.reserve("a", 60 * MB):
+        with pytest.raises(QuotaExceededError, match="حصة"):
+            with store.reserve("a", 50 * MB):
+                pass
+        assert store.usage("a") == 60 * MB
+
+
+def test_process_budget_is_shared_between_sessions(store):
+    with store.reserve("a", 90 * MB):
+        with pytest.raises(QuotaExceededError, match="مشغول"):
+            with store.reserve("b", 90 * MB):
+                pass
+        assert store.usage("b") == 0
+        with store.reserve("b", 60 * MB):
+            assert store.usage("b") == 60 * MB
+
+
+def test_same_content_is_stored_once(store, tmp_path):
+    data = png_bytes(text_page(40))
+    first = store.ingest(_Upload("a.png", data, "1"))
+    second = store.ingest(_Upload("copy.png", data, "2"))
+
+    assert first.path == second.path
+    assert second.name == "copy.png"
+    assert second.getvalue() == data
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_estimate_image_bytes_from_header(store):
+    stored = store.ingest(_Upload("a.png", png_bytes(text_page(40, size=(300, 200))), "1"))
+    assert estimate_page_bytes(stored, is_pdf=False) == [300 * 200 * 3]
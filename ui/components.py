@@ -5,20 +5,49 @@ Shared UI components
 
 import streamlit as st
 
+from config import THUMBNAIL_MAX_SIZE, THUMBNAIL_CACHE_ENTRIES
+
+
+@st.cache_resource
+def get_model_status_service():
+    """خدمة حالة نماذج HF — نسخة واحدة مشتركة لكل العملية"""
+    from core.model_status import ModelStatusService
+
+    return ModelStatusService()
+
+
+@st.cache_resource
+def get_scheduler():
+    """مجدول OCR — يملك عمّال المحركات ويتقاسمهم بين كل الجلسات"""
+    from core.scheduler import OCRScheduler
+
+    return OCRScheduler()
+
+
+@st.cache_resource
+def get_upload_store():
+    """مخزن الملفات المرفوعة — نسخة واحدة مشتركة لكل العملية"""
+    from core.upload_store import UploadStore
+
+    return UploadStore()
+
 
 def render_status_bar():
     """عرض شريط حالة النظام في أعلى الصفحة"""
     from core.ocr_engine import TesseractOCR
+    from utils.session import get_engine_name
+
+    is_tesseract = get_engine_name() == "tesseract"
 
     col1, col2, col3 = st.columns(3)
 
     with col1:
         method = st.session_state.ocr_method
-        icon = "🖥️" if "Tesseract" in method else "☁️"
+        icon = "🖥️" if is_tesseract else "☁️"
         st.info(f"**المحرك:** {icon} {method}")
 
     with col2:
-        if "Tesseract" in st.session_state.ocr_method:
+        if is_tesseract:
             if TesseractOCR.is_available():
                 st.success("🟢 Tesseract جاهز")
             else:
@@ -40,7 +69,9 @@ def render_status_bar():
         st.info(f"**اللغة:** {lang}")
 
 
-def render_result_card(page_num: int, text: str, confidence: float = None):
+def render_result_card(
+    page_num: int, text: str, confidence: float = None, table: list = None
+):
     """عرض بطاقة نتيجة واحدة"""
     with st.container():
         header = f"📄 الصفحة {page_num}"
@@ -55,7 +86,9 @@ def render_result_card(page_num: int, text: str, confidence: float = None):
 
         st.markdown(f"**{header}**")
 
-        if text:
+        if table:
+            st.dataframe(table, use_container_width=True)
+        elif text:
             word_count = len(text.split())
             st.caption(f"📊 {word_count} كلمة  |  {len(text)} حرف")
             st.text_area(
@@ -71,8 +104,14 @@ def render_result_card(page_num: int, text: str, confidence: float = None):
         st.markdown("---")
 
 
-def render_export_section(results: list):
-    """عرض قسم التصدير"""
+def render_export_section(results: list, source_file=None):
+    """
+    عرض قسم التصدير
+
+    Args:
+        results: نتائج الاستخراج
+        source_file: الملف المرفوع الأصلي (لإنشاء PDF قابل للبحث)
+    """
     from utils.export import get_export_data
     from config import EXPORT_FORMATS
 
@@ -103,6 +142,80 @@ def render_export_section(results: list):
             type="primary",
         )
 
+    # الجداول المستخرجة (وضع الجداول)
+    if any(r.get("table") for r in results):
+        from utils.export import get_table_export_data
+        from config import TABLE_EXPORT_FORMATS
+
+        table_col1, table_col2 = st.columns([1, 2])
+        with table_col1:
+            table_format = st.selectbox(
+                "صيغة الجداول",
+                options=TABLE_EXPORT_FORMATS,
+                key="table_export_format_select",
+            )
+        with table_col2:
+            data, filename, mime = get_table_export_data(results, table_format)
+            st.download_button(
+                label=f"📊 تحميل الجداول ({table_format})",
+                data=data,
+                file_name=filename,
+                mime=mime,
+                use_container_width=True,
+            )
+
+    # PDF قابل للبحث: الملف الأصلي مع طبقة نص غير مرئية من مواقع الكلمات
+    if source_file is not None and any(r.get("boxes") for r in results):
+        _render_searchable_pdf_export(source_file, results)
+
+    # دفعة متعددة الملفات: ملف تصدير لكل مستند داخل ZIP
+    if len({(r.get("file_index"), r["file"]) for r in results if r.get("file")}) > 1:
+        from utils.export import export_as_zip
+
+        st.download_button(
+            label=f"📦 تحميل ZIP (ملف {export_format} لكل مستند)",
+            data=export_as_zip(results, export_format),
+            file_name="extracted_texts.zip",
+            mime="application/zip",
+            use_container_width=True,
+        )
+
+
+def _render_searchable_pdf_export(source_file, results: list):
+    """إنشاء PDF قابل للبحث عند الطلب ثم عرض زر التحميل"""
+    from core.searchable_pdf import SearchablePDF
+
+    # التوقيع يتغيّر مع الملف أو الصفحات المعالجة ← إعادة الإنشاء مطلوبة
+    signature = (
+        file_cache_key(source_file),
+        tuple((r["page"], len(r.get("boxes") or [])) for r in results),
+    )
+    cached = st.session_state.searchable_pdf
+
+    if cached and cached[0] == signature:
+        base_name = source_file.name.rsplit(".", 1)[0]
+        st.download_button(
+            label="🔎 تحميل PDF قابل للبحث",
+            data=cached[1],
+            file_name=f"{base_name}_searchable.pdf",
+            mime="application/pdf",
+            use_container_width=True,
+        )
+        return
+
+    if st.button("🔎 إنشاء PDF قابل للبحث", use_container_width=True):
+        with st.spinner("جاري إضافة طبقة النص..."):
+            if source_file.type == "application/pdf":
+                data = SearchablePDF.from_pdf(source_file, results)
+            else:
+                data = SearchablePDF.from_image(source_file.getvalue(), results[0])
+
+        if data:
+            st.session_state.searchable_pdf = (signature, data)
+            st.rerun()
+        else:
+            st.error("❌ فشل إنشاء PDF قابل للبحث")
+
 
 def render_processing_stats(results: list):
     """عرض إحصائيات المعالجة"""
@@ -131,3 +244,97 @@ def render_processing_stats(results: list):
     if avg_confidence and len(cols) > 3:
         with cols[3]:
             st.metric("🎯 متوسط الثقة", f"{avg_confidence}%")
+
+    blank = sum(1 for r in results if r.get("blank"))
+    if blank:
+        st.caption(f"📭 {blank} صفحة فارغة تم تخطيها بدون OCR")
+
+    reused = sum(1 for r in results if r.get("reused_from"))
+    if reused:
+        st.caption(f"♻️ {reused} صفحة مكررة أُعيد استخدام نتيجة أصلها")
+
+    timed_out = sum(1 for r in results if r.get("timed_out"))
+    if timed_out:
+        st.caption(f"⏰ {timed_out} صفحة تجاوزت المهلة المحددة")
+
+
+def render_pipeline_stats(report: list):
+    """
+    استغلال مراحل خط المعالجة (رسم ← تحسين ← OCR) لآخر دفعة
+
+    المرحلة الأعلى استغلالاً هي التي تحدد السرعة
+    """
+    if not report:
+        return
+
+    bottleneck = max(report, key=lambda r: r["utilization"])
+    with st.expander(
+        f"⏱️ مراحل المعالجة — الأبطأ: {bottleneck['stage']} "
+        f"({bottleneck['utilization']}%)"
+    ):
+        st.dataframe(
+            [
+                {
+                    "المرحلة": r["stage"],
+                    "العمّال": r["workers"],
+                    "الصفحات": r["items"],
+                    "الاستغلال %": r["utilization"],
+                    "زمن العمل (ث)": r["busy"],
+                    "انتظار طابور ممتلئ (ث)": r["blocked"],
+                }
+                for r in report
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
+def file_cache_key(uploaded_file) -> str:
+    """مفتاح ثابت للملف المرفوع — يتجنّب تجزئة محتواه الكامل في كل إعادة تشغيل"""
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id:
+        return file_id
+    return f"{uploaded_file.name}-{uploaded_file.size}"
+
+
+@st.cache_data(show_spinner=False, max_entries=THUMBNAIL_CACHE_ENTRIES)
+def _image_thumbnail(file_key: str, _uploaded_file, max_size: int) -> bytes:
+    """صورة مصغّرة مخزّنة مؤقتاً لملف صورة"""
+    from core.thumbnail import ThumbnailGenerator
+
+    return ThumbnailGenerator.from_image_bytes(_uploaded_file, max_size)
+
+
+@st.cache_data(show_spinner=False, max_entries=THUMBNAIL_CACHE_ENTRIES)
+def _pdf_page_thumbnail(
+    file_key: str, _uploaded_file, page_num: int, max_size: int
+) -> bytes:
+    """صورة مصغّرة مخزّنة مؤقتاً لصفحة PDF"""
+    from core.thumbnail import ThumbnailGenerator
+
+    return ThumbnailGenerator.from_pdf_page(_uploaded_file, page_num, max_size)
+
+
+def render_image_thumbnail(
+    uploaded_file, caption: str = None, max_size: int = THUMBNAIL_MAX_SIZE
+):
+    """عرض صورة مصغّرة لملف صورة مرفوع بدل الصورة الكاملة"""
+    thumb = _image_thumbnail(file_cache_key(uploaded_file), uploaded_file, max_size)
+    if thumb:
+        st.image(thumb, use_container_width=True, caption=caption)
+    else:
+        st.warning("تعذّر إنشاء المعاينة")
+
+
+def render_pdf_page_thumbnail(
+    uploaded_file, page_num: int, caption: str = None,
+    max_size: int = THUMBNAIL_MAX_SIZE,
+):
+    """عرض صورة مصغّرة لصفحة PDF"""
+    thumb = _pdf_page_thumbnail(
+        file_cache_key(uploaded_file), uploaded_file, page_num, max_size
+    )
+    if thumb:
+        st.image(thumb, use_container_width=True, caption=caption)
+    else:
+        st.warning("تعذّر إنشاء المعاينة")
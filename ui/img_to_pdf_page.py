@@ -4,9 +4,39 @@ Image to PDF conversion page
 """
 
 import streamlit as st
-from PIL import Image
+from core.image_processor import ImageProcessor
 from core.pdf_handler import PDFHandler
-from config import SUPPORTED_IMAGE_TYPES
+from core.upload_store import open_image
+from ui.components import render_image_thumbnail, file_cache_key
+from config import (
+    SUPPORTED_IMAGE_TYPES,
+    PDF_OUTPUT_PROFILES,
+    DEFAULT_PDF_OUTPUT_PROFILE,
+    PDF_PAGE_LONG_SIDE_INCHES,
+)
+
+
+def _decode_images(uploaded_images: list, profile_label: str) -> list:
+    """فك الصور بأقرب دقة تكفي ملف الإخراج (draft لـ JPEG، reduce للباقي)"""
+    target_dpi = PDF_OUTPUT_PROFILES[profile_label]["dpi"]
+    max_dimension = (
+        int(PDF_PAGE_LONG_SIDE_INCHES * target_dpi) if target_dpi else None
+    )
+    return [
+        ImageProcessor.decode_for_target(open_image(f), max_dimension)
+        for f in uploaded_images
+    ]
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _estimated_pdf_size(file_keys: tuple, profile_label: str, _uploaded_images: list) -> int:
+    """
+    تقدير حجم PDF مخزّن مؤقتاً — الفك والترميز التجريبي لا يُعادان في كل
+    إعادة تشغيل (تغيير اسم الملف مثلاً)
+    """
+    images = _decode_images(_uploaded_images, profile_label)
+    return PDFHandler.estimate_pdf_size(images, profile_label)
+
 
 def render_img_to_pdf_page():
     st.title("🖼️ تحويل الصور إلى PDF")
@@ -26,9 +56,6 @@ def render_img_to_pdf_page():
     if uploaded_images:
         st.success(f"✅ تم رفع {len(uploaded_images)} صورة")
         
-        # عرض الصور وتجهيزها
-        images = []
-        
         st.subheader("🖼️ معاينة وترتيب")
         st.caption("سيتم حفظ الصور في الـ PDF بنفس ترتيب رفعها.")
         
@@ -36,12 +63,31 @@ def render_img_to_pdf_page():
         cols = st.columns(4)
         for idx, uploaded_file in enumerate(uploaded_images):
             with cols[idx % 4]:
-                img = Image.open(uploaded_file)
-                st.image(img, use_container_width=True, caption=f"صورة {idx+1}")
-                images.append(img)
+                render_image_thumbnail(uploaded_file, caption=f"صورة {idx+1}")
         
         st.markdown("---")
-        
+
+        # ملف الإخراج (الدقة والضغط)
+        profile_names = list(PDF_OUTPUT_PROFILES.keys())
+        profile_label = st.selectbox(
+            "🗜️ ملف الإخراج",
+            options=profile_names,
+            index=profile_names.index(DEFAULT_PDF_OUTPUT_PROFILE),
+            help="يحدد الدقة المستهدفة والضغط والتحويل للرمادي",
+            key="pdf_output_profile_select",
+        )
+
+        # الصور تُفك فقط داخل التقدير المخزّن وعند الإنشاء
+        estimated_size = _estimated_pdf_size(
+            tuple(file_cache_key(f) for f in uploaded_images),
+            profile_label,
+            uploaded_images,
+        )
+        if estimated_size:
+            st.caption(
+                f"📦 الحجم المتوقع: ~{estimated_size / (1024 * 1024):.1f} MB"
+            )
+
         # خيارات الملف
         col1, col2 = st.columns(2)
         with col1:
@@ -54,7 +100,9 @@ def render_img_to_pdf_page():
             st.write("")
             if st.button("🚀 إنشاء ملف PDF", type="primary", use_container_width=True):
                 with st.spinner("جاري إنشاء ملف PDF..."):
-                    pdf_data = PDFHandler.images_to_pdf(images)
+                    pdf_data = PDFHandler.images_to_pdf(
+                        _decode_images(uploaded_images, profile_label), profile_label
+                    )
                     
                 if pdf_data:
                     st.success("✨ تم إنشاء ملف PDF بنجاح!")
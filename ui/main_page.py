@@ -4,23 +4,57 @@ Main page — file upload, processing, and results display
 """
 
 import streamlit as st
-from PIL import Image
 import io
 
 from config import (
     SUPPORTED_FILE_TYPES,
-    TESSERACT_LANGUAGES,
-    TESSERACT_PSM_MODES,
+    PREVIEW_MAX_SIZE,
+    PDF_DPI_OPTIONS,
+    LOW_CONFIDENCE_THRESHOLD,
+    PAGE_BROWSER_PAGE_SIZE,
+    PAGE_BROWSER_FILTERS,
+    BATCH_MAX_FILES,
+    ENGINE_POOL_SIZES,
+    AUTO_DPI_MAX_SCALE,
+    ROI_RENDER_SCALE,
+    MEMORY_WORKING_COPIES,
+    PIPELINE_PREPROCESS_WORKERS,
+    PIPELINE_QUEUE_DEPTH,
+    TIMEOUT_RETRY_DPI,
 )
-from core.ocr_engine import TesseractOCR, HFInferenceOCR
+from core.ocr_engine import TesseractOCR
 from core.image_processor import ImageProcessor
 from core.pdf_handler import PDFHandler
+from core.pipeline import OCRPipeline
+from core.batch_queue import BatchQueue
+from core.upload_store import QuotaExceededError, estimate_page_bytes, open_image
+from core.scheduler import SchedulerBusyError, JobCancelledError
+from core.stages import StageStats
+from core.engines import ENGINE_REGISTRY
 from ui.components import (
     render_result_card,
     render_export_section,
     render_processing_stats,
+    render_pipeline_stats,
+    render_image_thumbnail,
+    render_pdf_page_thumbnail,
+    get_model_status_service,
+    get_upload_store,
+    get_scheduler,
+)
+from utils.tuning_profiles import find_profile, save_profile, describe_profile
+from utils.session import (
+    reset_results,
+    add_ocr_result,
+    document_ref,
+    get_full_text,
+    get_results_by_page,
+    drop_results,
+    get_ocr_settings,
+    duplicate_filter,
+    get_engine_name,
+    get_session_id,
 )
-from utils.session import reset_results, add_result, get_full_text
 
 
 def render_main_page():
@@ -36,6 +70,25 @@ def render_main_page():
 
     st.markdown("---")
 
+    upload_mode = st.radio(
+        "وضع الرفع",
+        options=["📄 ملف واحد", "📚 دفعة ملفات"],
+        horizontal=True,
+        key="upload_mode_radio",
+    )
+
+    if upload_mode == "📚 دفعة ملفات":
+        uploaded_files = st.file_uploader(
+            "📁 ارفع عدة صور أو ملفات PDF",
+            type=SUPPORTED_FILE_TYPES,
+            accept_multiple_files=True,
+            help=f"حتى {BATCH_MAX_FILES} ملف — الملفات المكررة تُعالج مرة واحدة",
+            key="batch_file_uploader",
+        )
+        if uploaded_files:
+            _handle_batch(uploaded_files)
+        return
+
     # رفع الملف
     uploaded_file = st.file_uploader(
         "📁 ارفع صورة أو ملف PDF",
@@ -45,6 +98,9 @@ def render_main_page():
     )
 
     if uploaded_file is not None:
+        # نسخة واحدة على القرص لكل رفع — تُفتح بالمسار في كل إعادة تشغيل
+        uploaded_file = get_upload_store().ingest(uploaded_file)
+
         if uploaded_file.type == "application/pdf":
             _handle_pdf(uploaded_file)
         else:
@@ -53,7 +109,7 @@ def render_main_page():
 
 def _render_system_info():
     """عرض معلومات مختصرة عن النظام"""
-    if "Tesseract" in st.session_state.ocr_method:
+    if get_engine_name() == "tesseract":
         if TesseractOCR.is_available():
             st.success(
                 "✅ **Tesseract OCR جاهز** — "
@@ -77,65 +133,118 @@ def _render_system_info():
             st.success("✅ **النموذج جاهز** — ارفع صورة أو PDF")
 
 
-def _process_single_image(image: Image.Image, page_num: int = 1) -> dict:
+def _roi_active() -> bool:
+    """هل استخراج مناطق الاهتمام مفعّل ومحدد؟"""
+    return bool(
+        st.session_state.enable_roi and st.session_state.roi_regions
+    )
+
+
+def _reserve_memory(sources: list, is_pdf: bool = False, in_flight: int = 1):
     """
-    معالجة صورة واحدة — تطبيق التحسينات واستخراج النص
+    حجز ذروة الذاكرة المتوقعة للمعالجة من حصة الجلسة
 
-    Returns:
-        dict مع text, confidence (اختياري), engine
+    الذروة = مجموع أكبر الصفحات التي قد تكون قيد المعالجة معاً (لا تتجاوز
+    عدد صفحات الدفعة) × النسخ العاملة (الأصل + الصورة المحسّنة). الصور
+    تُقدَّر بالأبعاد التي ستُفك بها (decode_for_target) لا بأبعاد الترويسة
     """
-    # 1. تحسين الصورة إذا مفعّل
-    if st.session_state.enable_enhancement:
-        processed = ImageProcessor.full_pipeline(
-            image.copy(),
-            contrast=st.session_state.contrast,
-            brightness=st.session_state.brightness,
-            sharpness=st.session_state.sharpness,
-            grayscale=st.session_state.grayscale,
-            denoise=st.session_state.denoise,
-            binarize=st.session_state.binarize,
-        )
+    if _roi_active():
+        scale = ROI_RENDER_SCALE
+        max_dimension = None
     else:
-        processed = image.copy()
-
-    # 2. استخراج النص حسب المحرك المختار
-    if "Tesseract" in st.session_state.ocr_method:
-        lang_code = TESSERACT_LANGUAGES.get(
-            st.session_state.tess_language, "eng"
-        )
-        psm_code = TESSERACT_PSM_MODES.get(
-            st.session_state.tess_psm, 3
+        scale = PDF_DPI_OPTIONS.get(st.session_state.pdf_dpi) or AUTO_DPI_MAX_SCALE
+        max_dimension = OCRPipeline.target_dimension(get_ocr_settings())
+
+    pages = [
+        size
+        for s in sources
+        for size in estimate_page_bytes(
+            s, is_pdf or s.type == "application/pdf", scale, max_dimension
         )
+    ]
+    peak = sum(sorted(pages, reverse=True)[:in_flight])
+    return get_upload_store().reserve(get_session_id(), peak * MEMORY_WORKING_COPIES)
+
+
+def _pages_in_flight() -> int:
+    """
+    عدد الصفحات التي قد تكون في الذاكرة معاً أثناء الدفعة: طابور الرسم
+    + مرحلة التحسين (طابور + عمّال) + صفحات OCR قيد المعالجة
+    """
+    return (
+        2 * PIPELINE_QUEUE_DEPTH
+        + PIPELINE_PREPROCESS_WORKERS
+        + 2 * ENGINE_POOL_SIZES.get(get_engine_name(), 2)
+    )
+
 
-        if st.session_state.show_confidence:
-            result = TesseractOCR.extract_with_confidence(
-                processed, lang=lang_code, psm=psm_code
+def _scheduled(kind: str, pages: int = 1):
+    """
+    تشغيل المعالجة عبر المجدول المشترك
+
+    الدفعات الزائدة عن السعة تنتظر مع عرض الترتيب والوقت المتوقع
+    """
+    placeholder = st.empty()
+
+    def on_wait(position: int, eta: float):
+        if position:
+            placeholder.info(
+                f"⏳ في طابور الانتظار — الترتيب **{position}**، "
+                f"البدء المتوقع خلال ~{eta:.0f} ث"
             )
         else:
-            result = TesseractOCR.extract_text(
-                processed, lang=lang_code, psm=psm_code
-            )
+            placeholder.empty()
+
+    return get_scheduler().job(get_session_id(), kind, pages, on_wait=on_wait)
+
+
+def _cancel_processing():
+    """زر الإلغاء (callback) — يوقف مهام الجلسة ويقتل عمليات tesseract الجارية"""
+    get_scheduler().cancel_session(get_session_id())
+    st.session_state.processing_cancelled = True
+    st.session_state.processing_complete = bool(st.session_state.all_results)
+
+
+def _render_cancel_button(key: str):
+    """زر إلغاء يظهر أثناء المعالجة الطويلة"""
+    st.button("⏹️ إلغاء المعالجة", key=key, on_click=_cancel_processing)
+
+
+def _render_cancelled_notice(completed: int = None):
+    """تنبيه بعد الإلغاء (مرة واحدة)"""
+    if not st.session_state.processing_cancelled:
+        return
+    st.session_state.processing_cancelled = False
+    if completed:
+        st.warning(f"⏹️ أُلغيت المعالجة — النتائج المكتملة: {completed} صفحة")
     else:
-        # HF API
-        img_bytes = ImageProcessor.image_to_bytes(processed)
-        result = HFInferenceOCR.extract_text(
-            img_bytes,
-            st.session_state.hf_model,
-            st.session_state.hf_token,
-        )
+        st.warning("⏹️ أُلغيت المعالجة")
 
-    return result
+
+def _process_regions(crops: list) -> dict:
+    """معالجة مناطق الاهتمام — كل منطقة بوضع التقسيم الخاص بها"""
+    return next(
+        OCRPipeline.process_region_batch([(1, crops)], get_ocr_settings())
+    )[1]
 
 
 def _handle_image(uploaded_file):
     """معالجة صورة مرفوعة"""
-    image = Image.open(uploaded_file)
+    # فك الصورة بالدقة التي يحتاجها خط المعالجة فقط (draft لـ JPEG)
+    image = open_image(uploaded_file)
+    full_size = image.size
+    if not _roi_active():
+        image = ImageProcessor.decode_for_target(
+            image, OCRPipeline.target_dimension(get_ocr_settings())
+        )
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("🖼️ الصورة")
-        st.image(image, use_container_width=True, caption="الصورة الأصلية")
+        render_image_thumbnail(
+            uploaded_file, caption="الصورة الأصلية", max_size=PREVIEW_MAX_SIZE
+        )
         
         # عرض الصورة المعالجة إذا مفعّل
         if st.session_state.get("show_processed"):
@@ -151,12 +260,15 @@ def _handle_image(uploaded_file):
                 denoise=st.session_state.denoise,
                 binarize=st.session_state.binarize,
             )
+            # المعاينة بحجم المعاينة الأصلية لا بدقة المعالجة (حتى 4096px)
+            processed_preview.thumbnail((PREVIEW_MAX_SIZE, PREVIEW_MAX_SIZE))
             st.image(processed_preview, use_container_width=True, caption="كيف يراها النظام")
 
-        st.caption(
-            f"الحجم: {image.size[0]}×{image.size[1]}px | "
-            f"النوع: {image.mode}"
-        )
+        # مواقع الكلمات تشير إلى الصورة المفكوكة — تُعرض أبعادها أيضاً
+        size = f"{full_size[0]}×{full_size[1]}px"
+        if image.size != full_size:
+            size += f" (تُعالج بـ {image.size[0]}×{image.size[1]})"
+        st.caption(f"الحجم: {size} | النوع: {image.mode}")
 
     with col2:
         st.subheader("📝 النتائج")
@@ -173,28 +285,41 @@ def _handle_image(uploaded_file):
         ):
             reset_results()
 
-            with st.spinner("⏳ جاري معالجة الصورة..."):
-                result = _process_single_image(image)
+            try:
+                with st.spinner("⏳ جاري معالجة الصورة..."), _scheduled(
+                    "interactive"
+                ), _reserve_memory([uploaded_file]):
+                    if _roi_active():
+                        result = _process_regions(
+                            ImageProcessor.crop_regions(
+                                image, st.session_state.roi_regions
+                            )
+                        )
+                    else:
+                        settings = get_ocr_settings()
+                        result = OCRPipeline.process_page(
+                            image,
+                            settings,
+                            duplicate_filter(settings, uploaded_file.name),
+                        )
+            except (QuotaExceededError, SchedulerBusyError) as e:
+                result = {"error": str(e)}
 
             if "error" in result:
                 st.error(f"❌ {result['error']}")
             else:
-                text = result.get("text", "")
-                confidence = result.get("avg_confidence")
-                engine = result.get("engine", "")
-
-                add_result(1, text, confidence, engine)
+                add_ocr_result(1, result, document_ref(uploaded_file))
                 st.session_state.processing_complete = True
 
         # عرض النتائج
         if st.session_state.processing_complete and st.session_state.all_results:
             r = st.session_state.all_results[0]
-            render_result_card(1, r["text"], r.get("confidence"))
+            render_result_card(1, r["text"], r.get("confidence"), r.get("table"))
 
     # قسم التصدير
     if st.session_state.processing_complete and st.session_state.all_results:
         render_processing_stats(st.session_state.all_results)
-        render_export_section(st.session_state.all_results)
+        render_export_section(st.session_state.all_results, uploaded_file)
 
 
 def _handle_pdf(uploaded_file):
@@ -209,19 +334,7 @@ def _handle_pdf(uploaded_file):
 
     page_count = pdf_info["page_count"]
     st.success(f"📖 عدد الصفحات: **{page_count}**")
-
-    # تحويل PDF إلى صور
-    with st.spinner(f"جاري تحويل {page_count} صفحة إلى صور..."):
-        pdf_result = PDFHandler.pdf_to_images(
-            uploaded_file,
-            dpi_label=st.session_state.pdf_dpi,
-        )
-
-    if isinstance(pdf_result, dict) and "error" in pdf_result:
-        st.error(f"❌ {pdf_result['error']}")
-        return
-
-    images = pdf_result  # list of (page_num, image)
+    _render_cancelled_notice(len(st.session_state.all_results))
 
     # زر المعالجة الدفعية
     can_process = _can_process()
@@ -240,84 +353,21 @@ def _handle_pdf(uploaded_file):
     with col2:
         st.caption(f"DPI: {st.session_state.pdf_dpi}")
 
-    # معالجة دفعية
+    # معالجة دفعية — تحويل الصفحات إلى صور عند الحاجة فقط
     if batch_btn:
-        reset_results()
-
-        progress_bar = st.progress(0, text="جاري المعالجة...")
-
-        for idx, (page_num, img) in enumerate(images):
-            progress_bar.progress(
-                (idx + 1) / len(images),
-                text=f"معالجة الصفحة {page_num} من {page_count}...",
-            )
-
-            result = _process_single_image(img, page_num)
-
-            if "error" not in result:
-                text = result.get("text", "")
-                confidence = result.get("avg_confidence")
-                engine = result.get("engine", "")
-                add_result(page_num, text, confidence, engine)
-            else:
-                add_result(page_num, f"[خطأ: {result['error']}]")
-
-        progress_bar.progress(1.0, text="✅ اكتملت المعالجة!")
-        st.session_state.processing_complete = True
+        try:
+            with _scheduled("batch", page_count), _reserve_memory(
+                [uploaded_file], is_pdf=True, in_flight=_pages_in_flight()
+            ):
+                _process_all_pages(uploaded_file, page_count)
+        except (QuotaExceededError, SchedulerBusyError) as e:
+            st.error(f"❌ {e}")
 
-    # عرض الصفحات والنتائج
-    if images:
+    # متصفح الصفحات (يعرض النافذة المرئية فقط)
+    if page_count:
         st.markdown("---")
         st.subheader("📑 صفحات الملف")
-
-        for page_num, img in images:
-            with st.expander(
-                f"📄 الصفحة {page_num}",
-                expanded=False,
-            ):
-                img_col, result_col = st.columns(2)
-
-                with img_col:
-                    st.image(
-                        img,
-                        use_container_width=True,
-                        caption=f"صفحة {page_num} — "
-                                f"{img.size[0]}×{img.size[1]}px",
-                    )
-
-                with result_col:
-                    # عرض النتيجة إذا موجودة
-                    page_results = [
-                        r
-                        for r in st.session_state.all_results
-                        if r["page"] == page_num
-                    ]
-
-                    if page_results:
-                        r = page_results[0]
-                        render_result_card(
-                            page_num, r["text"], r.get("confidence")
-                        )
-                    else:
-                        # زر استخراج فردي
-                        if st.button(
-                            f"🎯 استخراج",
-                            key=f"extract_page_{page_num}",
-                            disabled=not can_process,
-                        ):
-                            with st.spinner(f"معالجة الصفحة {page_num}..."):
-                                result = _process_single_image(img, page_num)
-
-                            if "error" not in result:
-                                add_result(
-                                    page_num,
-                                    result.get("text", ""),
-                                    result.get("avg_confidence"),
-                                    result.get("engine", ""),
-                                )
-                                st.rerun()
-                            else:
-                                st.error(f"❌ {result['error']}")
+        _render_page_browser(uploaded_file, pdf_info, can_process)
 
     # عرض النتائج الكاملة
     if st.session_state.processing_complete and st.session_state.all_results:
@@ -325,6 +375,8 @@ def _handle_pdf(uploaded_file):
         st.subheader("📊 ملخص النتائج")
 
         render_processing_stats(st.session_state.all_results)
+        render_pipeline_stats(st.session_state.pipeline_stats)
+        _render_timeout_retry(uploaded_file, can_process)
 
         # النص الكامل
         with st.expander("📝 النص الكامل المستخرج", expanded=True):
@@ -337,14 +389,436 @@ def _handle_pdf(uploaded_file):
                 label_visibility="collapsed",
             )
 
-        render_export_section(st.session_state.all_results)
+        render_export_section(st.session_state.all_results, uploaded_file)
+
+
+def _auto_tune_active() -> bool:
+    """الضبط التلقائي يحتاج محركاً يعطي الثقة ويعمل على الصفحة كاملة"""
+    engine = ENGINE_REGISTRY.get(get_engine_name())
+    return bool(
+        st.session_state.auto_tune
+        and engine is not None
+        and engine.supports_confidence
+        and not _roi_active()
+        and not st.session_state.table_mode
+    )
+
+
+def _tuned_profile(uploaded_file, page_count: int, settings: dict) -> dict:
+    """
+    ملف الضبط لنوع المستند — المحفوظ إن وُجد، وإلا يُضبط على عيّنة
+    من الصفحات ويُحفظ باسم نوع المستند
+    """
+    from core.autotune import AutoTuner, document_type, sample_pages
+
+    doc_type = document_type(uploaded_file, settings)
+    name, profile = find_profile(doc_type)
+    if profile:
+        st.info(f"🎛️ ملف الضبط المحفوظ «{name}»: {describe_profile(profile)}")
+        return profile
+
+    samples = sample_pages(page_count)
+
+    def render(dpi_label):
+        return [
+            page
+            for page_num in samples
+            for page in PDFHandler.iter_pages(
+                uploaded_file, dpi_label, (page_num - 1, page_num - 1)
+            )
+        ]
+
+    with st.spinner(f"🎛️ ضبط الإعدادات على {len(samples)} صفحات عيّنة..."):
+        profile = AutoTuner(settings).tune(render)
+
+    save_profile(doc_type, doc_type, profile)
+    st.info(f"🎛️ ضبط جديد لـ «{doc_type}»: {describe_profile(profile)}")
+    with st.expander(f"🧪 التجارب ({len(profile['trials'])})"):
+        st.dataframe(
+            [
+                {
+                    "الدقة": t["pdf_dpi"],
+                    "التعديلات": ", ".join(f"{k}={v}" for k, v in t["overrides"].items()) or "—",
+                    "الثقة %": t["confidence"],
+                    "الكلمات": t["words"],
+                    "الزمن (ث)": t["seconds"],
+                }
+                for t in profile["trials"]
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+    return profile
+
+
+def _process_all_pages(uploaded_file, page_count: int):
+    """استخراج النص من كل صفحات PDF عبر مجمّع عمّال المحرك"""
+    use_roi = _roi_active()
+    settings = get_ocr_settings()
+    dpi_label = st.session_state.pdf_dpi
+
+    # الضبط التلقائي على عيّنة ثم تطبيقه على كل الصفحات
+    if _auto_tune_active():
+        profile = _tuned_profile(uploaded_file, page_count, settings)
+        settings.update(profile["overrides"])
+        dpi_label = profile["pdf_dpi"]
+
+    if use_roi:
+        # مناطق الاهتمام فقط — (page_num, [(region, image)]) تُرسم أثناء المعالجة
+        pages = PDFHandler.render_regions(uploaded_file, st.session_state.roi_regions)
+    else:
+        # الصفحات تُرسم أثناء المعالجة — لا تبقى كل الصور في الذاكرة
+        pages = PDFHandler.iter_pages(uploaded_file, dpi_label=dpi_label)
+
+    reset_results()
+    document = document_ref(uploaded_file)
+
+    progress_bar = st.progress(0, text="جاري المعالجة...")
+    _render_cancel_button("cancel_pdf_batch_btn")
+
+    # الصفحات تُعالج بالتوازي عبر مجمّع عمّال المحرك (بنفس الترتيب)
+    stats = StageStats()
+    if use_roi:
+        batch = OCRPipeline.process_region_batch(pages, settings)
+    else:
+        batch = OCRPipeline.process_batch(
+            pages, settings, stats, duplicate_filter(settings, uploaded_file.name)
+        )
+
+    try:
+        for idx, (page_num, result) in enumerate(batch):
+            progress_bar.progress(
+                (idx + 1) / page_count,
+                text=f"معالجة الصفحة {page_num} من {page_count}...",
+            )
+
+            add_ocr_result(page_num, result, document)
+    except JobCancelledError:
+        st.session_state.processing_complete = bool(st.session_state.all_results)
+        _render_cancelled_notice(len(st.session_state.all_results))
+        return
+    except Exception as e:
+        st.error(f"❌ خطأ في تحويل PDF: {e}")
+        return
+
+    progress_bar.progress(1.0, text="✅ اكتملت المعالجة!")
+    st.session_state.processing_complete = True
+    st.session_state.pipeline_stats = stats.report()
+
+
+def _render_timeout_retry(uploaded_file, can_process: bool):
+    """زر إعادة الصفحات التي تجاوزت المهلة بإعدادات أرخص"""
+    pages = [r["page"] for r in st.session_state.all_results if r.get("timed_out")]
+    if not pages:
+        return
+
+    if st.button(
+        f"🔁 إعادة {len(pages)} صفحة تجاوزت المهلة بإعدادات أخف "
+        f"({TIMEOUT_RETRY_DPI})",
+        disabled=not can_process,
+        key="retry_timed_out_btn",
+    ):
+        try:
+            with _scheduled("batch", len(pages)), _reserve_memory(
+                [uploaded_file], is_pdf=True, in_flight=_pages_in_flight()
+            ):
+                _retry_timed_out(uploaded_file, pages)
+        except (QuotaExceededError, SchedulerBusyError) as e:
+            st.error(f"❌ {e}")
+            return
+        except JobCancelledError:
+            pass
+        st.rerun()
+
+
+def _retry_timed_out(uploaded_file, pages: list):
+    """
+    إعادة الصفحات المتجاوزة للمهلة: دقة أقل وكتلة نص واحدة بدون إزالة الضوضاء
+    (OCRPipeline.timeout_retry_settings) — كل صفحة تستبدل نتيجتها فور اكتمالها
+    """
+    settings = OCRPipeline.timeout_retry_settings(get_ocr_settings())
+    document = document_ref(uploaded_file)
+
+    if _roi_active():
+        rendered = PDFHandler.render_regions(
+            uploaded_file, st.session_state.roi_regions, page_numbers=pages
+        )
+        batch = OCRPipeline.process_region_batch(rendered, settings)
+    else:
+        rendered = (
+            page
+            for page_num in pages
+            for page in PDFHandler.iter_pages(
+                uploaded_file, TIMEOUT_RETRY_DPI, (page_num - 1, page_num - 1)
+            )
+        )
+        batch = OCRPipeline.process_batch(rendered, settings)
+
+    _render_cancel_button("cancel_retry_btn")
+    with st.spinner(f"جاري إعادة {len(pages)} صفحة..."):
+        try:
+            for page_num, result in batch:
+                drop_results([page_num])
+                add_ocr_result(page_num, result, document)
+        except JobCancelledError:
+            raise
+        except Exception as e:
+            st.error(f"❌ خطأ في تحويل PDF: {e}")
+
+    st.session_state.all_results.sort(key=lambda r: r["page"])
+    st.session_state.searchable_pdf = None
+
+
+def _filter_pages(page_count: int, page_filter: str, results: dict) -> list:
+    """أرقام الصفحات المطابقة للفلتر المختار"""
+    pages = range(1, page_count + 1)
+
+    if page_filter == "لم تُعالج بعد":
+        return [p for p in pages if p not in results]
+    if page_filter == "ثقة منخفضة":
+        return [
+            p for p in pages
+            if p in results
+            and results[p].get("confidence") is not None
+            and results[p]["confidence"] < LOW_CONFIDENCE_THRESHOLD
+        ]
+    return list(pages)
+
+
+def _jump_to_page(pages: list):
+    """الانتقال إلى نافذة الصفحة المطلوبة (callback)"""
+    target = st.session_state.pdf_jump_input
+    if target in pages:
+        st.session_state.pdf_browser_page = (
+            pages.index(target) // PAGE_BROWSER_PAGE_SIZE + 1
+        )
+
+
+def _render_page_browser(uploaded_file, pdf_info: dict, can_process: bool):
+    """
+    متصفح صفحات مقسّم — يرسم نافذة صغيرة من الصفحات فقط
+
+    حالة كل صفحة تُقرأ من فهرس النتائج، والصور الكاملة لا تُحوَّل
+    إلا عند الاستخراج أو طلب الدقة الكاملة
+    """
+    page_count = pdf_info["page_count"]
+    results = get_results_by_page()
+    scale = PDF_DPI_OPTIONS.get(st.session_state.pdf_dpi, 2.0)  # None = تلقائي
+
+    filter_col, jump_col = st.columns([2, 1])
+
+    with filter_col:
+        page_filter = st.selectbox(
+            "🔎 عرض",
+            options=PAGE_BROWSER_FILTERS,
+            key="pdf_page_filter",
+        )
+
+    pages = _filter_pages(page_count, page_filter, results)
+
+    with jump_col:
+        st.number_input(
+            "↪️ انتقال إلى صفحة",
+            min_value=1,
+            max_value=page_count,
+            step=1,
+            key="pdf_jump_input",
+            on_change=_jump_to_page,
+            args=(pages,),
+        )
+
+    if not pages:
+        st.info("لا توجد صفحات مطابقة لهذا الفلتر")
+        return
+
+    window_count = (len(pages) - 1) // PAGE_BROWSER_PAGE_SIZE + 1
+    if st.session_state.get("pdf_browser_page", 1) > window_count:
+        st.session_state.pdf_browser_page = window_count
+
+    window = st.number_input(
+        f"📖 نافذة العرض (من {window_count})",
+        min_value=1,
+        max_value=window_count,
+        step=1,
+        key="pdf_browser_page",
+    )
+
+    start = (window - 1) * PAGE_BROWSER_PAGE_SIZE
+    visible = pages[start:start + PAGE_BROWSER_PAGE_SIZE]
+    st.caption(
+        f"عرض الصفحات {visible[0]}–{visible[-1]} "
+        f"({len(pages)} صفحة مطابقة من {page_count})"
+    )
+
+    for page_num in visible:
+        page_info = pdf_info["pages_info"][page_num - 1]
+        if scale:
+            size_label = (
+                f"{int(page_info['width'] * scale)}×"
+                f"{int(page_info['height'] * scale)}px"
+            )
+        else:
+            size_label = "دقة تلقائية"
+
+        with st.expander(
+            f"📄 الصفحة {page_num}",
+            expanded=False,
+        ):
+            img_col, result_col = st.columns(2)
+
+            with img_col:
+                caption = f"صفحة {page_num} — {size_label}"
+                # الدقة الكاملة عند الطلب فقط
+                if st.checkbox(
+                    "🔍 الدقة الكاملة",
+                    value=False,
+                    key=f"full_res_{page_num}",
+                ):
+                    img = _render_pdf_page(uploaded_file, page_num)
+                    if img is not None:
+                        st.image(img, use_container_width=True, caption=caption)
+                else:
+                    render_pdf_page_thumbnail(
+                        uploaded_file, page_num, caption=caption
+                    )
+
+            with result_col:
+                # عرض النتيجة إذا موجودة
+                r = results.get(page_num)
+
+                if r:
+                    render_result_card(
+                        page_num, r["text"], r.get("confidence"), r.get("table")
+                    )
+                else:
+                    # زر استخراج فردي
+                    if st.button(
+                        f"🎯 استخراج",
+                        key=f"extract_page_{page_num}",
+                        disabled=not can_process,
+                    ):
+                        with st.spinner(f"معالجة الصفحة {page_num}..."), _scheduled(
+                            "interactive"
+                        ):
+                            result = _extract_pdf_page(uploaded_file, page_num)
+
+                        if "error" not in result:
+                            add_ocr_result(
+                                page_num, result, document_ref(uploaded_file)
+                            )
+                            st.rerun()
+                        else:
+                            st.error(f"❌ {result['error']}")
+
+
+def _extract_pdf_page(uploaded_file, page_num: int) -> dict:
+    """استخراج نص صفحة PDF واحدة (كاملة أو مناطق الاهتمام فقط)"""
+    if _roi_active():
+        try:
+            (_, crops), = PDFHandler.render_regions(
+                uploaded_file, st.session_state.roi_regions, page_numbers=[page_num]
+            )
+        except Exception as e:
+            return {"error": f"خطأ في تحويل المناطق: {str(e)}"}
+        return _process_regions(crops)
+
+    img = _render_pdf_page(uploaded_file, page_num)
+    if img is None:
+        return {"error": "تعذّر تحويل الصفحة"}
+    return OCRPipeline.process_page(img, get_ocr_settings())
+
+
+def _render_pdf_page(uploaded_file, page_num: int):
+    """تحويل صفحة واحدة إلى صورة بالدقة المختارة"""
+    pdf_result = PDFHandler.pdf_to_images(
+        uploaded_file,
+        dpi_label=st.session_state.pdf_dpi,
+        page_range=(page_num - 1, page_num - 1),
+    )
+    if isinstance(pdf_result, dict) or not pdf_result:
+        return None
+    return pdf_result[0][1]
+
+
+def _handle_batch(uploaded_files):
+    """معالجة دفعة ملفات عبر طابور واحد ومجمّع عمّال مشترك"""
+    store = get_upload_store()
+    files = [store.ingest(f) for f in uploaded_files[:BATCH_MAX_FILES]]
+    if len(uploaded_files) > BATCH_MAX_FILES:
+        st.warning(f"⚠️ سيتم معالجة أول {BATCH_MAX_FILES} ملف فقط")
+
+    pdf_count = sum(1 for f in files if f.type == "application/pdf")
+    st.info(
+        f"📚 **{len(files)}** ملف — {pdf_count} PDF و "
+        f"{len(files) - pdf_count} صورة"
+    )
+    _render_cancelled_notice()
+
+    if st.button(
+        f"🚀 استخراج النص من كل الملفات ({len(files)})",
+        type="primary",
+        use_container_width=True,
+        disabled=not _can_process(),
+        key="batch_files_btn",
+    ):
+        queue = BatchQueue()
+        for f in files:
+            queue.add_file(f.name, f, f.type == "application/pdf")
+
+        duplicates = len(queue.files) - len(queue.unique_files)
+        if duplicates:
+            st.caption(f"♻️ {duplicates} ملف مكرر — سيأخذ نتيجة الأصل")
+
+        settings = get_ocr_settings()
+        stats = StageStats()
+        progress_bar = st.progress(0, text="جاري التحضير...")
+        _render_cancel_button("cancel_files_batch_btn")
+
+        def on_progress(done, total, file_name, page_num):
+            progress_bar.progress(
+                done / total,
+                text=f"معالجة {file_name} — الصفحة {page_num} ({done}/{total})",
+            )
+
+        try:
+            with _scheduled("batch", queue.count_pages()), _reserve_memory(
+                [f["data"] for f in queue.unique_files], in_flight=_pages_in_flight()
+            ):
+                st.session_state.batch_results = queue.run(
+                    settings,
+                    dpi_label=st.session_state.pdf_dpi,
+                    on_progress=on_progress,
+                    index=st.session_state.index_results,
+                    stats=stats,
+                    duplicates=duplicate_filter(
+                        settings, file_names=[f["name"] for f in queue.files]
+                    ),
+                )
+            progress_bar.progress(1.0, text="✅ اكتملت المعالجة!")
+            st.session_state.pipeline_stats = stats.report()
+        except (QuotaExceededError, SchedulerBusyError) as e:
+            st.error(f"❌ {e}")
+        except JobCancelledError:
+            progress_bar.empty()
+            st.warning("⏹️ أُلغيت المعالجة")
+
+    results = st.session_state.batch_results
+    if results:
+        st.markdown("---")
+        st.subheader("📊 ملخص الدفعة")
+        render_processing_stats(results)
+        render_pipeline_stats(st.session_state.pipeline_stats)
+        render_export_section(results)
 
 
 def _can_process() -> bool:
     """فحص إمكانية المعالجة"""
-    if "Tesseract" in st.session_state.ocr_method:
+    if get_engine_name() == "tesseract":
         return TesseractOCR.is_available()
     else:
-        return bool(
-            st.session_state.hf_token and st.session_state.hf_model_ready
-        )
+        if not st.session_state.hf_token:
+            return False
+        # قراءة فورية من الخدمة المشتركة (بدون طلب شبكة)
+        return get_model_status_service().get(
+            st.session_state.hf_model, st.session_state.hf_token
+        )["ready"]
@@ -0,0 +1,67 @@
+"""
+صفحة البحث في المستندات المعالجة
+Full-text search page over previously OCR'd documents
+"""
+
+import time
+
+import streamlit as st
+
+from config import SEARCH_RESULTS_LIMIT
+from core.search_index import get_search_index
+
+
+def render_search_page():
+    """رسم صفحة البحث"""
+    st.title("🔎 البحث في المستندات")
+    st.caption(
+        "كل صفحة تُستخرج تُضاف لفهرس محلي دائم — ابحث بدون إعادة الرفع أو OCR"
+    )
+
+    index = get_search_index()
+    stats = index.stats()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("📚 المستندات", f"{stats['documents']:,}")
+    with col2:
+        st.metric("📄 الصفحات المفهرسة", f"{stats['pages']:,}")
+
+    query = st.text_input(
+        "كلمات البحث",
+        placeholder="مثال: المدرسة — التشكيل وأشكال الألف/الياء/التاء لا تهم",
+        key="search_query",
+    )
+
+    if query.strip():
+        start = time.perf_counter()
+        hits = index.search(query)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if not hits:
+            st.info("لا توجد نتائج مطابقة")
+        else:
+            more = "+" if len(hits) == SEARCH_RESULTS_LIMIT else ""
+            st.caption(f"{len(hits)}{more} نتيجة — {elapsed_ms:.0f} ms")
+
+            for hit in hits:
+                st.markdown(
+                    f"**📄 {hit['file']}** — الصفحة {hit['page']}"
+                )
+                # المقتطف HTML مُهرَّب مسبقاً (core.search_index.snippet)
+                st.markdown(
+                    f'<div dir="auto">{hit["snippet"]}</div>',
+                    unsafe_allow_html=True,
+                )
+                st.markdown("---")
+
+    with st.expander("⚙️ إعدادات الفهرس"):
+        st.session_state.index_results = st.checkbox(
+            "🗂️ فهرسة النتائج الجديدة تلقائياً",
+            value=st.session_state.index_results,
+            help="تُحفظ نصوص الصفحات المستخرجة في ملف محلي للبحث لاحقاً",
+        )
+
+        if st.button("🗑️ مسح الفهرس", disabled=not stats["pages"]):
+            index.clear()
+            st.rerun()
@@ -7,14 +7,28 @@ import streamlit as st
 import time
 
 from config import (
+    OCR_METHODS,
+    CASCADE_CONFIDENCE_THRESHOLD,
+    TILE_TRIGGER_DIMENSION,
     TESSERACT_LANGUAGES,
     TESSERACT_PSM_MODES,
     HF_OCR_MODELS,
     ENHANCEMENT_DEFAULTS,
+    BLANK_PAGE_SENSITIVITY,
+    DUPLICATE_PAGE_THRESHOLDS,
     PDF_DPI_OPTIONS,
     DEFAULT_PDF_DPI,
+    TUNER_SAMPLE_PAGES,
 )
-from core.ocr_engine import TesseractOCR, HFInferenceOCR
+from core.ocr_engine import TesseractOCR
+from ui.components import get_model_status_service
+from utils.roi_templates import (
+    load_templates,
+    save_template,
+    delete_template,
+    normalize_regions,
+)
+from utils.tuning_profiles import load_profiles, delete_profile, describe_profile
 
 
 def render_sidebar():
@@ -30,7 +44,7 @@ def render_sidebar():
 
         ocr_method = st.radio(
             "اختر طريقة استخراج النص",
-            options=["Tesseract (محلي)", "HF Inference API (سحابي)"],
+            options=list(OCR_METHODS.keys()),
             index=0,
             help="Tesseract: مجاني، محلي، يدعم العربية\n"
                  "HF API: يحتاج Token، نماذج متقدمة",
@@ -43,7 +57,7 @@ def render_sidebar():
         # ═══════════════════════════════════════════════════
         # إعدادات حسب المحرك المختار
         # ═══════════════════════════════════════════════════
-        if "Tesseract" in ocr_method:
+        if OCR_METHODS[ocr_method] == "tesseract":
             _render_tesseract_settings()
         else:
             _render_hf_settings()
@@ -62,17 +76,25 @@ def render_sidebar():
         # ═══════════════════════════════════════════════════
         _render_pdf_settings()
 
+        st.markdown("---")
+
+        # ═══════════════════════════════════════════════════
+        # مناطق الاهتمام (ROI)
+        # ═══════════════════════════════════════════════════
+        _render_roi_settings()
+
 
 def _render_tesseract_settings():
     """إعدادات Tesseract"""
     st.subheader("🖥️ إعدادات Tesseract")
 
-    # حالة Tesseract
-    if TesseractOCR.is_available():
-        st.success("✅ Tesseract مثبّت وجاهز")
+    # حالة Tesseract (فحص مخزّن مؤقتاً — مرة واحدة لكل عملية)
+    capabilities = TesseractOCR.get_capabilities()
+    if capabilities["available"]:
+        st.success(f"✅ Tesseract {capabilities['version']} مثبّت وجاهز")
 
         # اللغات المتاحة
-        available = TesseractOCR.get_available_languages()
+        available = capabilities["languages"]
         if available:
             st.caption(f"اللغات المثبتة: {', '.join(available)}")
     else:
@@ -107,6 +129,34 @@ def _render_tesseract_settings():
     )
     st.session_state.tess_psm = psm
 
+    # كشف نوع الخط لتقليص اللغات المتعددة
+    if "+" in TESSERACT_LANGUAGES[lang]:
+        st.session_state.auto_language = st.checkbox(
+            "🧭 كشف اللغة تلقائياً لكل صفحة",
+            value=st.session_state.auto_language,
+            help="يكشف نوع الخط (OSD) على نسخة مصغّرة ويشغّل لغات الخط "
+                 "المكتشف فقط بدل كل اللغات المختارة (أسرع بكثير)",
+            key="auto_language_check",
+        )
+
+    # وضع الجداول
+    st.session_state.table_mode = st.checkbox(
+        "📊 وضع الجداول (خلايا منظمة)",
+        value=st.session_state.table_mode,
+        help="يكشف خطوط الجدول ويستخرج كل خلية على حدة — "
+             "التصدير كـ CSV أو XLSX",
+        key="table_mode_check",
+    )
+
+    # الصور الكبيرة جداً بالدقة الكاملة
+    st.session_state.tiled_ocr = st.checkbox(
+        "🧩 تقسيم الصور الكبيرة (دقة كاملة)",
+        value=st.session_state.tiled_ocr,
+        help=f"الصور الأكبر من {TILE_TRIGGER_DIMENSION}px تُقسّم إلى أجزاء "
+             "متداخلة تُقرأ بالتوازي بدل تصغيرها — للمخططات والصحف",
+        key="tiled_ocr_check",
+    )
+
     # عرض نسبة الثقة
     st.session_state.show_confidence = st.checkbox(
         "📊 عرض نسبة الثقة لكل كلمة",
@@ -114,6 +164,45 @@ def _render_tesseract_settings():
         key="show_conf_check",
     )
 
+    # إعادة المحاولة التلقائية للصفحات ضعيفة الثقة
+    st.session_state.adaptive_cascade = st.checkbox(
+        "🔁 إعادة تلقائية للصفحات ضعيفة الثقة",
+        value=st.session_state.adaptive_cascade,
+        help=f"يعيد فقط الأسطر/الصفحات بثقة أقل من {CASCADE_CONFIDENCE_THRESHOLD}% "
+             "بإعدادات بديلة (PSM، ثنائي، تكبير الصورة) ضمن ميزانية حساب محددة",
+        key="adaptive_cascade_check",
+    )
+
+    # الضبط التلقائي على عيّنة من الصفحات
+    st.session_state.auto_tune = st.checkbox(
+        "🎛️ ضبط تلقائي للإعدادات (PDF)",
+        value=st.session_state.auto_tune,
+        help=f"يجرّب الدقة ووضع التقسيم والتحسين على {TUNER_SAMPLE_PAGES} صفحات "
+             "عيّنة ويختار أسرع إعداد بثقة قريبة من الأفضل، ثم يحفظه لنوع "
+             "المستند (الحجم، الاتجاه، ممسوح/رقمي) ويطبّقه على باقي الصفحات",
+        key="auto_tune_check",
+    )
+    if st.session_state.auto_tune:
+        _render_tuning_profiles()
+
+
+def _render_tuning_profiles():
+    """ملفات الضبط المحفوظة — حذف ملف يعيد الضبط لنوع المستند"""
+    profiles = load_profiles()
+    if not profiles:
+        st.caption("لا توجد ملفات ضبط محفوظة بعد")
+        return
+
+    name = st.selectbox(
+        "📋 ملفات الضبط المحفوظة",
+        options=list(profiles.keys()),
+        key="tuning_profile_select",
+    )
+    st.caption(describe_profile(profiles[name]))
+    if st.button("🗑️ حذف (إعادة الضبط)", key="tuning_profile_delete_btn"):
+        delete_profile(name)
+        st.rerun()
+
 
 def _render_hf_settings():
     """إعدادات HF Inference API"""
@@ -151,44 +240,52 @@ def _render_hf_settings():
     model_info = HF_OCR_MODELS.get(selected, {})
     st.caption(model_info.get("description", ""))
 
+    # الحالة من الخدمة المشتركة (فورية — الفحص والتحميل في الخلفية)
+    service = get_model_status_service()
+    if st.session_state.hf_token:
+        # التحميل المسبق عند اختيار النموذج/Token فقط — لا مع كل إعادة تشغيل
+        selection = (st.session_state.hf_model, st.session_state.hf_token)
+        if st.session_state.hf_prewarmed != selection:
+            service.prewarm(*selection)
+            st.session_state.hf_prewarmed = selection
+        status = service.get(st.session_state.hf_model, st.session_state.hf_token)
+        st.session_state.hf_api_status = status["status"]
+        st.session_state.hf_model_ready = status["ready"]
+
+        if status["status"] == "success":
+            st.success(status["message"])
+        elif status["status"] == "error":
+            st.error(status["message"])
+        else:
+            st.warning(status["message"])
+
+        if status.get("checked_at"):
+            age = int(time.time() - status["checked_at"])
+            st.caption(f"آخر فحص منذ {age} ثانية")
+
     # أزرار إدارة النموذج
     col1, col2 = st.columns(2)
 
     with col1:
         if st.button("📡 فحص", use_container_width=True, key="hf_check_btn"):
             if st.session_state.hf_token:
-                with st.spinner("جاري الفحص..."):
-                    result = HFInferenceOCR.check_model_status(
-                        st.session_state.hf_model,
-                        st.session_state.hf_token,
-                    )
-                st.session_state.hf_api_status = result.get("status", "error")
-                st.session_state.hf_model_ready = result.get("ready", False)
-
-                if result["status"] == "success":
-                    st.success(result["message"])
-                elif result["status"] == "loading":
-                    st.warning(result["message"])
-                else:
-                    st.error(result.get("message", "خطأ"))
+                service.refresh(
+                    st.session_state.hf_model,
+                    st.session_state.hf_token,
+                )
+                st.info("🔄 جاري الفحص في الخلفية")
             else:
                 st.error("⚠️ أدخل Token أولاً")
 
     with col2:
         if st.button("🔄 تحميل", use_container_width=True, key="hf_load_btn"):
             if st.session_state.hf_token:
-                with st.spinner("جاري التحميل..."):
-                    result = HFInferenceOCR.force_load_model(
-                        st.session_state.hf_model,
-                        st.session_state.hf_token,
-                    )
-                if result["status"] == "success":
-                    st.success(result["message"])
-                    st.session_state.hf_model_ready = True
-                elif result["status"] == "loading":
-                    st.warning(result["message"])
-                else:
-                    st.error(result["message"])
+                service.refresh(
+                    st.session_state.hf_model,
+                    st.session_state.hf_token,
+                    force_load=True,
+                )
+                st.info("🔄 جاري التحميل في الخلفية")
             else:
                 st.error("⚠️ أدخل Token أولاً")
 
@@ -279,6 +376,43 @@ def _render_image_settings():
             st.session_state.binarize = False
             st.rerun()
 
+    # قص الهوامش وحواف الماسح
+    st.session_state.auto_crop = st.checkbox(
+        "✂️ قص الهوامش وحواف الماسح تلقائياً",
+        value=st.session_state.auto_crop,
+        help="يحدد مستطيل المحتوى من نسخة مصغّرة ويقص الهوامش البيضاء والحواف "
+             "السوداء قبل التحسين وOCR — أسرع، وبدون رموز عشوائية من الحواف. "
+             "مواقع الكلمات تبقى بإحداثيات الصفحة الأصلية",
+        key="auto_crop_check",
+    )
+
+    # تخطي الصفحات الفارغة قبل التحسين وOCR
+    st.session_state.blank_sensitivity = st.selectbox(
+        "📭 تخطي الصفحات الفارغة",
+        options=list(BLANK_PAGE_SENSITIVITY.keys()),
+        index=list(BLANK_PAGE_SENSITIVITY.keys()).index(
+            st.session_state.blank_sensitivity
+        ),
+        help="يكشف الصفحات الفارغة (فواصل المسح، الوجه الخلفي) من نسخة "
+             "مصغّرة ويتخطاها بدون OCR\n"
+             "عالية: تتخطى أيضاً الصفحات شبه الفارغة (رقم صفحة أو ختم فقط)",
+        key="blank_sensitivity_select",
+    )
+
+    # إعادة استخدام نتائج الصفحات المكررة (عبر ملفات الجلسة)
+    st.session_state.duplicate_threshold = st.selectbox(
+        "♻️ الصفحات المكررة",
+        options=list(DUPLICATE_PAGE_THRESHOLDS.keys()),
+        index=list(DUPLICATE_PAGE_THRESHOLDS.keys()).index(
+            st.session_state.duplicate_threshold
+        ),
+        help="الصفحة المطابقة لصفحة سبقت معالجتها في الجلسة (غلاف، نموذج، "
+             "ملحق شروط) تأخذ نتيجتها بدل OCR من جديد\n"
+             "مرن: يطابق أيضاً النسخ المعاد ضغطها (JPEG) أو المشوّشة — "
+             "لا يطابق نفس الصفحة بدقة DPI مختلفة أو مزاحة",
+        key="duplicate_threshold_select",
+    )
+
 
 def _render_pdf_settings():
     """إعدادات PDF"""
@@ -288,7 +422,81 @@ def _render_pdf_settings():
         "جودة التحويل (DPI)",
         options=list(PDF_DPI_OPTIONS.keys()),
         index=list(PDF_DPI_OPTIONS.keys()).index(st.session_state.pdf_dpi),
-        help="DPI أعلى = جودة أفضل لكن أبطأ",
+        help="DPI أعلى = جودة أفضل لكن أبطأ\n"
+             "تلقائي: يختار الدقة لكل صفحة حسب حجم الخط",
         key="pdf_dpi_select",
     )
     st.session_state.pdf_dpi = dpi
+
+
+def _render_roi_settings():
+    """إعدادات مناطق الاهتمام (ROI)"""
+    st.subheader("🎯 مناطق الاهتمام")
+
+    st.session_state.enable_roi = st.checkbox(
+        "استخراج مناطق محددة فقط",
+        value=st.session_state.enable_roi,
+        help="يرسم ويعالج المناطق المحددة فقط بدل الصفحة كاملة\n"
+             "الإحداثيات نسبية (0–1) من عرض وارتفاع الصفحة",
+        key="roi_check",
+    )
+
+    if not st.session_state.enable_roi:
+        return
+
+    # تحميل قالب محفوظ
+    templates = load_templates()
+    if templates:
+        template_name = st.selectbox(
+            "📋 قالب محفوظ",
+            options=list(templates.keys()),
+            key="roi_template_select",
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("📂 تحميل", use_container_width=True, key="roi_load_btn"):
+                st.session_state.roi_table = templates[template_name]
+                st.session_state.pop("roi_editor", None)
+                st.rerun()
+        with col2:
+            if st.button("🗑️ حذف", use_container_width=True, key="roi_delete_btn"):
+                delete_template(template_name)
+                st.rerun()
+
+    if "roi_table" not in st.session_state:
+        st.session_state.roi_table = st.session_state.roi_regions or [
+            {
+                "name": "رأس الصفحة",
+                "x0": 0.0,
+                "y0": 0.0,
+                "x1": 1.0,
+                "y1": 0.2,
+                "psm": list(TESSERACT_PSM_MODES.keys())[0],
+            }
+        ]
+
+    edited = st.data_editor(
+        st.session_state.roi_table,
+        num_rows="dynamic",
+        column_config={
+            "name": st.column_config.TextColumn("الاسم"),
+            "x0": st.column_config.NumberColumn("x0", min_value=0.0, max_value=1.0, step=0.01),
+            "y0": st.column_config.NumberColumn("y0", min_value=0.0, max_value=1.0, step=0.01),
+            "x1": st.column_config.NumberColumn("x1", min_value=0.0, max_value=1.0, step=0.01),
+            "y1": st.column_config.NumberColumn("y1", min_value=0.0, max_value=1.0, step=0.01),
+            "psm": st.column_config.SelectboxColumn(
+                "وضع التقسيم", options=list(TESSERACT_PSM_MODES.keys())
+            ),
+        },
+        key="roi_editor",
+    )
+    st.session_state.roi_regions = normalize_regions(edited)
+    st.caption(f"المناطق الصالحة: {len(st.session_state.roi_regions)}")
+
+    # حفظ كقالب
+    name = st.text_input("💾 اسم القالب", key="roi_template_name")
+    if st.button("💾 حفظ كقالب", key="roi_save_btn", disabled=not name):
+        if save_template(name, st.session_state.roi_regions):
+            st.success(f"✅ تم حفظ القالب: {name}")
+        else:
+            st.error("❌ فشل حفظ القالب")
@@ -6,6 +6,8 @@ Export results in multiple formats
 import json
 import csv
 import io
+import os
+import zipfile
 
 from utils.logger import get_logger
 
@@ -17,7 +19,10 @@ def export_as_txt(results: list) -> str:
     parts = []
     for r in results:
         if len(results) > 1:
-            header = f"═══ الصفحة {r['page']} ═══"
+            if r.get("file"):
+                header = f"═══ {r['file']} — الصفحة {r['page']} ═══"
+            else:
+                header = f"═══ الصفحة {r['page']} ═══"
             if r.get("confidence"):
                 header += f"  (الثقة: {r['confidence']}%)"
             parts.append(header)
@@ -45,6 +50,12 @@ def export_as_json(results: list) -> str:
             page_data["confidence"] = r["confidence"]
         if r.get("engine"):
             page_data["engine"] = r["engine"]
+        if r.get("file"):
+            page_data["file"] = r["file"]
+        if r.get("language"):
+            page_data["language"] = r["language"]
+        if r.get("detected_script"):
+            page_data["detected_script"] = r["detected_script"]
 
         export_data["pages"].append(page_data)
 
@@ -56,12 +67,17 @@ def export_as_csv(results: list) -> str:
     output = io.StringIO()
     writer = csv.writer(output)
 
+    # عمود الملف يُضاف فقط لنتائج الدفعات متعددة الملفات
+    with_file = any(r.get("file") for r in results)
+
     # Header
-    writer.writerow(["الصفحة", "النص", "عدد الكلمات", "الثقة", "المحرك"])
+    header = ["الصفحة", "النص", "عدد الكلمات", "الثقة", "المحرك"]
+    writer.writerow((["الملف"] if with_file else []) + header)
 
     for r in results:
         writer.writerow(
-            [
+            ([r.get("file", "")] if with_file else [])
+            + [
                 r["page"],
                 r["text"],
                 len(r["text"].split()) if r["text"] else 0,
@@ -73,6 +89,200 @@ def export_as_csv(results: list) -> str:
     return output.getvalue()
 
 
+EXPORTERS = {
+    "TXT": (export_as_txt, "extracted_text.txt", "text/plain"),
+    "JSON": (export_as_json, "extracted_text.json", "application/json"),
+    "CSV": (export_as_csv, "extracted_text.csv", "text/csv"),
+}
+
+
+def export_as_zip(results: list, format: str) -> bytes:
+    """
+    تصدير نتائج دفعة متعددة الملفات كملف ZIP — ملف تصدير لكل مستند
+
+    التجميع حسب (file_index، الاسم) فلا يندمج ملفان بنفس الاسم، واسم
+    المدخل يحتفظ بامتداد المستند (a.pdf.txt) مع لاحقة رقمية عند التكرار
+    """
+    func, default_name, _ = EXPORTERS.get(format, EXPORTERS["TXT"])
+    extension = os.path.splitext(default_name)[1]
+
+    # تجميع النتائج حسب الملف مع الحفاظ على الترتيب
+    grouped = {}
+    for r in results:
+        key = (r.get("file_index"), r.get("file") or "extracted_text")
+        grouped.setdefault(key, []).append(r)
+
+    used = set()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for (_, file_name), file_results in grouped.items():
+            entry = f"{file_name}{extension}"
+            n = 1
+            while entry in used:
+                n += 1
+                entry = f"{file_name} ({n}){extension}"
+            used.add(entry)
+            zf.writestr(entry, func(file_results))
+
+    data = buffer.getvalue()
+    logger.info(f"Exported ZIP ({format}): {len(grouped)} files, {len(data)} bytes")
+    return data
+
+
+def table_to_csv(rows: list) -> str:
+    """تصدير جدول (قائمة صفوف) كـ CSV"""
+    output = io.StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue()
+
+
+def _xlsx_column(index: int) -> str:
+    """اسم عمود Excel من رقمه (0 → A)"""
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(65 + rem) + name
+    return name
+
+
+_SHEET_NAME_INVALID = str.maketrans({c: " " for c in "[]:*?/\\"})
+
+
+def _sheet_names(names: list) -> list:
+    """
+    أسماء أوراق صالحة وفريدة بنفس الترتيب
+
+    Excel يرفض []:*?/\\ والأسماء الأطول من 31 حرفاً والمكررة (دون تمييز
+    حالة الأحرف) — المكرر يأخذ لاحقة " (2)" داخل حد الطول
+    """
+    used = set()
+    unique = []
+    for name in names:
+        base = " ".join(str(name).translate(_SHEET_NAME_INVALID).split()).strip("'")
+        base = base or "Sheet"
+        candidate = base[:31]
+        n = 1
+        while candidate.lower() in used:
+            n += 1
+            suffix = f" ({n})"
+            candidate = base[:31 - len(suffix)] + suffix
+        used.add(candidate.lower())
+        unique.append(candidate)
+    return unique
+
+
+def tables_to_xlsx(tables: dict) -> bytes:
+    """
+    تصدير عدة جداول كملف XLSX — ورقة لكل جدول
+
+    ملف SpreadsheetML بسيط (نصوص فقط) مكتوب مباشرة بدون مكتبات إضافية
+
+    Args:
+        tables: {اسم الورقة: قائمة صفوف}
+    """
+    from xml.sax.saxutils import escape
+
+    sheets = list(zip(_sheet_names(list(tables)), tables.values()))
+    buffer = io.BytesIO()
+
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for i in range(1, len(sheets) + 1)
+            )
+            + "</Types>",
+        )
+        zf.writestr(
+            "_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>",
+        )
+        zf.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(
+                f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>'
+                for i, (name, _) in enumerate(sheets, 1)
+            )
+            + "</sheets></workbook>",
+        )
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{i}" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{i}.xml"/>'
+                for i in range(1, len(sheets) + 1)
+            )
+            + "</Relationships>",
+        )
+
+        for i, (_, rows) in enumerate(sheets, 1):
+            xml_rows = []
+            for r, row in enumerate(rows, 1):
+                cells = "".join(
+                    f'<c r="{_xlsx_column(c)}{r}" t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+                    for c, value in enumerate(row)
+                    if value
+                )
+                xml_rows.append(f'<row r="{r}">{cells}</row>')
+            zf.writestr(
+                f"xl/worksheets/sheet{i}.xml",
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                f"<sheetData>{''.join(xml_rows)}</sheetData></worksheet>",
+            )
+
+    return buffer.getvalue()
+
+
+def get_table_export_data(results: list, format: str) -> tuple:
+    """
+    تصدير الجداول المستخرجة من النتائج
+
+    Returns:
+        tuple: (data, filename, mime_type) — أو None إذا لا توجد جداول
+    """
+    names, rows = [], []
+    for r in results:
+        if r.get("table"):
+            names.append(f"{r['file']} p{r['page']}" if r.get("file") else f"Page {r['page']}")
+            rows.append(r["table"])
+    tables = dict(zip(_sheet_names(names), rows))  # نفس الاسم لا يُسقط جدولاً
+
+    if not tables:
+        return None
+
+    if format == "XLSX":
+        data = tables_to_xlsx(tables)
+        logger.info(f"Exported {len(tables)} tables as XLSX: {len(data)} bytes")
+        return (
+            data,
+            "extracted_tables.xlsx",
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+    # CSV: الجداول متتالية مع سطر فارغ بينها
+    data = "\n".join(table_to_csv(rows) for rows in tables.values())
+    logger.info(f"Exported {len(tables)} tables as CSV: {len(data)} bytes")
+    return data, "extracted_tables.csv", "text/csv"
+
+
 def get_export_data(results: list, format: str) -> tuple:
     """
     الحصول على بيانات التصدير بالصيغة المطلوبة
@@ -80,16 +290,10 @@ def get_export_data(results: list, format: str) -> tuple:
     Returns:
         tuple: (data, filename, mime_type)
     """
-    exporters = {
-        "TXT": (export_as_txt, "extracted_text.txt", "text/plain"),
-        "JSON": (export_as_json, "extracted_text.json", "application/json"),
-        "CSV": (export_as_csv, "extracted_text.csv", "text/csv"),
-    }
-
-    if format not in exporters:
+    if format not in EXPORTERS:
         format = "TXT"
 
-    func, filename, mime = exporters[format]
+    func, filename, mime = EXPORTERS[format]
     data = func(results)
     logger.info(f"Exported as {format}: {len(data)} bytes")
 
@@ -0,0 +1,94 @@
+"""
+قوالب مناطق الاهتمام (ROI) للنماذج المتكررة
+Reusable region-of-interest templates for recurring forms
+"""
+
+import json
+import os
+
+from config import ROI_TEMPLATES_FILE, TESSERACT_PSM_MODES
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_regions(regions: list) -> list:
+    """
+    تنظيف قائمة المناطق — قص الإحداثيات إلى [0, 1] وإسقاط المناطق الفارغة
+
+    كل منطقة: {"name", "x0", "y0", "x1", "y1", "psm"}
+    """
+    default_psm = next(iter(TESSERACT_PSM_MODES))
+    cleaned = []
+
+    for idx, region in enumerate(regions or []):
+        try:
+            x0, y0, x1, y1 = (
+                min(max(float(region.get(k) or 0), 0.0), 1.0)
+                for k in ("x0", "y0", "x1", "y1")
+            )
+        except (TypeError, ValueError):
+            continue
+
+        x0, x1 = sorted((x0, x1))
+        y0, y1 = sorted((y0, y1))
+        if x1 - x0 <= 0 or y1 - y0 <= 0:
+            continue
+
+        psm = region.get("psm")
+        cleaned.append(
+            {
+                "name": region.get("name") or f"منطقة {idx + 1}",
+                "x0": x0,
+                "y0": y0,
+                "x1": x1,
+                "y1": y1,
+                "psm": psm if psm in TESSERACT_PSM_MODES else default_psm,
+            }
+        )
+
+    return cleaned
+
+
+def load_templates() -> dict:
+    """تحميل القوالب المحفوظة {اسم القالب: قائمة المناطق}"""
+    if not os.path.exists(ROI_TEMPLATES_FILE):
+        return {}
+
+    try:
+        with open(ROI_TEMPLATES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"ROI templates load error: {e}")
+        return {}
+
+
+def save_template(name: str, regions: list) -> bool:
+    """حفظ قالب مناطق باسم محدد"""
+    templates = load_templates()
+    templates[name] = normalize_regions(regions)
+
+    try:
+        with open(ROI_TEMPLATES_FILE, "w", encoding="utf-8") as f:
+            json.dump(templates, f, ensure_ascii=False, indent=2)
+        logger.info(f"ROI template saved: {name} ({len(templates[name])} regions)")
+        return True
+    except Exception as e:
+        logger.error(f"ROI template save error: {e}")
+        return False
+
+
+def delete_template(name: str) -> bool:
+    """حذف قالب محفوظ"""
+    templates = load_templates()
+    if name not in templates:
+        return False
+
+    del templates[name]
+    try:
+        with open(ROI_TEMPLATES_FILE, "w", encoding="utf-8") as f:
+            json.dump(templates, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        logger.error(f"ROI template delete error: {e}")
+        return False
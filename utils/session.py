@@ -3,8 +3,21 @@
 Session state management for the Streamlit app
 """
 
+import hashlib
+
 import streamlit as st
 
+from config import (
+    OCR_METHODS,
+    TESSERACT_LANGUAGES,
+    TESSERACT_PSM_MODES,
+    RESULT_EXTRA_KEYS,
+    BLANK_PAGE_SENSITIVITY,
+    DEFAULT_BLANK_SENSITIVITY,
+    DUPLICATE_PAGE_THRESHOLDS,
+    DEFAULT_DUPLICATE_THRESHOLD,
+)
+
 
 def init_session_state():
     """تهيئة جميع متغيرات الجلسة"""
@@ -16,12 +29,18 @@ def init_session_state():
         "tess_language": "إنجليزي",
         "tess_psm": "تلقائي كامل (مُوصى)",
         "show_confidence": True,
+        "adaptive_cascade": False,
+        "auto_language": False,
+        "table_mode": False,
+        "tiled_ocr": False,
+        "auto_tune": False,
 
         # إعدادات HF API
         "hf_token": "",
         "hf_model": "TrOCR Large Printed",
         "hf_model_ready": False,
         "hf_api_status": "غير معروف",
+        "hf_prewarmed": None,  # (النموذج، Token) آخر تحميل مسبق
 
         # إعدادات معالجة الصور
         "enable_enhancement": True,
@@ -31,13 +50,27 @@ def init_session_state():
         "grayscale": True,
         "denoise": True,
         "binarize": False,
+        "auto_crop": True,
+        "blank_sensitivity": DEFAULT_BLANK_SENSITIVITY,
+        "duplicate_threshold": DEFAULT_DUPLICATE_THRESHOLD,
 
         # إعدادات PDF
         "pdf_dpi": "جيد (200 DPI)",
 
+        # مناطق الاهتمام (ROI)
+        "enable_roi": False,
+        "roi_regions": [],
+
         # نتائج
         "all_results": [],
         "processing_complete": False,
+        "batch_results": [],
+        "searchable_pdf": None,
+        "pipeline_stats": [],
+        "processing_cancelled": False,
+
+        # فهرس البحث الدائم
+        "index_results": True,
     }
 
     for key, value in defaults.items():
@@ -45,23 +78,146 @@ def init_session_state():
             st.session_state[key] = value
 
 
+def get_session_id() -> str:
+    """معرّف جلسة Streamlit الحالية (لحصص الذاكرة)"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "default"
+
+
+def get_engine_name() -> str:
+    """اسم المحرك المختار في سجل المحركات (core.engines)"""
+    return OCR_METHODS.get(st.session_state.ocr_method, "tesseract")
+
+
+def get_ocr_settings() -> dict:
+    """
+    لقطة من إعدادات المعالجة الحالية
+
+    خيوط العمل لا تستطيع قراءة st.session_state، لذا تُمرَّر لها هذه اللقطة
+    """
+    ss = st.session_state
+    return {
+        "engine": get_engine_name(),
+        "lang": TESSERACT_LANGUAGES.get(ss.tess_language, "eng"),
+        "psm": TESSERACT_PSM_MODES.get(ss.tess_psm, 3),
+        "show_confidence": ss.show_confidence,
+        "adaptive_cascade": ss.adaptive_cascade,
+        "auto_language": ss.auto_language,
+        "table_mode": ss.table_mode,
+        "tiled_ocr": ss.tiled_ocr,
+        "hf_model": ss.hf_model,
+        "hf_token": ss.hf_token,
+        "enable_enhancement": ss.enable_enhancement,
+        "contrast": ss.contrast,
+        "brightness": ss.brightness,
+        "sharpness": ss.sharpness,
+        "grayscale": ss.grayscale,
+        "denoise": ss.denoise,
+        "binarize": ss.binarize,
+        "auto_crop": ss.auto_crop,
+        "blank_page": BLANK_PAGE_SENSITIVITY[ss.blank_sensitivity],
+        "duplicate_match": DUPLICATE_PAGE_THRESHOLDS[ss.duplicate_threshold],
+        "roi_regions": ss.roi_regions if ss.enable_roi else [],
+    }
+
+
+def duplicate_filter(settings: dict, document: str = "", file_names: list = None):
+    """
+    كاشف الصفحات المكررة لدفعة جديدة (None إذا كان معطّلاً)
+
+    فهرس البصمات يبقى طوال الجلسة — فالتكرار يُكشف عبر الملفات المرفوعة.
+    file_names: أسماء ملفات الطابور بترتيبها (صفحات الدفعات مفتاحها رقم الملف)
+    """
+    if not settings.get("duplicate_match"):
+        return None
+
+    from core.dedup import DuplicateFilter, PageHashIndex
+
+    if "page_hash_index" not in st.session_state:
+        st.session_state.page_hash_index = PageHashIndex()
+    return DuplicateFilter(
+        st.session_state.page_hash_index, settings, document, file_names
+    )
+
+
 def reset_results():
     """مسح النتائج السابقة"""
     st.session_state.all_results = []
     st.session_state.processing_complete = False
+    st.session_state.searchable_pdf = None
+    st.session_state.pipeline_stats = []
+
+
+def add_result(
+    page_num: int, text: str, confidence: float = None, engine: str = "", **extra
+):
+    """إضافة نتيجة جديدة (الحقول الإضافية تُحفظ إن لم تكن None)"""
+    entry = {
+        "page": page_num,
+        "text": text,
+        "confidence": confidence,
+        "engine": engine,
+    }
+    entry.update({k: v for k, v in extra.items() if v is not None})
+    st.session_state.all_results.append(entry)
+
+
+def document_ref(uploaded_file) -> dict:
+    """مرجع المستند للفهرسة — بصمة المحتوى تبقى ثابتة بين الجلسات"""
+    return {
+        "key": getattr(uploaded_file, "sha256", None)
+        or hashlib.sha256(uploaded_file.getvalue()).hexdigest(),
+        "name": uploaded_file.name,
+    }
 
 
-def add_result(page_num: int, text: str, confidence: float = None, engine: str = ""):
-    """إضافة نتيجة جديدة"""
-    st.session_state.all_results.append(
-        {
-            "page": page_num,
-            "text": text,
-            "confidence": confidence,
-            "engine": engine,
-        }
+def add_ocr_result(page_num: int, result: dict, document: dict = None):
+    """
+    إضافة نتيجة محرك OCR كما هي — أو رسالة الخطأ
+
+    Args:
+        document: مرجع المستند (document_ref) — تُضاف الصفحة لفهرس البحث
+            فور اكتمالها إذا كانت الفهرسة مفعّلة
+    """
+    if "error" in result:
+        add_result(
+            page_num, f"[خطأ: {result['error']}]", timed_out=result.get("timed_out")
+        )
+        return
+
+    add_result(
+        page_num,
+        result.get("text", ""),
+        result.get("avg_confidence"),
+        result.get("engine", ""),
+        **{k: result.get(k) for k in RESULT_EXTRA_KEYS},
     )
 
+    if document and st.session_state.index_results:
+        from core.search_index import get_search_index
+
+        try:
+            get_search_index().add_page(
+                document["key"], document["name"], page_num, result.get("text", "")
+            )
+        except Exception as e:
+            st.toast(f"⚠️ تعذّرت فهرسة الصفحة {page_num}: {e}")
+
+
+def drop_results(page_numbers) -> None:
+    """حذف نتائج صفحات معيّنة (قبل إعادة معالجتها)"""
+    page_numbers = set(page_numbers)
+    st.session_state.all_results = [
+        r for r in st.session_state.all_results if r["page"] not in page_numbers
+    ]
+
+
+def get_results_by_page() -> dict:
+    """فهرس النتائج حسب رقم الصفحة"""
+    return {r["page"]: r for r in st.session_state.all_results}
+
 
 def get_full_text() -> str:
     """الحصول على النص الكامل من جميع النتائج"""
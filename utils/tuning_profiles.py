@@ -0,0 +1,107 @@
+"""
+ملفات الضبط التلقائي المحفوظة لكل نوع مستند
+Saved auto-tuning profiles per document type
+"""
+
+import json
+import os
+import time
+
+from config import (
+    TUNING_PROFILES_FILE,
+    TESSERACT_PSM_MODES,
+    TUNER_ENHANCEMENT_PRESETS,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def load_profiles() -> dict:
+    """
+    تحميل الملفات المحفوظة {اسم الملف: profile}
+
+    profile: {"document_type", "pdf_dpi", "overrides", "confidence",
+              "seconds_per_page", "created_at"}
+    """
+    if not os.path.exists(TUNING_PROFILES_FILE):
+        return {}
+
+    try:
+        with open(TUNING_PROFILES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Tuning profiles load error: {e}")
+        return {}
+
+
+def _write(profiles: dict) -> bool:
+    try:
+        with open(TUNING_PROFILES_FILE, "w", encoding="utf-8") as f:
+            json.dump(profiles, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        logger.error(f"Tuning profiles save error: {e}")
+        return False
+
+
+def save_profile(name: str, document_type: str, profile: dict) -> bool:
+    """حفظ نتيجة الضبط (بدون سجل التجارب) باسم محدد"""
+    profiles = load_profiles()
+    profiles[name] = {
+        "document_type": document_type,
+        "pdf_dpi": profile["pdf_dpi"],
+        "overrides": profile["overrides"],
+        "confidence": profile["confidence"],
+        "seconds_per_page": profile["seconds_per_page"],
+        "created_at": time.time(),
+    }
+    if _write(profiles):
+        logger.info(f"Tuning profile saved: {name} ({document_type})")
+        return True
+    return False
+
+
+def find_profile(document_type: str) -> tuple:
+    """
+    أحدث ملف محفوظ لنوع المستند — (الاسم، profile) أو (None, None)
+
+    المطابقة على النوع كاملاً (core.autotune.document_type) بما فيه المحرك
+    واللغة — ملف ضُبط لـ ara لا يُستخدم لـ eng
+    """
+    matches = [
+        (name, p) for name, p in load_profiles().items()
+        if p.get("document_type") == document_type
+    ]
+    if not matches:
+        return None, None
+    return max(matches, key=lambda item: item[1].get("created_at", 0))
+
+
+def describe_profile(profile: dict) -> str:
+    """وصف مختصر للعرض: الدقة · وضع التقسيم · التحسين · الثقة · الزمن"""
+    overrides = profile["overrides"]
+    psm = next(
+        (label for label, value in TESSERACT_PSM_MODES.items()
+         if value == overrides.get("psm")),
+        "وضع التقسيم الحالي",
+    )
+    enhancement = next(
+        (name for name, preset in TUNER_ENHANCEMENT_PRESETS.items()
+         if all(overrides.get(k) == v for k, v in preset.items())),
+        "التحسين الحالي",
+    )
+    return (
+        f"{profile['pdf_dpi']} · {psm} · {enhancement} · "
+        f"ثقة {profile['confidence']}% · {profile['seconds_per_page']} ث/صفحة"
+    )
+
+
+def delete_profile(name: str) -> bool:
+    """حذف ملف محفوظ"""
+    profiles = load_profiles()
+    if name not in profiles:
+        return False
+
+    del profiles[name]
+    return _write(profiles)